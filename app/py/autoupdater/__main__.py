@@ -0,0 +1,133 @@
+"""The command line entry point of the cloth box updater.
+
+Each command imports only what it needs, and the browser and the db are connected on first use,
+so a scheduled run that finds nothing to update finishes quickly.
+
+Example:
+    $ python -m autoupdater search --date 2024-06-01
+    $ python -m autoupdater update
+    $ python -m autoupdater update --provider 송파구 --provider 강남구
+    $ python -m autoupdater update --resume
+    $ python -m autoupdater update --refresh
+    $ python -m autoupdater status
+    $ python -m autoupdater build-index --csv addresses.csv --encoding cp949
+    $ python -m autoupdater build-index --from-db
+    $ python -m autoupdater export-tiles
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.conf import config
+from typing import List
+import argparse
+import json
+import os
+
+def search(args: argparse.Namespace) -> None:
+    from autoupdater.data_portal_searcher import DataPortalSearcher
+
+    for search_data in DataPortalSearcher().search_data_many(config['SEARCH_CONFIG']['SEARCH_KEYWORD'], args.date):
+        print(json.dumps(search_data, ensure_ascii=False))
+    return
+
+def update(args: argparse.Namespace) -> None:
+    from autoupdater.clothbox_manager import ClothBoxManager
+    from autoupdater.clothbox_updater import ClothBoxUpdater
+    from autoupdater.data_portal_searcher import DataPortalSearcher
+
+    updater = ClothBoxUpdater(ClothBoxManager(), DataPortalSearcher())
+    updater.start_update(resume=args.resume, providers=args.provider, refresh=args.refresh)
+    return
+
+def status(args: argparse.Namespace) -> None:
+    from autoupdater.clothbox_manager import ClothBoxManager
+    from autoupdater.run_journal import RunJournal
+
+    clothbox_db = ClothBoxManager()
+    last_update_date = clothbox_db.read_last_update_date()
+    result = {
+        "last_update_date": last_update_date.isoformat() if last_update_date is not None else None,
+        "oldest_failed_dataset_date": clothbox_db.read_oldest_failed_dataset_date(),
+        "unfinished_run": None,
+        "last_run": None,
+    }
+
+    journal = RunJournal()
+    if journal.load():
+        progress = [journal.get(search_data['link']) for search_data in journal.search_data_list]
+        result["unfinished_run"] = {
+            "datasets": len(progress),
+            "finished": sum(1 for dataset in progress if journal.is_finished(dataset)),
+        }
+
+    report_path = config['METRICS']['REPORT_PATH']
+    if os.path.exists(report_path):
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        result["last_run"] = {key: report.get(key) for key in ("status", "started_at", "finished_at", "resumed", "datasets")}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return
+
+def build_index(args: argparse.Namespace) -> None:
+    from autoupdater.local_geocoder import AddressIndex
+
+    index = AddressIndex()
+    for file_path in args.csv or []:
+        index.load_csv(file_path, args.address_column, args.lat_column, args.lon_column, args.encoding, args.name_column)
+    if args.from_db:
+        from autoupdater.clothbox_manager import ClothBoxManager
+        index.load_clothbox(ClothBoxManager())
+    print(f"{len(index)} addresses in {config['LOCAL_GEOCODER']['PATH']}")
+    index.close()
+    return
+
+def export_tiles(args: argparse.Namespace) -> None:
+    from autoupdater.clothbox_manager import ClothBoxManager
+    from autoupdater.tile_exporter import TileExporter
+
+    exporter = TileExporter(ClothBoxManager(), args.directory, args.precision)
+    manifest = exporter.export(args.provider)
+    print(f"{len(manifest['tiles'])} tiles in {args.directory}")
+    return
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog='autoupdater', description="Update the cloth box data from the public data portal.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help="search the datasets on the data portal")
+    search_parser.add_argument('--date', help="search only the datasets modified since the date (YYYY-MM-DD)")
+    search_parser.set_defaults(func=search)
+
+    update_parser = subparsers.add_parser('update', help="update the cloth box data")
+    update_parser.add_argument('--provider', action='append', help="update only the datasets of the provider, may be repeated")
+    update_parser.add_argument('--resume', action='store_true', help="resume the unfinished run recorded in the run journal")
+    update_parser.add_argument('--refresh', action='store_true', help="write to a staging collection and swap it in when the update finishes")
+    update_parser.set_defaults(func=update)
+
+    status_parser = subparsers.add_parser('status', help="show the last update and the unfinished run")
+    status_parser.set_defaults(func=status)
+
+    index_parser = subparsers.add_parser('build-index', help="load address coordinates into the local address index")
+    index_parser.add_argument('--csv', action='append', help="CSV file of address coordinates, may be repeated")
+    index_parser.add_argument('--encoding', default='utf-8', help="encoding of the CSV files")
+    index_parser.add_argument('--address-column', default='주소', help="column of the address")
+    index_parser.add_argument('--lat-column', default='위도', help="column of the latitude")
+    index_parser.add_argument('--lon-column', default='경도', help="column of the longitude")
+    index_parser.add_argument('--name-column', help="column of the canonical road or lot address (default: the address column)")
+    index_parser.add_argument('--from-db', action='store_true', help="load the cloth boxes already geocoded in the db")
+    index_parser.set_defaults(func=build_index)
+
+    tiles_parser = subparsers.add_parser('export-tiles', help="export the cloth boxes as static geohash tiles")
+    tiles_parser.add_argument('--provider', action='append', help="export only the tiles touched by the provider, may be repeated")
+    tiles_parser.add_argument('--directory', default=config['TILE_EXPORT']['DIR'], help="directory of the tiles and the manifest")
+    tiles_parser.add_argument('--precision', type=int, default=config['TILE_EXPORT']['PRECISION'], help="geohash precision of the tiles")
+    tiles_parser.set_defaults(func=export_tiles)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""A module for normalizing addresses before geocoding.
+
+This module converts addresses into a canonical key, so that rows that differ only by whitespace,
+full-width characters, "번지", parenthesized notes or a trailing building/position suffix are geocoded and written once.
+The duplicates are collapsed within a dataset only. The same address of different providers is shared at geocoding instead.
+The column version runs with vectorized pandas string operations and precompiled patterns.
+
+Example:
+    >>> normalize_address('송파동 18-3번지 (아파트 앞)')
+    '송파동 18-3'
+    >>> dedup_addresses(['송파동 18-3', '송파동　１８－３', '송파동 22-6 101동'])
+    (['송파동 18-3', '송파동 22-6'], 1)
+"""
+
+from typing import TYPE_CHECKING, Iterable, List, Tuple
+import re
+import unicodedata
+
+# pandas는 가져오는 데 오래 걸리므로 실제로 주소를 정규화할 때 가져옴
+if TYPE_CHECKING:
+    import pandas as pd
+
+_PARENTHESES_PATTERN = re.compile(r'\s*[\(\[].*?[\)\]]\s*')
+_BEONJI_PATTERN = re.compile(r'(\d)\s*번지')
+_HYPHEN_PATTERN = re.compile(r'\s*[-‐‑–—]\s*')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_POSITION_SUFFIX_PATTERN = re.compile(r'\s+(앞|옆|뒤|건너편|맞은편|입구|인근|부근|주변)$')
+# 'N동'은 동과 호가 함께 있거나 번지 뒤에 올 때만 건물의 동으로 보고, '개포 1동' 같은 행정동은 남김
+_BUILDING_SUFFIX_PATTERN = re.compile(r'(\s+\d+동\s*\d+호|(?<=\d)\s+\d+동|\s+지하\s*\d+층|\s+\d+층)$')
+
+_REPLACEMENTS = [
+    (_PARENTHESES_PATTERN, ' '),
+    (_BEONJI_PATTERN, r'\1'),
+    (_HYPHEN_PATTERN, '-'),
+    (_WHITESPACE_PATTERN, ' '),
+]
+_SUFFIX_PATTERNS = [_POSITION_SUFFIX_PATTERN, _BUILDING_SUFFIX_PATTERN]
+
+def normalize_address(address: str) -> str:
+    """Convert the address into its canonical key.
+
+    Args:
+        address (str): The address to normalize.
+
+    Returns:
+        str: The canonical key of the address.
+    """
+    address = unicodedata.normalize('NFKC', address)
+    for pattern, replacement in _REPLACEMENTS:
+        address = pattern.sub(replacement, address)
+    address = address.strip()
+    for pattern in _SUFFIX_PATTERNS:
+        address = pattern.sub('', address)
+    return address
+
+def normalize_addresses(addresses: 'pd.Series') -> 'pd.Series':
+    """Convert the column of addresses into their canonical keys.
+
+    Args:
+        addresses (pd.Series): The addresses to normalize.
+
+    Returns:
+        pd.Series: The canonical key of each address, in the same order.
+    """
+    addresses = addresses.astype(str).str.normalize('NFKC')
+    for pattern, replacement in _REPLACEMENTS:
+        addresses = addresses.str.replace(pattern, replacement, regex=True)
+    addresses = addresses.str.strip()
+    for pattern in _SUFFIX_PATTERNS:
+        addresses = addresses.str.replace(pattern, '', regex=True)
+    return addresses
+
+def dedup_addresses(addresses: Iterable[str]) -> Tuple[List[str], int]:
+    """Normalize the addresses of a dataset and collapse the duplicates.
+
+    Args:
+        addresses (Iterable[str]): The addresses to deduplicate.
+
+    Returns:
+        Tuple[List[str], int]: The unique canonical keys in their first order, and the number of rows that were folded.
+    """
+    import pandas as pd
+    keys = normalize_addresses(pd.Series(list(addresses), dtype=object))
+    total = len(keys)
+    keys = keys[keys != ''].drop_duplicates()
+    return keys.tolist(), total - len(keys)
@@ -0,0 +1,595 @@
+"""A module for managing the db with asyncio.
+
+This module defines the asyncio version of the db manager on the motor driver.
+`IAsyncClothBoxManager` has the same methods as `IClothBoxManager`, as coroutines, so an asyncio updater can overlap
+the round-trips to the db with geocoding and downloading instead of blocking on each of them.
+The queries are made by the same builders as `ClothBoxManager`, so the two managers read and write the same documents.
+The managers running on the same event loop share one client and its connection pool.
+
+Example:
+    >>> manager = AsyncClothBoxManager()
+    >>> ret = await manager.ensure_indexes()
+    >>> await manager.begin_refresh()
+    >>> ret = await manager.write_clothbox_data_many(records, batch_size=500, concurrency=4)
+    >>> ret = await manager.commit_refresh()
+    >>> ret = await manager.read_last_update_date()
+    >>> async for location in manager.get_clothbox_locations():
+    ...     print(location)
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from autoupdater.clothbox_manager import (ClothBoxManager, HANDOVER_UPDATE, LAST_UPDATE_QUERY, LOCATION_PROJECTION, LOCATION_QUERY, POINT_PROJECTION,
+                                          RETRIED_STATUSES, count_bulk_result, find_missing_indexes, make_clothbox_document,
+                                          make_clothbox_locations, make_clothbox_operations, make_clothbox_point, make_dataset_state,
+                                          make_index_name, make_orphaned_query, make_points_query, make_source_condition,
+                                          make_update_info, select_clothbox_indexes, select_source_addresses)
+from datetime import datetime
+from overrides import overrides
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+import abc
+import asyncio
+import os
+import threading
+
+log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
+
+class IAsyncClothBoxManager(metaclass=abc.ABCMeta):
+    """An abstract base class for asyncio db manager.
+
+    This interface mirrors `IClothBoxManager`, with every method as a coroutine. See `IClothBoxManager` for the arguments.
+    """
+    @abc.abstractmethod
+    async def read_last_update_date(self) -> datetime:
+        """Abstract method to read the last update date from the db."""
+        pass
+
+    @abc.abstractmethod
+    async def write_update_info(self, updated_items:List[str], datasets:List[Dict]=None, partial:bool=False, update_date:datetime=None) -> bool:
+        """Abstract method to write the update info to the db."""
+        pass
+
+    @abc.abstractmethod
+    async def read_dataset_hash(self, link:str) -> Optional[str]:
+        """Abstract method to read the content hash of the dataset recorded by the latest update."""
+        pass
+
+    @abc.abstractmethod
+    async def read_dataset_states(self, links:List[str]) -> Dict[str, Dict]:
+        """Abstract method to read the state of the datasets from the db."""
+        pass
+
+    @abc.abstractmethod
+    async def write_dataset_state(self, link:str, provider:str, portal_date:str, status:str) -> bool:
+        """Abstract method to write the state of the dataset to the db."""
+        pass
+
+    @abc.abstractmethod
+    async def read_oldest_failed_dataset_date(self) -> Optional[str]:
+        """Abstract method to read the oldest modified date of the datasets whose last update failed or was partial."""
+        pass
+
+    @abc.abstractmethod
+    async def write_clothbox_data(self, address:str, providing_name:str, coordinates:List[float]) -> bool:
+        """Abstract method to write the clothbox data to the db."""
+        pass
+
+    @abc.abstractmethod
+    async def write_clothbox_data_many(self, records:Iterable[Dict], batch_size:int=config['DB_WRITE_BATCH_SIZE'],
+                                       concurrency:int=config['DB_WRITE_CONCURRENCY']) -> List[Dict[str, int]]:
+        """Abstract method to write many clothbox data to the db in batches, several batches at a time."""
+        pass
+
+    @abc.abstractmethod
+    async def get_clothbox_data(self, providing_name:str) -> List[str]:
+        """Abstract method to get the clothboxes from the db by a specific organization."""
+        pass
+
+    @abc.abstractmethod
+    async def get_clothbox_sources(self, providing_name:str, source_link:str) -> List[str]:
+        """Abstract method to get the source addresses of the clothboxes written from a specific dataset."""
+        pass
+
+    @abc.abstractmethod
+    def get_clothbox_points(self, providing_names:List[str]=None, boxes:List[Tuple[float, float, float, float]]=None) -> AsyncIterator[Dict]:
+        """Abstract method to get the points of the clothboxes, of all or some providers, as an async iterator."""
+        pass
+
+    @abc.abstractmethod
+    def get_clothbox_locations(self) -> AsyncIterator[Dict]:
+        """Abstract method to get the geocoded source addresses of all the clothboxes, as an async iterator."""
+        pass
+
+    @abc.abstractmethod
+    async def delete_clothbox_sources(self, providing_name:str, source_link:str, source_addresses:List[str]) -> int:
+        """Abstract method to remove the sources of a specific dataset from the clothboxes, and delete the clothboxes left without a source."""
+        pass
+
+    @abc.abstractmethod
+    async def ensure_indexes(self) -> List[str]:
+        """Abstract method to create the indexes of the collections that do not exist yet."""
+        pass
+
+    @abc.abstractmethod
+    async def begin_refresh(self, reuse:bool=False) -> bool:
+        """Abstract method to start to write the clothboxes to a staging collection instead of the live one, and return True if it was reused."""
+        pass
+
+    @abc.abstractmethod
+    async def commit_refresh(self) -> bool:
+        """Abstract method to swap the staging collection in for the live collection atomically."""
+        pass
+
+    @abc.abstractmethod
+    async def abort_refresh(self) -> None:
+        """Abstract method to drop the staging collection and go back to writing the live collection."""
+        pass
+
+    @abc.abstractmethod
+    async def delete_clothbox_data(self, address:str) -> bool:
+        """Abstract method to delete the clothbox data from the db."""
+        pass
+
+class AsyncClothBoxManager(IAsyncClothBoxManager):
+    """A class for managing the db with asyncio.
+
+    The client is made on the first access to `db` and shared by every manager running on the same event loop.
+    A motor client is bound to the loop it first ran on, so a manager used again under another loop,
+    for example by a second `asyncio.run`, connects again with the client of that loop.
+    The collections are resolved once, when the manager connects. Unlike `ClothBoxManager`,
+    the indexes are not ensured on connect, so await `ensure_indexes` once before writing.
+    Between `begin_refresh` and `commit_refresh`, the clothboxes are read from and written to a staging collection.
+
+    Attributes:
+        db (motor.motor_asyncio.AsyncIOMotorDatabase): The database object.
+    """
+    # (이벤트 루프, uri)마다 클라이언트 하나. 루프 밖에서 만든 클라이언트는 루프를 None으로 둠
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._db = None
+        self._loop = None
+        self._collections = {}
+        self._staging_name = None
+        return
+
+    @classmethod
+    def get_client(cls, db_uri: str, max_pool_size: int = config['DB_MAX_POOL_SIZE']):
+        """Get the client of the running event loop for the uri, and make it on the first call.
+
+        The clients of the event loops that were closed are closed and dropped.
+
+        Args:
+            db_uri (str): The uri of the db.
+            max_pool_size (int, optional): The maximum number of connections of the client. Defaults to config['DB_MAX_POOL_SIZE'].
+
+        Returns:
+            motor.motor_asyncio.AsyncIOMotorClient: The client.
+        """
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo.server_api import ServerApi
+
+        key = (_running_loop(), db_uri)
+        with cls._clients_lock:
+            for closed in [closed for closed in cls._clients if closed[0] is not None and closed[0].is_closed()]:
+                cls._clients.pop(closed).close()
+            if key not in cls._clients:
+                log.info("Connecting to the db...")
+                cls._clients[key] = AsyncIOMotorClient(db_uri, server_api=ServerApi('1'), maxPoolSize=max_pool_size)
+            return cls._clients[key]
+
+    @classmethod
+    def close_clients(cls) -> None:
+        """Close the clients of the process.
+        """
+        with cls._clients_lock:
+            for client in cls._clients.values():
+                client.close()
+            cls._clients.clear()
+        return
+
+    @property
+    def db(self):
+        if self._db is None or self._loop is not _running_loop():
+            self._connect()
+        return self._db
+
+    def _connect(self) -> None:
+        load_dotenv()
+        self._loop = _running_loop()
+        self._db = self.get_client(os.environ.get('DB_URI'))[os.environ.get('DB_NAME')]
+        # 호출마다 환경 변수를 읽지 않도록 컬렉션을 한 번만 찾아 둠
+        self._collections = {}
+        for env_name, default_name, _ in ClothBoxManager.INDEXES:
+            collection_name = os.environ.get(env_name, default_name)
+            if collection_name is not None:
+                self._collections[env_name] = self._db[collection_name]
+        return
+
+    @overrides
+    async def ensure_indexes(self) -> List[str]:
+        """Create the indexes of `ClothBoxManager.INDEXES` that do not exist yet. Running it again builds nothing.
+
+        Returns:
+            List[str]: The indexes that were built, as 'collection.index_name'.
+        """
+        from pymongo.errors import PyMongoError
+
+        self.db
+        built = []
+        try:
+            for env_name, _, indexes in ClothBoxManager.INDEXES:
+                collection = self._collections.get(env_name)
+                if collection is None:
+                    continue
+                built += await self._build_indexes(collection, indexes)
+        except PyMongoError as e:
+            log.error(f"Unable to ensure the indexes: {e}")
+        if built:
+            log.info(f"Built the indexes: {', '.join(built)}")
+        return built
+
+    @overrides
+    async def begin_refresh(self, reuse:bool=False) -> bool:
+        """Start to write the clothboxes to a staging collection instead of the live one. See `ClothBoxManager.begin_refresh`.
+
+        Args:
+            reuse (bool, optional): Keep the staging collection left by an interrupted refresh instead of copying again. Defaults to False.
+
+        Returns:
+            bool: True if the staging collection of an interrupted refresh was reused, False if it was copied from the live collection.
+        """
+        live_name = os.environ.get('DB_COLLECTION_CLOTH_BOX')
+        staging_name = live_name + config['DB_STAGING_SUFFIX']
+        reused = reuse and staging_name in await self.db.list_collection_names()
+        if reused:
+            log.info(f"Reusing the staging collection: {staging_name}")
+        else:
+            log.info(f"Copying {live_name} to the staging collection: {staging_name}...")
+            await self.db.drop_collection(staging_name)
+            # $out은 커서를 끝까지 읽어야 실행됨
+            await self.db[live_name].aggregate([{"$match": {}}, {"$out": staging_name}]).to_list(None)
+        await self._build_indexes(self.db[staging_name], select_clothbox_indexes(staging_load=True))
+        self._staging_name = staging_name
+        return reused
+
+    @overrides
+    async def commit_refresh(self) -> bool:
+        """Build the rest of the indexes on the staging collection and swap it in for the live collection.
+
+        Raises:
+            Exception: If a required index could not be built. The refresh is aborted.
+
+        Returns:
+            bool: True if the staging collection was swapped in, False if there was no refresh.
+        """
+        if self._staging_name is None:
+            return False
+        live_name = os.environ.get('DB_COLLECTION_CLOTH_BOX')
+        staging_collection = self.db[self._staging_name]
+        built = await self._build_indexes(staging_collection, select_clothbox_indexes())
+        missing = find_missing_indexes(await staging_collection.index_information())
+        if missing:
+            staging_name = self._staging_name
+            await self.abort_refresh()
+            raise Exception(f"Failed to build the indexes {missing} on {staging_name}, the refresh was aborted")
+        log.info(f"Built {len(built)} indexes on {self._staging_name}, swapping it in for {live_name}...")
+        await staging_collection.rename(live_name, dropTarget=True)
+        self._staging_name = None
+        return True
+
+    @overrides
+    async def abort_refresh(self) -> None:
+        """Drop the staging collection and go back to writing the live collection.
+        """
+        if self._staging_name is None:
+            return
+        log.info(f"Dropping the staging collection: {self._staging_name}")
+        await self.db.drop_collection(self._staging_name)
+        self._staging_name = None
+        return
+
+    @overrides
+    async def read_last_update_date(self) -> datetime:
+        """Read the last update date from the db.
+
+        Returns:
+            datetime: The last update date.
+        """
+        log.info("Reading the last update date from the db...")
+        docs = await self._collection('DB_COLLECTION_UPDATE_INFO').find(LAST_UPDATE_QUERY, {"update_date": 1, "_id": 0}).sort("update_date", -1).limit(1).to_list(1)
+        if len(docs) == 0:
+            log.info("No update info found.")
+            return None
+        return docs[0]["update_date"]
+
+    @overrides
+    async def write_update_info(self, updated_items:List[str], datasets:List[Dict]=None, partial:bool=False, update_date:datetime=None) -> bool:
+        """Write the update info to the db.
+
+        Args:
+            updated_items (List[str]): A list of items that were updated.
+            datasets (List[Dict], optional): The datasets that were ingested. Each dictionary should have the following keys: 'provider', 'link', 'hash', and 'row_count'.
+                Defaults to None.
+            partial (bool, optional): True if only some providers were updated. A partial update does not move the last update date. Defaults to False.
+            update_date (datetime, optional): The date of the update. Defaults to None, which uses the current time.
+
+        Returns:
+            bool: True if the update info was written successfully, False otherwise.
+        """
+        log.info("Writing the update info to the db...")
+        update_query = make_update_info(updated_items, datasets, partial, update_date)
+        result = await self._collection('DB_COLLECTION_UPDATE_INFO').update_one({"update_date": update_query["update_date"]}, {"$set": update_query}, upsert=True)
+        return result.acknowledged
+
+    @overrides
+    async def read_dataset_hash(self, link:str) -> Optional[str]:
+        """Read the content hash of the dataset recorded by the latest update.
+
+        Args:
+            link (str): The link of the dataset.
+
+        Returns:
+            Optional[str]: The content hash of the dataset. None if the dataset has never been ingested.
+        """
+        doc = await self._collection('DB_COLLECTION_UPDATE_INFO').find_one(
+            {"datasets.link": link},
+            {"datasets.$": 1, "_id": 0},
+            sort=[("update_date", -1)]
+        )
+        if doc is None:
+            return None
+        return doc["datasets"][0]["hash"]
+
+    @overrides
+    async def read_dataset_states(self, links:List[str]) -> Dict[str, Dict]:
+        """Read the state of the datasets from the db with a single query.
+
+        Args:
+            links (List[str]): The links of the datasets.
+
+        Returns:
+            Dict[str, Dict]: The state of each dataset found, keyed by the link.
+        """
+        docs = self._collection('DB_COLLECTION_DATASET_STATE').find({"link": {"$in": links}}, {"_id": 0})
+        return {doc["link"]: doc async for doc in docs}
+
+    @overrides
+    async def write_dataset_state(self, link:str, provider:str, portal_date:str, status:str) -> bool:
+        """Write the state of the dataset to the db.
+
+        Args:
+            link (str): The link of the dataset.
+            provider (str): The name of the provider.
+            portal_date (str): The modified date of the dataset on the data portal. Example: '2020-01-01'
+            status (str): The result of the update. One of 'ingested', 'unchanged', 'partial', and 'failed'.
+                'partial' means some rows could not be geocoded, and the dataset is retried like a failed one.
+
+        Returns:
+            bool: True if the state was written successfully, False otherwise.
+        """
+        update_query = make_dataset_state(link, provider, portal_date, status)
+        result = await self._collection('DB_COLLECTION_DATASET_STATE').update_one({"link": link}, {"$set": update_query}, upsert=True)
+        return result.acknowledged
+
+    @overrides
+    async def read_oldest_failed_dataset_date(self) -> Optional[str]:
+        """Read the oldest modified date of the datasets whose last update failed or was partial.
+
+        Returns:
+            Optional[str]: The oldest modified date on the data portal. None if no update failed.
+        """
+        doc = await self._collection('DB_COLLECTION_DATASET_STATE').find_one(
+            {"status": {"$in": list(RETRIED_STATUSES)}},
+            {"portal_date": 1, "_id": 0},
+            sort=[("portal_date", 1)]
+        )
+        if doc is None:
+            return None
+        return doc["portal_date"]
+
+    @overrides
+    async def write_clothbox_data(self, address:str, providing_name:str, coordinates:List[float]) -> bool:
+        """Write the clothbox data to the db.
+
+        Args:
+            address (str): The address of the clothbox.
+            providing_name (str): The name of the provider.
+            coordinates (List[float]): The coordinates of the clothbox. The order should be [longitude, latitude].
+
+        Returns:
+            bool: True if the clothbox data was written successfully, False otherwise.
+        """
+        update_query = make_clothbox_document(address, providing_name, coordinates)
+        result = await self._collection('DB_COLLECTION_CLOTH_BOX').update_one({"address": address}, {"$set": update_query}, upsert=True)
+        return result.acknowledged
+
+    @overrides
+    async def write_clothbox_data_many(self, records:Iterable[Dict], batch_size:int=config['DB_WRITE_BATCH_SIZE'],
+                                       concurrency:int=config['DB_WRITE_CONCURRENCY']) -> List[Dict[str, int]]:
+        """Write many clothbox data to the db with unordered bulk upserts, several batches at a time.
+
+        Args:
+            records (Iterable[Dict]): The clothbox data to write. See `ClothBoxManager.write_clothbox_data_many`.
+            batch_size (int, optional): The number of records written in a single request. Defaults to config['DB_WRITE_BATCH_SIZE'].
+            concurrency (int, optional): The number of batches in flight at the same time. Defaults to config['DB_WRITE_CONCURRENCY'].
+
+        Returns:
+            List[Dict[str, int]]: The result of each batch, in the order of the batches. Each dictionary has the following keys: 'upserted', 'modified', and 'failed'.
+        """
+        clothbox_collection = self._collection('DB_COLLECTION_CLOTH_BOX')
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = []
+        batch = []
+        try:
+            # 한 배치가 실패하면 TaskGroup이 다음 배치를 기다리던 루프와 쓰고 있던 배치를 모두 취소하고 끝날 때까지 기다림
+            async with asyncio.TaskGroup() as task_group:
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        # 동시에 쓰는 배치 수만큼만 다음 배치를 만들어 레코드를 한꺼번에 메모리에 올리지 않음
+                        await semaphore.acquire()
+                        tasks.append(task_group.create_task(self._write_clothbox_batch(clothbox_collection, batch, semaphore)))
+                        batch = []
+                if batch:
+                    await semaphore.acquire()
+                    tasks.append(task_group.create_task(self._write_clothbox_batch(clothbox_collection, batch, semaphore)))
+        except ExceptionGroup as e:
+            # 동기 버전처럼 배치에서 난 예외를 그대로 올림
+            raise e.exceptions[0]
+        return [task.result() for task in tasks]
+
+    @overrides
+    async def get_clothbox_data(self, providing_name:str) -> List[str]:
+        """Get the clothboxes from the db by a specific organization.
+
+        Args:
+            providing_name (str): The name of the provider.
+
+        Returns:
+            List[str]: A list of the address of clothboxes.
+        """
+        docs = self._collection('DB_COLLECTION_CLOTH_BOX').find({"providing_name": providing_name}, {"address": 1, "_id": 0})
+        return [doc["address"] async for doc in docs]
+
+    @overrides
+    async def get_clothbox_sources(self, providing_name:str, source_link:str) -> List[str]:
+        """Get the source addresses of the clothboxes written from a specific dataset.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+
+        Returns:
+            List[str]: A list of the source address of clothboxes.
+        """
+        docs = self._collection('DB_COLLECTION_CLOTH_BOX').find({
+            "sources": {"$elemMatch": make_source_condition(providing_name, source_link)}
+        }, {"sources": 1, "_id": 0})
+        return [source_address async for doc in docs for source_address in select_source_addresses(doc, providing_name, source_link)]
+
+    @overrides
+    async def get_clothbox_points(self, providing_names:List[str]=None, boxes:List[Tuple[float, float, float, float]]=None) -> AsyncIterator[Dict]:
+        """Get the points of the clothboxes, of all or some providers.
+
+        Args:
+            providing_names (List[str], optional): The names of the providers. Defaults to None, which gets all the clothboxes.
+            boxes (List[Tuple[float, float, float, float]], optional): Only the clothboxes within these boxes,
+                as (min longitude, min latitude, max longitude, max latitude). Defaults to None, which gets the clothboxes anywhere.
+
+        Yields:
+            Dict: The clothbox with the keys 'address', 'providing_name' and 'coordinates'([longitude, latitude]).
+        """
+        if boxes is not None and len(boxes) == 0:
+            return
+        async for doc in self._collection('DB_COLLECTION_CLOTH_BOX').find(make_points_query(providing_names, boxes), POINT_PROJECTION):
+            yield make_clothbox_point(doc)
+
+    @overrides
+    async def get_clothbox_locations(self) -> AsyncIterator[Dict]:
+        """Get the geocoded source addresses of all the clothboxes.
+
+        Yields:
+            Dict: The clothbox with the keys 'source_address', 'address' and 'coordinates'([longitude, latitude]).
+        """
+        async for doc in self._collection('DB_COLLECTION_CLOTH_BOX').find(LOCATION_QUERY, LOCATION_PROJECTION):
+            for location in make_clothbox_locations(doc):
+                yield location
+
+    @overrides
+    async def delete_clothbox_sources(self, providing_name:str, source_link:str, source_addresses:List[str]) -> int:
+        """Remove the sources of a specific dataset from the clothboxes, and delete the clothboxes left without a source.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+            source_addresses (List[str]): The source addresses of the clothboxes to delete.
+
+        Returns:
+            int: The number of deleted clothboxes.
+        """
+        clothbox_collection = self._collection('DB_COLLECTION_CLOTH_BOX')
+        condition = make_source_condition(providing_name, source_link, source_addresses)
+        docs = clothbox_collection.find({"sources": {"$elemMatch": condition}}, {"address": 1, "_id": 0})
+        addresses = [doc["address"] async for doc in docs]
+        if len(addresses) == 0:
+            return 0
+        await clothbox_collection.update_many({"address": {"$in": addresses}}, {"$pull": {"sources": condition}})
+        result = await clothbox_collection.delete_many({"address": {"$in": addresses}, "sources": {"$size": 0}})
+        await clothbox_collection.update_many(make_orphaned_query(providing_name, addresses), HANDOVER_UPDATE)
+        return result.deleted_count
+
+    @overrides
+    async def delete_clothbox_data(self, address:str) -> bool:
+        """Delete the clothbox data from the db.
+
+        Args:
+            address (str): The address of the clothbox.
+
+        Returns:
+            bool: True if the clothbox data was deleted successfully, False otherwise.
+        """
+        result = await self._collection('DB_COLLECTION_CLOTH_BOX').delete_one({"address": address})
+        return result.acknowledged
+
+    def _collection(self, env_name: str):
+        self.db
+        # 새로고침 중에는 수거함 읽기와 쓰기 모두 스테이징 컬렉션으로 보냄
+        if env_name == 'DB_COLLECTION_CLOTH_BOX' and self._staging_name is not None:
+            return self._db[self._staging_name]
+        return self._collections[env_name]
+
+    async def _build_indexes(self, collection, indexes:List) -> List[str]:
+        from pymongo.errors import OperationFailure
+
+        built = []
+        existing = await collection.index_information()
+        for keys, options in indexes:
+            index_name = make_index_name(keys)
+            if index_name in existing:
+                continue
+            try:
+                await collection.create_index(keys, name=index_name, **options)
+            except OperationFailure as e:
+                log.error(f"Failed to build the index {collection.name}.{index_name}: {e}")
+                continue
+            built.append(f"{collection.name}.{index_name}")
+        return built
+
+    async def _write_clothbox_batch(self, clothbox_collection, batch:List[Dict], semaphore:asyncio.Semaphore) -> Dict[str, int]:
+        from pymongo.errors import BulkWriteError
+
+        try:
+            with metrics.timer('db_write_batch_seconds'):
+                result = await clothbox_collection.bulk_write(make_clothbox_operations(batch), ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            log.error(f"Failed to write some of the clothbox data: {e}")
+            details = e.details
+            metrics.inc('errors_total', stage='db_write')
+        finally:
+            semaphore.release()
+        return count_bulk_result(details)
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+if __name__ == "__main__":
+    async def main():
+        manager = AsyncClothBoxManager()
+        await manager.ensure_indexes()
+        print(await manager.write_clothbox_data("송파동 18-3", "송파구", [127.10801000757587, 37.506659051679726]))
+        print(await manager.read_last_update_date())
+        print(await manager.get_clothbox_data("송파구"))
+        AsyncClothBoxManager.close_clients()
+    asyncio.run(main())
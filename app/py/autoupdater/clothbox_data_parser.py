@@ -5,8 +5,8 @@ This module defines the interface and the implementation of the class that parse
 Example:
     >>> parser = ClothBoxDataParser()
     >>> parser.set_strategy(CsvParser())
-    >>> result = parser.parse('res/data.csv')
-    >>> print(result)
+    >>> result = parser.parse_address('res/data.csv')
+    >>> print(list(result))
 """
 
 import sys
@@ -15,9 +15,11 @@ sys.path.append(os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ))
 from autoupdater.util.logger import Logger
 from autoupdater.util.conf import config
 import abc
+import codecs
+import csv
+import io
 import os
-from typing import List
-import pandas as pd
+from typing import Iterator, List, Optional
 from overrides import overrides
 
 log = Logger.get_instance(__name__)
@@ -31,36 +33,47 @@ class IDataParseStrategy:
         pass
 
     @abc.abstractmethod
-    def parse_address(self, file_path:str) -> List[str]:
+    def parse_address(self, file_path:str, index_words: List[str] = None) -> Optional[Iterator[str]]:
         """ A method to parse the address from the file.
 
         Args:
             file (str): The file to parse.
+            index_words (List[str], optional): The words to find the address column in the header.
 
         Returns:
-            List[str]: A list of addresses.
+            Optional[Iterator[str]]: The addresses, read lazily from the file. None if the address column is not found.
         """
         pass
 
 class CsvParser(IDataParseStrategy):
     """ A class that parses address from a csv file.
+
+    The encoding is the first candidate that decodes the whole file, and the header is read once,
+    then only the address column is streamed in chunks, so memory use does not grow with the file.
+    A file that no candidate decodes fails to parse instead of yielding addresses with replacement characters.
+
+    Attributes:
+        ENCODINGS (tuple): The encodings to try, in order. cp949 is a superset of euc-kr.
+        CSV_PARSER_CONFIG (dict): Configuration parameters for the parser.
     """
+    ENCODINGS = ('utf-8', 'cp949')
+    CSV_PARSER_CONFIG = config['CSV_PARSER']
+
     def __init__(self) -> None:
         super().__init__()
         return
     
     @overrides
-    def parse_address(self, file_path:str, index_words: List[str] = None) -> List[str]:
+    def parse_address(self, file_path:str, index_words: List[str] = None) -> Optional[Iterator[str]]:
         log.info(f'Parsing data from {file_path}')
-        try:
-            df = pd.read_csv(file_path, encoding='cp949', on_bad_lines='skip')
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(file_path, encoding='euc-kr', on_bad_lines='skip')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip')
+        with open(file_path, 'rb') as file:
+            prefix = file.read(self.CSV_PARSER_CONFIG['SNIFF_SIZE'])
 
-        header = df.columns.tolist()
+        encoding = self._detect_encoding(file_path, prefix)
+        header = self._read_header(prefix, encoding)
+        if header is None:
+            log.error(f'Cannot find the header in the file: {file_path}')
+            return None
 
         column_index = None
 
@@ -75,10 +88,52 @@ class CsvParser(IDataParseStrategy):
         if column_index is None:
             log.error(f'Cannot find the index column in the file: {file_path}')
             return None
-        
-        values = df.iloc[:, column_index].values.tolist()
-        values = [value for value in values if not pd.isna(value)]
-        return values
+
+        return self._read_column(file_path, encoding, column_index)
+
+    def _detect_encoding(self, file_path: str, prefix: bytes) -> str:
+        if prefix.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        # 앞부분만 보고 고르면 뒤에서 다른 인코딩의 행이 나올 때 주소가 깨지므로, 파일 전체를 디코딩해 봄
+        # 앞부분에서 이미 실패한 인코딩은 파일 전체를 읽지 않고 건너뜀
+        for encoding in self.ENCODINGS:
+            if self._can_decode(prefix, encoding, final=False) and self._can_decode_file(file_path, encoding):
+                return encoding
+        raise ValueError(f'Cannot decode the file with any of {self.ENCODINGS}: {file_path}')
+
+    def _can_decode(self, data: bytes, encoding: str, final: bool) -> bool:
+        try:
+            # The prefix may end in the middle of a multibyte character, so it is not decoded as the final part.
+            codecs.getincrementaldecoder(encoding)().decode(data, final=final)
+            return True
+        except UnicodeDecodeError:
+            return False
+
+    def _can_decode_file(self, file_path: str, encoding: str) -> bool:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                    decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+            return True
+        except UnicodeDecodeError:
+            return False
+
+    def _read_header(self, prefix: bytes, encoding: str) -> Optional[List[str]]:
+        text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(prefix, final=False)
+        header = next(csv.reader(io.StringIO(text)), None)
+        if not header:
+            return None
+        return header
+
+    def _read_column(self, file_path: str, encoding: str, column_index: int) -> Iterator[str]:
+        import pandas as pd
+        chunks = pd.read_csv(file_path, encoding=encoding, on_bad_lines='skip',
+                             usecols=[column_index], dtype=str, chunksize=self.CSV_PARSER_CONFIG['CHUNK_SIZE'])
+        with chunks:
+            for chunk in chunks:
+                yield from chunk.iloc[:, 0].dropna()
 
 class ClothBoxDataParser:
     """ A class that parses address from a file using a strategy pattern.
@@ -96,14 +151,14 @@ class ClothBoxDataParser:
         self.parse_strategy = parse_strategy
         return 
 
-    def parse_address(self, file) -> List[str]:
+    def parse_address(self, file) -> Optional[Iterator[str]]:
         """ Parse the address from the file.
 
         Args:
             file (str): The file to parse.
 
         Returns:
-            List[str]: A list of addresses.
+            Optional[Iterator[str]]: The addresses, read lazily from the file. None if the address column is not found.
         """
         return self.parse_strategy.parse_address(file, config['ADDRESS_PARSING_WORDS'])
     
@@ -113,4 +168,4 @@ if __name__ == '__main__':
     excel_files = [os.path.join('res', file) for file in os.listdir('res') if file.endswith('.csv')]
     for excel_file in excel_files:
         result = parser.parse_address(excel_file)
-        log.info(result)
\ No newline at end of file
+        log.info(list(result) if result is not None else result)
\ No newline at end of file
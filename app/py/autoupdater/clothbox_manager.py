@@ -5,11 +5,25 @@ The class is responsible for reading and writing data to the db.
 
 Example:
     >>> manager = ClothBoxManager()
+    >>> ret = manager.ensure_indexes()
+    >>> manager.begin_refresh()
+    >>> ret = manager.write_clothbox_data_many(records)
+    >>> ret = manager.commit_refresh()
     >>> ret = manager.delete_clothbox_data("Seoul")
     >>> ret = manager.write_clothbox_data("Suwon", "수원", [37.5665, 126.9780])
-    >>> ret = manager.write_update_info(["수원"])
+    >>> ret = manager.write_clothbox_data_many([{"address": "Suwon", "providing_name": "수원", "coordinates": [37.5665, 126.9780]}])
+    >>> ret = manager.write_update_info(["수원"], [{"provider": "수원", "link": "/data/15127178/fileData.do", "hash": "...", "row_count": 10}])
     >>> ret = manager.read_last_update_date()
+    >>> ret = manager.read_dataset_hash("/data/15127178/fileData.do")
+    >>> ret = manager.write_dataset_state("/data/15127178/fileData.do", "수원", "2024-06-01", "ingested")
+    >>> ret = manager.read_dataset_states(["/data/15127178/fileData.do"])
+    >>> ret = manager.read_oldest_failed_dataset_date()
     >>> ret = manager.get_clothbox_data("Suwon")
+    >>> ret = manager.get_clothbox_sources("수원", "/data/15127178/fileData.do")
+    >>> ret = manager.get_clothbox_points(["수원"])
+    >>> ret = manager.get_clothbox_points(boxes=[(127.0, 37.5, 127.01, 37.51)])
+    >>> ret = manager.get_clothbox_locations()
+    >>> ret = manager.delete_clothbox_sources("수원", "/data/15127178/fileData.do", ["Suwon"])
 """
 
 import sys
@@ -17,16 +31,17 @@ from os import path
 sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
 from autoupdater.util.logger import Logger
 from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
 import abc
-import pymongo
+import threading
 from datetime import datetime
 from overrides import overrides
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 import os
-from pymongo.server_api import ServerApi
 
 log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
 
 class IClothBoxManager(metaclass=abc.ABCMeta):
     """An abstract base class for db manager.
@@ -46,17 +61,71 @@ class IClothBoxManager(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def write_update_info(self, updated_items:List[str]) -> bool:
+    def write_update_info(self, updated_items:List[str], datasets:List[Dict]=None, partial:bool=False, update_date:datetime=None) -> bool:
         """Abstract method to write the update info to the db.
 
         Args:
             updated_items (List[str]): A list of items that were updated.
+            datasets (List[Dict], optional): The datasets that were ingested. Each dictionary should have the following keys: 'provider', 'link', 'hash', and 'row_count'.
+                Defaults to None.
+            partial (bool, optional): True if only some providers were updated. A partial update does not move the last update date. Defaults to False.
+            update_date (datetime, optional): The date of the update. Defaults to None, which uses the current time.
 
         Returns:
             bool: True if the update info was written successfully, False otherwise.
         """
         pass
 
+    @abc.abstractmethod
+    def read_dataset_hash(self, link:str) -> Optional[str]:
+        """Abstract method to read the content hash of the dataset recorded by the latest update.
+
+        Args:
+            link (str): The link of the dataset.
+
+        Returns:
+            Optional[str]: The content hash of the dataset. None if the dataset has never been ingested.
+        """
+        pass
+
+    @abc.abstractmethod
+    def read_dataset_states(self, links:List[str]) -> Dict[str, Dict]:
+        """Abstract method to read the state of the datasets from the db.
+
+        Args:
+            links (List[str]): The links of the datasets.
+
+        Returns:
+            Dict[str, Dict]: The state of each dataset found, keyed by the link. Each state has the following keys:
+                'link', 'provider', 'portal_date', 'last_ingested_date', and 'status'.
+        """
+        pass
+
+    @abc.abstractmethod
+    def write_dataset_state(self, link:str, provider:str, portal_date:str, status:str) -> bool:
+        """Abstract method to write the state of the dataset to the db.
+
+        Args:
+            link (str): The link of the dataset.
+            provider (str): The name of the provider.
+            portal_date (str): The modified date of the dataset on the data portal. Example: '2020-01-01'
+            status (str): The result of the update. One of 'ingested', 'unchanged', 'partial', and 'failed'.
+                'partial' means some rows could not be geocoded, and the dataset is retried like a failed one.
+
+        Returns:
+            bool: True if the state was written successfully, False otherwise.
+        """
+        pass
+
+    @abc.abstractmethod
+    def read_oldest_failed_dataset_date(self) -> Optional[str]:
+        """Abstract method to read the oldest modified date of the datasets whose last update failed or was partial.
+
+        Returns:
+            Optional[str]: The oldest modified date on the data portal. None if no update failed.
+        """
+        pass
+
     @abc.abstractmethod
     def write_clothbox_data(self, address:str, providing_name:str, coordinates:List[float]) -> bool:
         """Abstract method to write the clothbox data to the db.
@@ -71,6 +140,22 @@ class IClothBoxManager(metaclass=abc.ABCMeta):
         """
         pass
 
+    @abc.abstractmethod
+    def write_clothbox_data_many(self, records:Iterable[Dict], batch_size:int=config['DB_WRITE_BATCH_SIZE']) -> List[Dict[str, int]]:
+        """Abstract method to write many clothbox data to the db in batches.
+
+        Args:
+            records (Iterable[Dict]): The clothbox data to write. Each record should have the following keys: 'address', 'providing_name', and 'coordinates'.
+                The optional keys 'source_address' and 'source_link' record where the clothbox came from.
+                The optional key 'source_providing_name' is the provider of the source, when a row was merged into a clothbox of another provider.
+                The records are consumed lazily, one batch at a time.
+            batch_size (int, optional): The number of records written in a single request. Defaults to config['DB_WRITE_BATCH_SIZE'].
+
+        Returns:
+            List[Dict[str, int]]: The result of each batch. Each dictionary has the following keys: 'upserted', 'modified', and 'failed'.
+        """
+        pass
+
     @abc.abstractmethod
     def get_clothbox_data(self, providing_name:str) -> List[str]:
         """Abstract method to get the clothboxes from the db by a specific organization.
@@ -83,6 +168,95 @@ class IClothBoxManager(metaclass=abc.ABCMeta):
         """
         pass
 
+    @abc.abstractmethod
+    def get_clothbox_sources(self, providing_name:str, source_link:str) -> List[str]:
+        """Abstract method to get the source addresses of the clothboxes written from a specific dataset.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+
+        Returns:
+            List[str]: A list of the source address of clothboxes.
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_clothbox_points(self, providing_names:List[str]=None, boxes:List[Tuple[float, float, float, float]]=None) -> Iterator[Dict]:
+        """Abstract method to get the points of the clothboxes, of all or some providers.
+
+        Args:
+            providing_names (List[str], optional): The names of the providers. Defaults to None, which gets all the clothboxes.
+            boxes (List[Tuple[float, float, float, float]], optional): Only the clothboxes within these boxes,
+                as (min longitude, min latitude, max longitude, max latitude). Defaults to None, which gets the clothboxes anywhere.
+
+        Returns:
+            Iterator[Dict]: The clothboxes with the keys 'address', 'providing_name' and 'coordinates'([longitude, latitude]).
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_clothbox_locations(self) -> Iterator[Dict]:
+        """Abstract method to get the geocoded source addresses of all the clothboxes.
+
+        Returns:
+            Iterator[Dict]: The clothboxes with the keys 'source_address', 'address' and 'coordinates'([longitude, latitude]).
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete_clothbox_sources(self, providing_name:str, source_link:str, source_addresses:List[str]) -> int:
+        """Abstract method to remove the sources of a specific dataset from the clothboxes, and delete the clothboxes left without a source.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+            source_addresses (List[str]): The source addresses of the clothboxes to delete.
+
+        Returns:
+            int: The number of deleted clothboxes.
+        """
+        pass
+
+    @abc.abstractmethod
+    def ensure_indexes(self) -> List[str]:
+        """Abstract method to create the indexes of the collections that do not exist yet.
+
+        Returns:
+            List[str]: The indexes that were built, as 'collection.index_name'.
+        """
+        pass
+
+    @abc.abstractmethod
+    def begin_refresh(self, reuse:bool=False) -> bool:
+        """Abstract method to start to write the clothboxes to a staging collection instead of the live one.
+
+        Args:
+            reuse (bool, optional): Keep the staging collection left by an interrupted refresh. Defaults to False.
+
+        Returns:
+            bool: True if the staging collection of an interrupted refresh was reused, False if it was copied from the live collection.
+        """
+        pass
+
+    @abc.abstractmethod
+    def commit_refresh(self) -> bool:
+        """Abstract method to swap the staging collection in for the live collection atomically.
+
+        Raises:
+            Exception: If a required index could not be built. The refresh is aborted.
+
+        Returns:
+            bool: True if the staging collection was swapped in, False if there was no refresh.
+        """
+        pass
+
+    @abc.abstractmethod
+    def abort_refresh(self) -> None:
+        """Abstract method to drop the staging collection and go back to writing the live collection.
+        """
+        pass
+
     @abc.abstractmethod
     def delete_clothbox_data(self, address:str) -> bool:
         """Abstract method to delete the clothbox data from the db.
@@ -98,15 +272,59 @@ class IClothBoxManager(metaclass=abc.ABCMeta):
 class ClothBoxManager(IClothBoxManager): 
     """A class for managing the db.
 
+    The connection is made on the first access to `db`, so constructing the manager costs nothing.
+    A clothbox is keyed by its geocoded address and keeps the list of the dataset rows it was written from in 'sources',
+    so providers and datasets that resolve to the same address share one document without overwriting each other.
+    The indexes in `INDEXES` are ensured right after connecting, so every upsert and read is an index seek.
+    Between `begin_refresh` and `commit_refresh`, the clothboxes are read from and written to a staging collection.
+
     Attributes:
         db (pymongo.database.Database): The database object.
     """
+    # 컬렉션 이름의 환경 변수, 기본 이름, 인덱스 키와 옵션
+    INDEXES = [
+        ('DB_COLLECTION_CLOTH_BOX', None, [
+            ([("address", 1)], {"unique": True}),
+            ([("providing_name", 1), ("address", 1)], {}),
+            ([("sources.providing_name", 1), ("sources.source_link", 1)], {}),
+            ([("location", "2dsphere")], {}),
+        ]),
+        ('DB_COLLECTION_UPDATE_INFO', None, [
+            ([("update_date", -1)], {}),
+        ]),
+        ('DB_COLLECTION_DATASET_STATE', 'dataset_state', [
+            ([("link", 1)], {"unique": True}),
+            ([("status", 1), ("portal_date", 1)], {}),
+        ]),
+    ]
+    # 스테이징 컬렉션에 적재하는 동안 필요한 인덱스. 나머지는 적재가 끝난 뒤 한 번에 만듦
+    # 공간 중복 제거가 배치마다 $geoWithin으로 기존 수거함을 읽으므로 2dsphere 인덱스도 적재 중에 필요함
+    STAGING_LOAD_INDEXES = ("address_1", "sources.providing_name_1_sources.source_link_1", "location_2dsphere")
+
     def __init__(self) -> None:
         super().__init__()
+        self._db = None
+        self._staging_name = None
+        # 연결 직후 같은 스레드에서 인덱스를 만들며 db에 다시 접근하므로 RLock을 사용
+        self._connect_lock = threading.RLock()
+        return
+
+    @property
+    def db(self):
+        with self._connect_lock:
+            if self._db is None:
+                self._db = self._connect()
+                self.ensure_indexes()
+        return self._db
+
+    def _connect(self):
+        import pymongo
+        from pymongo.server_api import ServerApi
+
         log.info("Connecting to the db...")
         load_dotenv()
         db_uri = os.environ.get('DB_URI')
-        client = pymongo.MongoClient(db_uri, server_api=ServerApi('1'))
+        client = pymongo.MongoClient(db_uri, server_api=ServerApi('1'), maxPoolSize=config['DB_MAX_POOL_SIZE'])
 
         try:
             client.admin.command('ping')
@@ -115,9 +333,98 @@ class ClothBoxManager(IClothBoxManager):
             log.error("Unable to connect to the database.")
             log.error(e)
 
-        self.db = client[os.environ.get('DB_NAME')]
-        return
+        return client[os.environ.get('DB_NAME')]
     
+    @overrides
+    def ensure_indexes(self) -> List[str]:
+        """Create the indexes of the collections that do not exist yet. Running it again builds nothing.
+
+        An index that cannot be built, for example a unique index over duplicated documents, is logged and skipped.
+
+        Returns:
+            List[str]: The indexes that were built, as 'collection.index_name'.
+        """
+        from pymongo.errors import PyMongoError
+
+        built = []
+        try:
+            for env_name, default_name, indexes in self.INDEXES:
+                collection_name = os.environ.get(env_name, default_name)
+                if collection_name is None:
+                    continue
+                built += self._build_indexes(collection_name, indexes)
+        except PyMongoError as e:
+            log.error(f"Unable to ensure the indexes: {e}")
+        if built:
+            log.info(f"Built the indexes: {', '.join(built)}")
+        return built
+
+    @overrides
+    def begin_refresh(self, reuse:bool=False) -> bool:
+        """Start to write the clothboxes to a staging collection instead of the live one.
+
+        The staging collection starts as a copy of the live collection with only the indexes needed while loading,
+        so the reads and writes of the update go to the copy and the live collection is left untouched until `commit_refresh`.
+
+        Args:
+            reuse (bool, optional): Keep the staging collection left by an interrupted refresh instead of copying again. Defaults to False.
+
+        Returns:
+            bool: True if the staging collection of an interrupted refresh was reused, False if it was copied from the live collection.
+        """
+        live_name = os.environ.get('DB_COLLECTION_CLOTH_BOX')
+        staging_name = live_name + config['DB_STAGING_SUFFIX']
+        reused = reuse and staging_name in self.db.list_collection_names()
+        if reused:
+            log.info(f"Reusing the staging collection: {staging_name}")
+        else:
+            log.info(f"Copying {live_name} to the staging collection: {staging_name}...")
+            self.db.drop_collection(staging_name)
+            # 인덱스 없이 복사한 뒤 적재 중에 필요한 인덱스만 먼저 만듦
+            self.db[live_name].aggregate([{"$match": {}}, {"$out": staging_name}])
+        # 다시 쓰는 스테이징 컬렉션에도 빠진 인덱스가 있으면 만듦
+        self._build_indexes(staging_name, select_clothbox_indexes(staging_load=True))
+        self._staging_name = staging_name
+        return reused
+
+    @overrides
+    def commit_refresh(self) -> bool:
+        """Build the rest of the indexes on the staging collection and swap it in for the live collection.
+
+        The swap is a single `renameCollection`, so the readers see either the old or the new clothboxes, never a part of them.
+        If any index could not be built, the live collection is kept, since the API needs the 2dsphere index for `$near`.
+
+        Raises:
+            Exception: If a required index could not be built. The refresh is aborted.
+
+        Returns:
+            bool: True if the staging collection was swapped in, False if there was no refresh.
+        """
+        if self._staging_name is None:
+            return False
+        live_name = os.environ.get('DB_COLLECTION_CLOTH_BOX')
+        built = self._build_indexes(self._staging_name, select_clothbox_indexes())
+        missing = find_missing_indexes(self.db[self._staging_name].index_information())
+        if missing:
+            staging_name = self._staging_name
+            self.abort_refresh()
+            raise Exception(f"Failed to build the indexes {missing} on {staging_name}, the refresh was aborted")
+        log.info(f"Built {len(built)} indexes on {self._staging_name}, swapping it in for {live_name}...")
+        self.db[self._staging_name].rename(live_name, dropTarget=True)
+        self._staging_name = None
+        return True
+
+    @overrides
+    def abort_refresh(self) -> None:
+        """Drop the staging collection and go back to writing the live collection.
+        """
+        if self._staging_name is None:
+            return
+        log.info(f"Dropping the staging collection: {self._staging_name}")
+        self.db.drop_collection(self._staging_name)
+        self._staging_name = None
+        return
+
     @overrides
     def read_last_update_date(self) -> datetime:
         """Read the last update date from the db.
@@ -127,9 +434,7 @@ class ClothBoxManager(IClothBoxManager):
         """
         log.info("Reading the last update date from the db...")
         update_info_collection = self.db[os.environ.get('DB_COLLECTION_UPDATE_INFO')]
-        doc = list(update_info_collection.find({
-            "update_date": {"$exists": True}
-        }).sort("update_date", -1).limit(1))
+        doc = list(update_info_collection.find(LAST_UPDATE_QUERY, {"update_date": 1, "_id": 0}).sort("update_date", -1).limit(1))
         
         if len(doc) == 0:
             log.info("No update info found.")
@@ -138,25 +443,96 @@ class ClothBoxManager(IClothBoxManager):
 
     
     @overrides
-    def write_update_info(self, updated_items:List[str]) -> bool:
+    def write_update_info(self, updated_items:List[str], datasets:List[Dict]=None, partial:bool=False, update_date:datetime=None) -> bool:
         """ Write the update info to the db.
 
         Args:
             updated_items (List[str]): A list of items that were updated.
+            datasets (List[Dict], optional): The datasets that were ingested. Each dictionary should have the following keys: 'provider', 'link', 'hash', and 'row_count'.
+                Defaults to None.
+            partial (bool, optional): True if only some providers were updated. A partial update does not move the last update date. Defaults to False.
+            update_date (datetime, optional): The date of the update. Defaults to None, which uses the current time.
 
         Returns:
             bool: True if the update info was written successfully, False otherwise.
         """
         log.info("Writing the update info to the db...")
-        update_date = datetime.now()
         update_info_collection = self.db[os.environ.get('DB_COLLECTION_UPDATE_INFO')]
-        update_query = {
-                "update_date": update_date,
-                "updated_items": updated_items
-        }
-        result = update_info_collection.update_one({"update_date": update_date}, {"$set": update_query}, upsert=True)
+        update_query = make_update_info(updated_items, datasets, partial, update_date)
+        result = update_info_collection.update_one({"update_date": update_query["update_date"]}, {"$set": update_query}, upsert=True)
+        return result.acknowledged
+
+    @overrides
+    def read_dataset_hash(self, link:str) -> Optional[str]:
+        """Read the content hash of the dataset recorded by the latest update.
+
+        Args:
+            link (str): The link of the dataset.
+
+        Returns:
+            Optional[str]: The content hash of the dataset. None if the dataset has never been ingested.
+        """
+        log.info(f"Reading the content hash of the dataset: {link}...")
+        update_info_collection = self.db[os.environ.get('DB_COLLECTION_UPDATE_INFO')]
+        doc = update_info_collection.find_one(
+            {"datasets.link": link},
+            {"datasets.$": 1, "_id": 0},
+            sort=[("update_date", -1)]
+        )
+        if doc is None:
+            return None
+        return doc["datasets"][0]["hash"]
+
+    @overrides
+    def read_dataset_states(self, links:List[str]) -> Dict[str, Dict]:
+        """Read the state of the datasets from the db with a single query.
+
+        Args:
+            links (List[str]): The links of the datasets.
+
+        Returns:
+            Dict[str, Dict]: The state of each dataset found, keyed by the link. Each state has the following keys:
+                'link', 'provider', 'portal_date', 'last_ingested_date', and 'status'.
+        """
+        log.info(f"Reading the state of {len(links)} datasets from the db...")
+        docs = self._dataset_state_collection().find({"link": {"$in": links}}, {"_id": 0})
+        return {doc["link"]: doc for doc in docs}
+
+    @overrides
+    def write_dataset_state(self, link:str, provider:str, portal_date:str, status:str) -> bool:
+        """Write the state of the dataset to the db.
+
+        Args:
+            link (str): The link of the dataset.
+            provider (str): The name of the provider.
+            portal_date (str): The modified date of the dataset on the data portal. Example: '2020-01-01'
+            status (str): The result of the update. One of 'ingested', 'unchanged', 'partial', and 'failed'.
+                'partial' means some rows could not be geocoded, and the dataset is retried like a failed one.
+
+        Returns:
+            bool: True if the state was written successfully, False otherwise.
+        """
+        log.info(f"Writing the state of the dataset to the db...: {link} {status}")
+        update_query = make_dataset_state(link, provider, portal_date, status)
+        result = self._dataset_state_collection().update_one({"link": link}, {"$set": update_query}, upsert=True)
         return result.acknowledged
 
+    @overrides
+    def read_oldest_failed_dataset_date(self) -> Optional[str]:
+        """Read the oldest modified date of the datasets whose last update failed or was partial.
+
+        Returns:
+            Optional[str]: The oldest modified date on the data portal. None if no update failed.
+        """
+        doc = self._dataset_state_collection().find_one(
+            {"status": {"$in": list(RETRIED_STATUSES)}},
+            {"portal_date": 1, "_id": 0},
+            sort=[("portal_date", 1)]
+        )
+        if doc is None:
+            return None
+        return doc["portal_date"]
+
     @overrides
     def write_clothbox_data(self, address:str, providing_name:str, coordinates:List[float]) -> bool:
         """Write the clothbox data to the db.
@@ -169,18 +545,38 @@ class ClothBoxManager(IClothBoxManager):
         Returns:
             bool: True if the clothbox data was written successfully, False otherwise.
         """
-        log.info("Writing the clothbox data to the db...")
-        clothbox_collection = self.db[os.environ.get('DB_COLLECTION_CLOTH_BOX')]
-        update_query = {
-            "address": address,
-            "providing_name": providing_name,
-            "location": {
-                "type": "Point",
-                "coordinates": coordinates
-            }
-        }
+        log.debug("Writing the clothbox data to the db...")
+        clothbox_collection = self._clothbox_collection()
+        update_query = make_clothbox_document(address, providing_name, coordinates)
         result = clothbox_collection.update_one({"address": address}, {"$set": update_query}, upsert=True)
         return result.acknowledged
+
+    @overrides
+    def write_clothbox_data_many(self, records:Iterable[Dict], batch_size:int=config['DB_WRITE_BATCH_SIZE']) -> List[Dict[str, int]]:
+        """Write many clothbox data to the db with unordered bulk upserts.
+
+        Args:
+            records (Iterable[Dict]): The clothbox data to write. Each record should have the following keys: 'address', 'providing_name', and 'coordinates'.
+                The order of the coordinates should be [longitude, latitude].
+                The optional keys 'source_address' and 'source_link' record where the clothbox came from.
+                The optional key 'source_providing_name' is the provider of the source, when a row was merged into a clothbox of another provider.
+                The records are consumed lazily, one batch at a time.
+            batch_size (int, optional): The number of records written in a single request. Defaults to config['DB_WRITE_BATCH_SIZE'].
+
+        Returns:
+            List[Dict[str, int]]: The result of each batch. Each dictionary has the following keys: 'upserted', 'modified', and 'failed'.
+        """
+        clothbox_collection = self._clothbox_collection()
+        results = []
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                results.append(self._write_clothbox_batch(clothbox_collection, batch))
+                batch = []
+        if batch:
+            results.append(self._write_clothbox_batch(clothbox_collection, batch))
+        return results
     
     @overrides
     def get_clothbox_data(self, providing_name: str) -> List[str]:
@@ -193,12 +589,88 @@ class ClothBoxManager(IClothBoxManager):
             List[str]: A list of the address of clothboxes.
         """
         log.info(f"Getting the clothboxes provided by the organization: {providing_name}...")
-        clothbox_collection = self.db[os.environ.get('DB_COLLECTION_CLOTH_BOX')]
+        clothbox_collection = self._clothbox_collection()
         docs = list(clothbox_collection.find({
             "providing_name": providing_name
-        }))
+        }, {"address": 1, "_id": 0}))
         return [doc["address"] for doc in docs]
     
+    @overrides
+    def get_clothbox_sources(self, providing_name:str, source_link:str) -> List[str]:
+        """Get the source addresses of the clothboxes written from a specific dataset.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+
+        Returns:
+            List[str]: A list of the source address of clothboxes.
+        """
+        log.info(f"Getting the clothbox sources of {providing_name}: {source_link}...")
+        clothbox_collection = self._clothbox_collection()
+        docs = clothbox_collection.find({
+            "sources": {"$elemMatch": make_source_condition(providing_name, source_link)}
+        }, {"sources": 1, "_id": 0})
+        return [source_address for doc in docs for source_address in select_source_addresses(doc, providing_name, source_link)]
+
+    @overrides
+    def get_clothbox_points(self, providing_names:List[str]=None, boxes:List[Tuple[float, float, float, float]]=None) -> Iterator[Dict]:
+        """Get the points of the clothboxes, of all or some providers.
+
+        Args:
+            providing_names (List[str], optional): The names of the providers. Defaults to None, which gets all the clothboxes.
+            boxes (List[Tuple[float, float, float, float]], optional): Only the clothboxes within these boxes,
+                as (min longitude, min latitude, max longitude, max latitude). Defaults to None, which gets the clothboxes anywhere.
+
+        Returns:
+            Iterator[Dict]: The clothboxes with the keys 'address', 'providing_name' and 'coordinates'([longitude, latitude]).
+        """
+        if boxes is not None and len(boxes) == 0:
+            return
+        clothbox_collection = self._clothbox_collection()
+        docs = clothbox_collection.find(make_points_query(providing_names, boxes), POINT_PROJECTION)
+        for doc in docs:
+            yield make_clothbox_point(doc)
+
+    @overrides
+    def get_clothbox_locations(self) -> Iterator[Dict]:
+        """Get the geocoded source addresses of all the clothboxes.
+
+        Returns:
+            Iterator[Dict]: The clothboxes with the keys 'source_address', 'address' and 'coordinates'([longitude, latitude]).
+        """
+        log.info("Getting the locations of all the clothboxes...")
+        clothbox_collection = self._clothbox_collection()
+        docs = clothbox_collection.find(LOCATION_QUERY, LOCATION_PROJECTION)
+        for doc in docs:
+            yield from make_clothbox_locations(doc)
+
+    @overrides
+    def delete_clothbox_sources(self, providing_name:str, source_link:str, source_addresses:List[str]) -> int:
+        """Remove the sources of a specific dataset from the clothboxes, and delete the clothboxes left without a source.
+
+        A clothbox that still has sources of other providers is kept, and handed over to one of them if it belonged to this provider.
+
+        Args:
+            providing_name (str): The name of the provider.
+            source_link (str): The link of the dataset.
+            source_addresses (List[str]): The source addresses of the clothboxes to delete.
+
+        Returns:
+            int: The number of deleted clothboxes.
+        """
+        log.info(f"Deleting {len(source_addresses)} clothbox sources of {providing_name}: {source_link}...")
+        clothbox_collection = self._clothbox_collection()
+        condition = make_source_condition(providing_name, source_link, source_addresses)
+        addresses = [doc["address"] for doc in clothbox_collection.find({"sources": {"$elemMatch": condition}}, {"address": 1, "_id": 0})]
+        if len(addresses) == 0:
+            return 0
+        clothbox_collection.update_many({"address": {"$in": addresses}}, {"$pull": {"sources": condition}})
+        result = clothbox_collection.delete_many({"address": {"$in": addresses}, "sources": {"$size": 0}})
+        # 남은 출처가 모두 다른 제공기관의 것이면 수거함을 그 제공기관으로 넘김
+        clothbox_collection.update_many(make_orphaned_query(providing_name, addresses), HANDOVER_UPDATE)
+        return result.deleted_count
+
     @overrides
     def delete_clothbox_data(self, address:str) -> bool:
         """Delete the clothbox data from the db.
@@ -210,10 +682,330 @@ class ClothBoxManager(IClothBoxManager):
             bool: True if the clothbox data was deleted successfully, False otherwise.
         """
         log.info(f"Deleting the clothbox data from the db...: {address}")
-        clothbox_collection = self.db[os.environ.get('DB_COLLECTION_CLOTH_BOX')]
+        clothbox_collection = self._clothbox_collection()
         result = clothbox_collection.delete_one({"address": address})
         return result.acknowledged
-    
+
+    def _clothbox_collection(self):
+        # 새로고침 중에는 읽기와 쓰기 모두 스테이징 컬렉션으로 보냄
+        return self.db[self._staging_name or os.environ.get('DB_COLLECTION_CLOTH_BOX')]
+
+    def _build_indexes(self, collection_name:str, indexes:List) -> List[str]:
+        from pymongo.errors import OperationFailure
+
+        built = []
+        collection = self.db[collection_name]
+        existing = collection.index_information()
+        for keys, options in indexes:
+            index_name = make_index_name(keys)
+            if index_name in existing:
+                continue
+            try:
+                collection.create_index(keys, name=index_name, **options)
+            except OperationFailure as e:
+                log.error(f"Failed to build the index {collection_name}.{index_name}: {e}")
+                continue
+            built.append(f"{collection_name}.{index_name}")
+        return built
+
+    def _dataset_state_collection(self):
+        return self.db[os.environ.get('DB_COLLECTION_DATASET_STATE', 'dataset_state')]
+
+    def _write_clothbox_batch(self, clothbox_collection, batch:List[Dict]) -> Dict[str, int]:
+        from pymongo.errors import BulkWriteError
+
+        log.debug("Writing %d clothbox data to the db...", len(batch))
+        try:
+            with metrics.timer('db_write_batch_seconds'):
+                details = clothbox_collection.bulk_write(make_clothbox_operations(batch), ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            log.error(f"Failed to write some of the clothbox data: {e}")
+            details = e.details
+            metrics.inc('errors_total', stage='db_write')
+        return count_bulk_result(details)
+
+# 마지막 업데이트 날짜는 일부 제공기관만 갱신한 업데이트를 건너뛰고 읽음
+LAST_UPDATE_QUERY = {"update_date": {"$exists": True}, "partial": {"$ne": True}}
+# 다음 실행에서 다시 받는 데이터셋의 상태
+RETRIED_STATUSES = ("failed", "partial")
+LOCATION_QUERY = {"sources.0": {"$exists": True}}
+LOCATION_PROJECTION = {"sources.source_address": 1, "address": 1, "location.coordinates": 1, "_id": 0}
+POINT_PROJECTION = {"address": 1, "providing_name": 1, "location.coordinates": 1, "_id": 0}
+# 남은 첫 출처의 제공기관으로 넘기는 파이프라인 업데이트라서, 넘길 수거함이 많아도 한 번에 보냄
+HANDOVER_UPDATE = [{"$set": {"providing_name": {"$arrayElemAt": ["$sources.providing_name", 0]}}}]
+
+def make_index_name(keys:List) -> str:
+    """Make the name of an index the way MongoDB names it by default.
+
+    Args:
+        keys (List): The keys of the index, as (key, direction) pairs.
+
+    Returns:
+        str: The name of the index. Example: 'providing_name_1_address_1'
+    """
+    return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+def select_clothbox_indexes(staging_load:bool=False) -> List:
+    """Select the indexes of the clothbox collection from `ClothBoxManager.INDEXES`.
+
+    Args:
+        staging_load (bool, optional): Only the indexes needed while loading a staging collection. Defaults to False.
+
+    Returns:
+        List: The keys and the options of the indexes.
+    """
+    indexes = next(indexes for env_name, _, indexes in ClothBoxManager.INDEXES if env_name == 'DB_COLLECTION_CLOTH_BOX')
+    if staging_load:
+        return [index for index in indexes if make_index_name(index[0]) in ClothBoxManager.STAGING_LOAD_INDEXES]
+    return indexes
+
+def find_missing_indexes(existing:Dict) -> List[str]:
+    """Find the indexes of the clothbox collection that do not exist.
+
+    Args:
+        existing (Dict): The `index_information` of the collection.
+
+    Returns:
+        List[str]: The names of the missing indexes.
+    """
+    return [make_index_name(keys) for keys, _ in select_clothbox_indexes() if make_index_name(keys) not in existing]
+
+def make_update_info(updated_items:List[str], datasets:List[Dict]=None, partial:bool=False, update_date:datetime=None) -> Dict:
+    """Make the update info of an update.
+
+    Args:
+        updated_items (List[str]): A list of items that were updated.
+        datasets (List[Dict], optional): The datasets that were ingested. Defaults to None.
+        partial (bool, optional): True if only some providers were updated. Defaults to False.
+        update_date (datetime, optional): The date of the update. Defaults to None, which uses the current time.
+
+    Returns:
+        Dict: The update info, keyed by its 'update_date'.
+    """
+    update_info = {
+        "update_date": update_date or datetime.now(),
+        "updated_items": updated_items
+    }
+    if datasets is not None:
+        update_info["datasets"] = datasets
+    if partial:
+        update_info["partial"] = True
+    return update_info
+
+def make_dataset_state(link:str, provider:str, portal_date:str, status:str) -> Dict:
+    """Make the state of a dataset.
+
+    Args:
+        link (str): The link of the dataset.
+        provider (str): The name of the provider.
+        portal_date (str): The modified date of the dataset on the data portal.
+        status (str): The result of the update. One of 'ingested', 'unchanged', 'partial', and 'failed'.
+
+    Returns:
+        Dict: The state. 'last_ingested_date' is set only when the dataset is fully in the db.
+    """
+    state = {
+        "link": link,
+        "provider": provider,
+        "portal_date": portal_date,
+        "status": status
+    }
+    if status in ("ingested", "unchanged"):
+        state["last_ingested_date"] = datetime.now()
+    return state
+
+def make_points_query(providing_names:Iterable[str]=None, boxes:List[Tuple[float, float, float, float]]=None) -> Dict:
+    """Make the query of the clothboxes of all or some providers, anywhere or within some boxes.
+
+    Each box is a `$geoWithin` polygon of its own, so the 2dsphere index answers the query.
+    The index is built on a staging collection too, before it is loaded.
+
+    Args:
+        providing_names (Iterable[str], optional): The names of the providers. Defaults to None, which matches all the clothboxes.
+        boxes (List[Tuple[float, float, float, float]], optional): The boxes, as (min longitude, min latitude, max longitude, max latitude).
+            It should not be empty. Defaults to None, which matches the clothboxes anywhere.
+
+    Returns:
+        Dict: The query.
+    """
+    query = {}
+    if providing_names is not None:
+        query["providing_name"] = {"$in": list(providing_names)}
+    if boxes is not None:
+        query["$or"] = [{"location": {"$geoWithin": {"$geometry": make_box_polygon(box)}}} for box in boxes]
+    return query
+
+def make_box_polygon(box:Tuple[float, float, float, float]) -> Dict:
+    """Make the GeoJSON polygon of a box.
+
+    Args:
+        box (Tuple[float, float, float, float]): The box, as (min longitude, min latitude, max longitude, max latitude).
+
+    Returns:
+        Dict: The polygon, with its ring counterclockwise.
+    """
+    min_lon, min_lat, max_lon, max_lat = box
+    return {
+        "type": "Polygon",
+        "coordinates": [[[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]]
+    }
+
+def make_clothbox_point(doc:Dict) -> Dict:
+    """Make the point of a clothbox from its document projected with `POINT_PROJECTION`.
+
+    Args:
+        doc (Dict): The document.
+
+    Returns:
+        Dict: The point with the keys 'address', 'providing_name' and 'coordinates'([longitude, latitude]).
+    """
+    return {"address": doc["address"], "providing_name": doc["providing_name"], "coordinates": doc["location"]["coordinates"]}
+
+def make_clothbox_locations(doc:Dict) -> List[Dict]:
+    """Make the geocoded source addresses of a clothbox from its document projected with `LOCATION_PROJECTION`.
+
+    Args:
+        doc (Dict): The document.
+
+    Returns:
+        List[Dict]: The locations with the keys 'source_address', 'address' and 'coordinates'([longitude, latitude]).
+    """
+    return [
+        {"source_address": source["source_address"], "address": doc["address"], "coordinates": doc["location"]["coordinates"]}
+        for source in doc["sources"]
+    ]
+
+def make_clothbox_document(address:str, providing_name:str, coordinates:List[float]) -> Dict:
+    """Make the document of a clothbox.
+
+    Args:
+        address (str): The address of the clothbox.
+        providing_name (str): The name of the provider.
+        coordinates (List[float]): The coordinates of the clothbox. The order should be [longitude, latitude].
+
+    Returns:
+        Dict: The document with a GeoJSON point as its location.
+    """
+    return {
+        "address": address,
+        "providing_name": providing_name,
+        "location": {
+            "type": "Point",
+            "coordinates": coordinates
+        }
+    }
+
+def make_clothbox_source(record:Dict) -> Optional[Dict]:
+    """Make the source of a clothbox record, the dataset row it was written from.
+
+    Args:
+        record (Dict): The record with the keys 'providing_name', and optionally 'source_address', 'source_link' and 'source_providing_name'.
+
+    Returns:
+        Optional[Dict]: The source with the keys 'providing_name', 'source_link' and 'source_address'. None if the record has no source.
+            The provider of the source is 'source_providing_name' if the record has it, otherwise 'providing_name'.
+    """
+    if "source_address" not in record:
+        return None
+    return {
+        "providing_name": record.get("source_providing_name", record["providing_name"]),
+        "source_link": record.get("source_link"),
+        "source_address": record["source_address"]
+    }
+
+def make_source_condition(providing_name:str, source_link:str, source_addresses:Iterable[str]=None) -> Dict:
+    """Make the condition on the sources of a specific dataset, for `$elemMatch` and `$pull`.
+
+    Args:
+        providing_name (str): The name of the provider.
+        source_link (str): The link of the dataset.
+        source_addresses (Iterable[str], optional): Only these source addresses. Defaults to None, which matches every source of the dataset.
+
+    Returns:
+        Dict: The condition.
+    """
+    condition = {"providing_name": providing_name, "source_link": source_link}
+    if source_addresses is not None:
+        condition["source_address"] = {"$in": list(source_addresses)}
+    return condition
+
+def make_orphaned_query(providing_name:str, addresses:List[str]) -> Dict:
+    """Make the query of the clothboxes of the provider that have only sources of other providers left.
+
+    Args:
+        providing_name (str): The name of the provider.
+        addresses (List[str]): The addresses of the clothboxes to look at.
+
+    Returns:
+        Dict: The query.
+    """
+    return {"address": {"$in": addresses}, "providing_name": providing_name, "sources.providing_name": {"$ne": providing_name}}
+
+def select_source_addresses(doc:Dict, providing_name:str, source_link:str) -> List[str]:
+    """Select the source addresses of a specific dataset from a clothbox document.
+
+    Args:
+        doc (Dict): The document with the key 'sources'.
+        providing_name (str): The name of the provider.
+        source_link (str): The link of the dataset.
+
+    Returns:
+        List[str]: The source addresses.
+    """
+    return [
+        source["source_address"] for source in doc.get("sources", [])
+        if source["providing_name"] == providing_name and source["source_link"] == source_link
+    ]
+
+def make_clothbox_operations(batch:List[Dict]) -> List:
+    """Make the upserts of a batch of clothbox records, keyed by the address.
+
+    The source of a record is added to the sources of the clothbox. The provider of a clothbox with sources is set
+    only when it is inserted, so the provider that wrote it first keeps it when another provider resolves to the same address.
+
+    Args:
+        batch (List[Dict]): The records with the keys 'address', 'providing_name', and 'coordinates',
+            and optionally 'source_address', 'source_link' and 'source_providing_name'.
+
+    Returns:
+        List[pymongo.UpdateOne]: The operations for `bulk_write`.
+    """
+    from pymongo import UpdateOne
+
+    operations = []
+    for record in batch:
+        document = make_clothbox_document(record["address"], record["providing_name"], record["coordinates"])
+        source = make_clothbox_source(record)
+        if source is None:
+            update = {"$set": document}
+        else:
+            update = {
+                "$set": {key: value for key, value in document.items() if key != "providing_name"},
+                "$setOnInsert": {"providing_name": document["providing_name"]},
+                "$addToSet": {"sources": source}
+            }
+        operations.append(UpdateOne({"address": record["address"]}, update, upsert=True))
+    return operations
+
+def count_bulk_result(details:Dict) -> Dict[str, int]:
+    """Count the result of a bulk write into the metrics.
+
+    Args:
+        details (Dict): The `bulk_api_result` of the write, or the details of its BulkWriteError.
+
+    Returns:
+        Dict[str, int]: The result with the following keys: 'upserted', 'modified', and 'failed'.
+    """
+    metrics.inc('db_write_batches_total')
+    metrics.inc('db_upserted_total', details["nUpserted"])
+    metrics.inc('db_modified_total', details["nModified"])
+    metrics.inc('db_write_failed_total', len(details["writeErrors"]))
+    return {
+        "upserted": details["nUpserted"],
+        "modified": details["nModified"],
+        "failed": len(details["writeErrors"])
+    }
+
 if __name__ == "__main__":
     manager = ClothBoxManager()
     print(manager.delete_clothbox_data("Seoul"))
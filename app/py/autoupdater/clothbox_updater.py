@@ -2,121 +2,513 @@ import sys
 import os
 from os import path
 sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
-from autoupdater.clothbox_manager import IClothBoxManager, ClothBoxManager
-from autoupdater.data_portal_searcher import IDataPortalSearcher, DataPortalSearcher
-from autoupdater.data_download_driver import DataDownloadDriver
+from autoupdater.clothbox_manager import IClothBoxManager
+from autoupdater.data_portal_searcher import IDataPortalSearcher
+from autoupdater.data_downloader import DataDownloader, HttpDownloadStrategy, SeleniumDownloadStrategy
 from autoupdater.clothbox_data_parser import ClothBoxDataParser, CsvParser
+from autoupdater.geocode_cache import GeocodeCache
+from autoupdater.address_normalizer import dedup_addresses
+from autoupdater.geocoder import IGeocoder, KakaoGeocoder
+from autoupdater.local_geocoder import AddressIndex, LocalGeocoder
+from autoupdater.pipeline import Pipeline, PipelineStage
+from autoupdater.spatial_dedup import SpatialDeduplicator
+from autoupdater.tile_exporter import TileExporter
+from autoupdater.run_journal import RunJournal
 from autoupdater.util.conf import config
-from autoupdater.util.logger import Logger
+from autoupdater.util.logger import Logger, ProgressLogger
+from autoupdater.util.metrics import MetricsRegistry
 from dotenv import load_dotenv
-from typing import List
-import requests, json
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+import hashlib
+import shutil
+import threading
 import traceback
-import re
 
 log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
 load_dotenv()
 
+def _parse_file(file_parser: ClothBoxDataParser, file_path: str) -> Dict:
+    # 프로세스 풀에서 실행되므로 결과를 리스트로 만들어 반환
+    try:
+        result = file_parser.parse_address(file_path)
+        if result is None:
+            return {"file": file_path, "addresses": None, "error": "Cannot find the address column"}
+        return {"file": file_path, "addresses": list(result), "error": None}
+    except Exception as e:
+        return {"file": file_path, "addresses": None, "error": str(e)}
+
 class ClothBoxUpdater:
     '''This class is used to update the cloth box data.
 
+    The update runs as a pipeline of download, parse, geocode, dedup and write stages connected by bounded queues,
+    so the rows of one dataset are geocoded and written while the next datasets are still downloading.
+    The progress of each dataset is recorded in a run journal, so an interrupted run can be resumed.
+
     Attributes:
         clothbox_db (IClothBoxManager): The db manager for cloth box data.
         data_portal_searcher (IDataPortalSearcher): The data portal searcher.
-        data_download_driver (DataDownloadDriver): The driver for downloading data.
+        data_downloader (DataDownloader): The downloader for dataset files.
+        geocoder (IGeocoder): The geocoder for converting addresses into coordinates. Its workers set the concurrency of the geocode stage.
+            Defaults to the local address index with the Kakao geocoder for the misses, or to the Kakao geocoder if there is no index.
+        journal (RunJournal): The journal of the progress of the run.
+        download_workers (int): The number of datasets downloaded at the same time.
+        parse_workers (int): The number of processes parsing files at the same time.
+        write_batch_size (int): The number of cloth boxes written in a single request.
     '''
     clothbox_db: IClothBoxManager = None
     data_portal_searcher: IDataPortalSearcher = None
-    data_download_driver: DataDownloadDriver = None
+    data_downloader: DataDownloader = None
+    journal: RunJournal = None
 
-    def __init__(self, clothbox_db: IClothBoxManager, data_portal_searcher: IDataPortalSearcher) -> None:
+    def __init__(self, clothbox_db: IClothBoxManager, data_portal_searcher: IDataPortalSearcher, geocoder: IGeocoder = None, journal: RunJournal = None) -> None:
         self.clothbox_db = clothbox_db
         self.data_portal_searcher = data_portal_searcher
-        self.data_download_driver = DataDownloadDriver()
+        self._geocoder = geocoder
+        self.journal = journal if journal is not None else RunJournal()
+        self.data_downloader = DataDownloader()
+        self.data_downloader.set_strategies([HttpDownloadStrategy(), SeleniumDownloadStrategy()])
         self.file_parser = ClothBoxDataParser()
         self.file_parser.set_strategy(CsvParser())
+        self.download_workers = config['DOWNLOAD_WORKERS']
+        self.parse_workers = config['PARSE_WORKERS']
+        self.write_batch_size = config['DB_WRITE_BATCH_SIZE']
+        self._reset_run_state()
         pass
 
-    def start_update(self) -> None:
+    @property
+    def geocoder(self) -> IGeocoder:
+        # 업데이트할 데이터가 없는 실행은 지오코딩 캐시를 열지 않도록 처음 쓸 때 만듦
+        if self._geocoder is None:
+            self._geocoder = KakaoGeocoder(cache=GeocodeCache())
+            # 주소 색인이 있으면 색인에서 먼저 찾고, 없는 주소만 카카오 API로 보냄
+            if os.path.exists(config['LOCAL_GEOCODER']['PATH']):
+                self._geocoder = LocalGeocoder(AddressIndex(), fallback=self._geocoder)
+        return self._geocoder
+
+    def start_update(self, resume: bool = False, providers: List[str] = None, refresh: bool = False) -> None:
         """Start to udpate cloth box data.
+
+        Args:
+            resume (bool, optional): Resume the unfinished run recorded in the journal instead of searching again.
+                The finished datasets are skipped, and the rows already written are not geocoded again. Defaults to False.
+            providers (List[str], optional): Update only the datasets of these providers.
+                The update is recorded as partial, so it does not move the last update date of the other providers. Defaults to None.
+            refresh (bool, optional): Write to a staging copy of the clothbox collection and swap it in when the run finishes,
+                so the readers never see a provider half rewritten. A resumed run keeps the mode it was started with.
+                The datasets are recorded as ingested only after the swap. A run that fails drops the staging collection,
+                and a resumed run without it starts the datasets it had ingested again. Defaults to False.
         """
         log.info("Start to udpate cloth box")
-        search_data_list = self._search_data()
-        print(search_data_list)
+        metrics.reset()
+        resumed = resume and self.journal.load()
+        if resumed:
+            log.info("Resume the unfinished run")
+            search_data_list = self.journal.search_data_list
+        else:
+            search_data_list = self._search_data()
+        if search_data_list is not None and providers is not None:
+            search_data_list = [search_data for search_data in search_data_list if search_data['provider'] in providers]
         if search_data_list is None or len(search_data_list) == 0:
-            log.error("No data found.")
+            log.info("No data found.")
             return
+        if not resumed:
+            self.journal.start(search_data_list, refresh=refresh)
+        else:
+            refresh = refresh or self.journal.options.get('refresh', False)
+        if refresh:
+            # 중단된 새로고침을 이어 가면 이미 쓴 행이 남아 있는 스테이징 컬렉션을 그대로 사용
+            reused = self.clothbox_db.begin_refresh(reuse=resumed)
+            if resumed and not reused:
+                # 스테이징 컬렉션이 없으면 이전 실행에서 쓴 행도 없으므로 그 데이터셋을 처음부터 다시 처리
+                self.journal.reset([search_data['link'] for search_data in search_data_list
+                                    if self.journal.get(search_data['link']).get('stage') == "ingested"])
+        self._reset_run_state()
+        self._refresh = refresh
+        remaining_data_list = [search_data for search_data in search_data_list if not self.journal.is_finished(self.journal.get(search_data['link']))]
+        log.info(f"Found {len(search_data_list)} data to update, {len(remaining_data_list)} remaining")
+
+        parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 1 else None
+        pipeline = Pipeline([
+            PipelineStage('download', self._download_stage, workers=self.download_workers),
+            PipelineStage('parse', lambda downloads: self._parse_stage(downloads, parse_executor), workers=max(1, self.parse_workers)),
+            PipelineStage('geocode', self._geocode_stage),
+            PipelineStage('dedup', self._dedup_stage),
+            PipelineStage('write', self._write_stage),
+        ])
+        try:
+            for batch_result in pipeline.run(remaining_data_list):
+                log.debug("Wrote clothbox data: %(upserted)d upserted, %(modified)d modified, %(failed)d failed", batch_result)
+            if refresh:
+                self.clothbox_db.commit_refresh()
+        except Exception:
+            # 끝난 데이터셋의 해시는 남겨 두되, 다른 제공기관의 마지막 업데이트 날짜는 옮기지 않음
+            # 새로고침 중에는 행이 스테이징 컬렉션에만 있으므로 남기지 않고 스테이징 컬렉션을 버림
+            if refresh:
+                self._abort_refresh()
+            else:
+                try:
+                    self._write_update_info(search_data_list, partial=True)
+                except Exception as e:
+                    log.error(f"Failed to write the update info of the finished data: {e}")
+            self._write_run_report(search_data_list, resume, "crashed")
+            raise
+        finally:
+            self.data_downloader.close()
+            if parse_executor is not None:
+                parse_executor.shutdown()
+            self._geocode_progress.finish()
+            self._write_progress.finish()
+
+        if refresh:
+            self._write_ingested_states(search_data_list)
+        update_info, update_date = self._write_update_info(search_data_list, partial=providers is not None)
+        self._export_tiles(update_info, update_date)
+        self.journal.finish()
+        log.info(f"Folded {self._folded_rows} duplicated rows before geocoding, shared {self._shared_rows} geocodes across datasets")
+        self._write_run_report(search_data_list, resume, "finished")
+        return
+
+    def _write_update_info(self, search_data_list: List[Dict], partial: bool) -> Tuple[List[str], datetime]:
+        # 이전 실행에서 끝난 데이터셋도 함께 기록해야 마지막 업데이트 날짜가 앞으로 이동함
         update_info = []
+        datasets = []
+        for search_data in search_data_list:
+            progress = self.journal.get(search_data['link'])
+            if progress.get('stage') != "ingested":
+                continue
+            update_info.append(search_data['provider'])
+            datasets.append({
+                "provider": search_data['provider'],
+                "link": search_data['link'],
+                "hash": progress['hash'],
+                "row_count": progress['row_count']
+            })
+        # 타일 매니페스트도 같은 날짜로 기록해야 업데이트 정보와 짝을 맞출 수 있음
+        update_date = datetime.now()
+        self.clothbox_db.write_update_info(update_info, datasets, partial=partial, update_date=update_date)
+        return update_info, update_date
+
+    def _write_ingested_states(self, search_data_list: List[Dict]) -> None:
+        # 새로고침에서 쓴 행은 교체한 뒤에야 살아 있는 컬렉션에 있으므로, 그때 ingested로 기록함
+        # 이전 실행에서 끝나 저널에만 남은 데이터셋도 함께 기록
+        for search_data in search_data_list:
+            if self.journal.get(search_data['link']).get('stage') == "ingested":
+                self.clothbox_db.write_dataset_state(search_data['link'], search_data['provider'], search_data['date'], "ingested")
+        return
+
+    def _abort_refresh(self) -> None:
+        try:
+            self.clothbox_db.abort_refresh()
+        except Exception as e:
+            log.error(f"Failed to drop the staging collection: {e}")
+        return
+
+    def _export_tiles(self, updated_items: List[str], update_date: datetime) -> None:
+        # 타일은 DB를 대신해 읽기 요청을 받는 사본이므로, 내보내기에 실패해도 업데이트는 끝난 것으로 봄
+        if not config['TILE_EXPORT']['DIR'] or len(updated_items) == 0:
+            return
+        try:
+            TileExporter(self.clothbox_db, config['TILE_EXPORT']['DIR'], config['TILE_EXPORT']['PRECISION']).export(updated_items, update_date)
+        except Exception as e:
+            log.error(f"Failed to export the tiles: {e}")
+            log.error(traceback.format_exc())
+            metrics.inc('errors_total', stage='tile_export')
+        return
+
+    def _write_run_report(self, search_data_list: List[Dict], resumed: bool, status: str) -> None:
+        metrics.inc('folded_rows_total', self._folded_rows)
+        metrics.inc('shared_geocode_rows_total', self._shared_rows)
+        if isinstance(self._geocoder, LocalGeocoder):
+            log.info(f"Address index stats: {self._geocoder.stats()}")
+        if self._geocoder is not None and self._geocoder.cache is not None:
+            cache_stats = self._geocoder.cache.stats()
+            log.info(f"Geocode cache stats: {cache_stats}")
+            for name, value in cache_stats.items():
+                metrics.inc(f'geocode_cache_{name}_total', value)
+        spatial_dedup = self._deduplicator.report()
+        log.info(f"Merged {spatial_dedup['merged']} clothboxes into {spatial_dedup['clusters']} clothboxes within {spatial_dedup['radius']}m")
+        dataset_status = Counter(self.journal.get(search_data['link']).get('stage', 'pending') for search_data in search_data_list)
+        try:
+            metrics.write_report(config['METRICS']['REPORT_PATH'], status=status, resumed=resumed, datasets=dict(dataset_status),
+                                 spatial_dedup=spatial_dedup)
+            metrics.write_prometheus(config['METRICS']['PROMETHEUS_PATH'])
+        except OSError as e:
+            log.error(f"Failed to write the run report: {e}")
+        return
+
+    def _reset_run_state(self) -> None:
+        self._lock = threading.Lock()
+        self._refresh = False
+        self._folded_rows = 0
+        self._shared_rows = 0
+        self._running_data = {}
+        self._pending_rows = {}
+        self._failed_links = set()
+        self._partial_links = set()
+        self._geocode_progress = ProgressLogger(log, "Geocoded")
+        self._write_progress = ProgressLogger(log, "Wrote")
+        self._deduplicator = SpatialDeduplicator()
+        return
+
+    def _finish_dataset(self, search_data: dict, status: str) -> None:
+        if status == "failed":
+            log.error(f"Failed to write data: {search_data['title']}")
+        elif status == "partial":
+            log.error(f"Failed to geocode some rows, the data will be retried: {search_data['title']}")
+        metrics.inc('datasets_total', provider=search_data['provider'], status=status)
+        # 새로고침 중에 쓴 행은 스테이징 컬렉션에만 있으므로, ingested는 교체한 뒤에 기록함
+        if not (self._refresh and status == "ingested"):
+            self.clothbox_db.write_dataset_state(search_data['link'], search_data['provider'], search_data['date'], status)
+        directory = self.journal.get(search_data['link']).get('directory')
+        self.journal.update(search_data['link'], stage=status)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+        return
+
+    def _complete_rows(self, link: str, count: int) -> None:
+        # 데이터셋의 모든 행이 지오코딩 실패 또는 쓰기로 끝나면 데이터셋의 상태를 기록
+        # 모든 행을 지오코딩하고 써야 ingested로 기록하고 해시를 남김. 그렇지 않으면 다음 실행에서 다시 시도함
+        with self._lock:
+            self._pending_rows[link] -= count
+            if self._pending_rows[link] > 0:
+                return
+            del self._pending_rows[link]
+            if link in self._failed_links:
+                status = "failed"
+            elif link in self._partial_links:
+                status = "partial"
+            else:
+                status = "ingested"
+        self._finish_dataset(self._running_data[link], status)
+        return
+
+    def _download_stage(self, search_data_list: Iterator[dict]) -> Iterator[Dict]:
         for search_data in search_data_list:
-            providing_name = search_data['provider']
+            progress = self.journal.get(search_data['link'])
+            # 이전 실행에서 받아 둔 파일이 남아 있으면 다시 받지 않음
+            if 'directory' in progress and os.path.isdir(progress['directory']) and os.listdir(progress['directory']):
+                log.info(f"Reuse downloaded data: {search_data['title']}")
+                yield {"search_data": search_data, "directory": progress['directory'], "hash": progress['hash']}
+                continue
+
+            directory = self.journal.make_download_directory()
+            try:
+                with metrics.timer('download_seconds', provider=search_data['provider']):
+                    self.data_downloader.download(config['DATA_PORTAL_URL']+search_data['link'], directory)
+                content_hash = self._hash_files(directory)
+            except Exception as e:
+                log.error(f"Failed to download data: {search_data['title']}")
+                log.error(f"Error: {e}")
+                metrics.inc('errors_total', stage='download', provider=search_data['provider'])
+                shutil.rmtree(directory, ignore_errors=True)
+                self._finish_dataset(search_data, "failed")
+                continue
+            self.journal.update(search_data['link'], stage="downloaded", directory=directory, hash=content_hash)
+
+            # 수정일만 바뀌고 내용은 그대로인 데이터셋은 파싱, 지오코딩, 쓰기를 건너뜀
+            if content_hash == self.clothbox_db.read_dataset_hash(search_data['link']):
+                log.info(f"Skip unchanged data: {search_data['title']}")
+                self._finish_dataset(search_data, "unchanged")
+                continue
+            yield {"search_data": search_data, "directory": directory, "hash": content_hash}
+
+    def _parse_stage(self, downloads: Iterator[Dict], executor: ProcessPoolExecutor = None) -> Iterator[Dict]:
+        for download in downloads:
+            search_data = download['search_data']
             try:
-                self.data_download_driver.open_url(config['DATA_PORTAL_URL']+search_data['link'])
-                self.data_download_driver.download_data(config['DOWNLOAD_BUTTON_XPATH'])
-                result = self._read_res_file()
-                self.clothbox_db.delete_clothbox_data(providing_name)
-                for data in result:
-                    try:
-                        address, coordinates = self._get_lat_lng(data)
-                        print(address, providing_name, coordinates)
-                        self.clothbox_db.write_clothbox_data(address, providing_name, [coordinates['lon'], coordinates['lat']])
-                    except Exception as e:
-                        log.error(f"Failed to write data: {data}")
-                        log.error(f"Error: {e}")
+                with metrics.timer('parse_seconds', provider=search_data['provider']):
+                    results = self._read_res_file(download['directory'], executor)
+                parsed_results = [result for result in results if result['error'] is None]
+                # 파싱에 모두 실패한 데이터셋을 빈 데이터셋으로 동기화하면 기존 데이터가 모두 삭제됨
+                if len(parsed_results) == 0:
+                    raise Exception(f"Failed to parse any file of {search_data['title']}")
+                addresses = [address for result in parsed_results for address in result['addresses']]
+                # 이미 쓰인 행은 동기화에서 제외되므로 재개한 실행은 남은 행만 지오코딩함
+                # 파싱에 실패한 파일의 행은 빠져 있으므로, 그런 파일이 있으면 삭제는 건너뜀
+                inserted_sources = self._sync_clothbox_sources(search_data['provider'], search_data['link'], addresses,
+                                                               delete=len(parsed_results) == len(results))
             except Exception as e:
-                log.error(f"Failed to write data: {search_data['title']}")
                 log.error(f"Error: {e}")
                 log.error(traceback.format_exc())
+                metrics.inc('errors_total', stage='parse', provider=search_data['provider'])
+                self._finish_dataset(search_data, "failed")
                 continue
-            update_info.append(providing_name)
-        self.clothbox_db.write_update_info(update_info)
-        return
+            metrics.inc('parsed_rows_total', len(addresses), provider=search_data['provider'])
+            self.journal.update(search_data['link'], stage="parsed", row_count=len(addresses))
+
+            with self._lock:
+                self._running_data[search_data['link']] = search_data
+                self._pending_rows[search_data['link']] = len(inserted_sources) + 1
+            for source_address in inserted_sources:
+                yield {"search_data": search_data, "source_address": source_address}
+            # 행을 모두 넘긴 뒤에 더해 둔 1을 빼서, 행이 없는 데이터셋도 끝나도록 함
+            self._complete_rows(search_data['link'], 1)
+
+    def _geocode_stage(self, rows: Iterator[Dict]) -> Iterator[Dict]:
+        # 원본 주소는 정규화된 키이므로, 다른 데이터셋의 같은 주소가 지오코딩 중이면 다시 보내지 않고 결과를 함께 받음
+        # 이미 끝난 주소는 다시 보내도 지오코딩 캐시에서 답함
+        pending_rows = {}
+        def source_addresses():
+            for row in rows:
+                waiting = pending_rows.setdefault(row['source_address'], [])
+                waiting.append(row)
+                if len(waiting) == 1:
+                    yield row['source_address']
+                else:
+                    self._shared_rows += 1
+
+        for source_address, address, coordinates in self.geocoder.geocode_many(source_addresses()):
+            for row in pending_rows.pop(source_address):
+                search_data = row['search_data']
+                if address is None:
+                    self._geocode_progress.add("failed")
+                    metrics.inc('geocoded_rows_total', provider=search_data['provider'], result='failed')
+                    with self._lock:
+                        self._partial_links.add(search_data['link'])
+                    self._complete_rows(search_data['link'], 1)
+                    continue
+                self._geocode_progress.add("ok")
+                metrics.inc('geocoded_rows_total', provider=search_data['provider'], result='ok')
+                yield {
+                    "address": address,
+                    "providing_name": search_data['provider'],
+                    "coordinates": [coordinates['lon'], coordinates['lat']],
+                    "source_address": source_address,
+                    "source_link": search_data['link']
+                }
+
+    def _dedup_stage(self, records: Iterator[Dict]) -> Iterator[Dict]:
+        # 좌표를 한 번에 변환할 수 있도록 쓰기 배치 크기만큼 모아서 처리
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.write_batch_size:
+                yield from self._dedup_batch(batch)
+                batch = []
+        if batch:
+            yield from self._dedup_batch(batch)
+
+    def _dedup_batch(self, batch: List[Dict]) -> Iterator[Dict]:
+        # DB에 이미 있는 근처 수거함을 먼저 격자에 넣어 두어, 새 행이 기존 수거함에 합쳐지고 수거함의 제공기관이 바뀌지 않게 함
+        if config['SPATIAL_DEDUP']['SEED_FROM_DB']:
+            boxes = self._deduplicator.find_unseeded_boxes(batch)
+            if boxes:
+                self._deduplicator.seed(self.clothbox_db.get_clothbox_points(boxes=boxes))
+        for record, kept in zip(batch, self._deduplicator.add_many(batch)):
+            if kept is not record:
+                metrics.inc('spatial_merged_rows_total', provider=record['providing_name'])
+                # 합쳐진 행도 남은 수거함의 출처로 써야 다음 실행에서 새 행으로 보고 다시 지오코딩하지 않음
+                record = dict(record, address=kept['address'], providing_name=kept['providing_name'], coordinates=kept['coordinates'],
+                              source_providing_name=record['providing_name'])
+            yield record
+
+    def _write_stage(self, records: Iterator[Dict]) -> Iterator[Dict[str, int]]:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.write_batch_size:
+                yield from self._write_batch(batch)
+                batch = []
+        if batch:
+            yield from self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict]) -> Iterator[Dict[str, int]]:
+        link_counts = Counter(record['source_link'] for record in batch)
+        provider_counts = Counter(record.get('source_providing_name', record['providing_name']) for record in batch)
+        try:
+            batch_results = self.clothbox_db.write_clothbox_data_many(batch, self.write_batch_size)
+        except Exception as e:
+            log.error(f"Failed to write {len(batch)} clothbox data")
+            log.error(f"Error: {e}")
+            batch_results = []
+            self._write_progress.add("failed", len(batch))
+            for provider, count in provider_counts.items():
+                metrics.inc('errors_total', stage='write', provider=provider)
+            with self._lock:
+                self._failed_links.update(link_counts)
+        else:
+            self._write_progress.add("ok", len(batch))
+            for provider, count in provider_counts.items():
+                metrics.inc('written_rows_total', count, provider=provider)
+            for link, count in link_counts.items():
+                self.journal.add_written(link, count)
+            # 일부 행만 실패한 배치는 어느 행이 실패했는지 알 수 없으므로 배치의 데이터셋을 모두 실패로 기록
+            # 다음 실행에서는 이미 쓴 행이 동기화에서 빠지므로 실패한 행만 다시 씀
+            if any(batch_result['failed'] > 0 for batch_result in batch_results):
+                log.error(f"Failed to write some of {len(batch)} clothbox data")
+                with self._lock:
+                    self._failed_links.update(link_counts)
+        for link, count in link_counts.items():
+            self._complete_rows(link, count)
+        for batch_result in batch_results:
+            yield batch_result
+
+    def _hash_files(self, directory: str) -> str:
+        content_hash = hashlib.sha256()
+        for file in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, file), 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    def _sync_clothbox_sources(self, providing_name: str, link: str, addresses: List[str], delete: bool = True) -> List[str]:
+        parsed_sources, folded = dedup_addresses(addresses)
+        existing_sources = set(self.clothbox_db.get_clothbox_sources(providing_name, link))
+        deleted_sources = existing_sources.difference(parsed_sources) if delete else set()
+        if not delete:
+            log.info(f"Some files of {providing_name} failed to parse, keeping the clothboxes missing from the parsed files: {link}")
+        if deleted_sources:
+            self.clothbox_db.delete_clothbox_sources(providing_name, link, list(deleted_sources))
+
+        # 다른 제공기관과 같은 주소도 그 제공기관의 출처로 써야 하므로 여기서 빼지 않고, 지오코딩 단계에서 결과를 함께 받음
+        inserted_sources = [source for source in parsed_sources if source not in existing_sources]
+        with self._lock:
+            self._folded_rows += folded
+        log.info(f"Sync {providing_name}: {len(inserted_sources)} inserted, {len(deleted_sources)} deleted, "
+                 f"{len(parsed_sources) - len(inserted_sources)} unchanged, {folded} folded")
+        return inserted_sources
 
     def _search_data(self) -> List:
         last_update_date = self.clothbox_db.read_last_update_date()
-        search_data_list = []
+        keywords = config['SEARCH_CONFIG']['SEARCH_KEYWORD']
         if last_update_date is None:
             log.info("No last update date found. Start to search all data.")
-            for keyword in config['SEARCH_CONFIG']['SEARCH_KEYWORD']:
-                search_data_list.extend(self.data_portal_searcher.search_data(keyword))
+            search_data_list = self.data_portal_searcher.search_data_many(keywords)
         else:
             log.info(f"Last update date found: {last_update_date}")
-            for keyword in config['SEARCH_CONFIG']['SEARCH_KEYWORD']:
-                search_data_list.extend(self.data_portal_searcher.search_data(keyword, last_update_date.strftime('%Y-%m-%d')))
-        return search_data_list
-    
-    def _read_res_file(self, directory='res') -> List:
-        files = os.listdir(directory)
-        data_list = []
-        for file in files:
-            log.info(f'Parsing data from {directory}/{file}')
-            result = None
-            try:
-                result = self.file_parser.parse_address(f'{directory}/{file}')
-            except Exception as e:
-                log.error(f'Failed to parse data from {directory}/{file}')
-                log.error(e)
-                continue
-            os.remove(f'{directory}/{file}')
-            if result is None:
-                log.error(f'Failed to parse data from {directory}/{file}')
-                continue
-            data_list.extend(result)
-        return data_list
-    
-    def _get_lat_lng(self, address: str) -> tuple:
-        address = re.sub(r'\s*\(.*?\)\s*', '', address)
-        url = config['KAKAO_ADDRESS_API_URL'] + address
-        kakao_api_key = os.getenv('KAKAO_API_KEY')
-
-        headers = {'Authorization': kakao_api_key}
-        api_json = json.loads(str(requests.get(url,headers=headers).text))
-
-        address = api_json['documents'][0]['address']
-        coordinates = {"lat": float(address['y']), "lon": float(address['x'])}
-        return address['address_name'], coordinates
-        
-if __name__ == "__main__":
-    updater = ClothBoxUpdater(ClothBoxManager(), DataPortalSearcher())
-    updater.start_update()
-
-    
\ No newline at end of file
+            date = last_update_date.strftime('%Y-%m-%d')
+            # 이전 실행에서 실패했거나 일부만 쓴 데이터셋은 마지막 업데이트 날짜보다 오래되었어도 다시 검색
+            failed_date = self.clothbox_db.read_oldest_failed_dataset_date()
+            if failed_date is not None and failed_date < date:
+                log.info(f"Failed dataset found: {failed_date}")
+                date = failed_date
+            search_data_list = self.data_portal_searcher.search_data_many(keywords, date)
+
+        states = self.clothbox_db.read_dataset_states([search_data['link'] for search_data in search_data_list])
+        return [search_data for search_data in search_data_list if self._is_dataset_changed(search_data, states.get(search_data['link']))]
+
+    def _is_dataset_changed(self, search_data: dict, state: Dict) -> bool:
+        if state is None or state['status'] in ("failed", "partial"):
+            return True
+        if search_data['date'] > state['portal_date']:
+            return True
+        log.debug("-- Skip ingested data: %s", search_data['title'])
+        return False
+
+    def _read_res_file(self, directory: str, executor: ProcessPoolExecutor = None) -> List[Dict]:
+        file_paths = [os.path.join(directory, file) for file in sorted(os.listdir(directory))]
+        log.info(f'Parsing {len(file_paths)} files from {directory}')
+        if executor is not None and len(file_paths) > 1:
+            results = list(executor.map(_parse_file, [self.file_parser] * len(file_paths), file_paths))
+        else:
+            results = [_parse_file(self.file_parser, file_path) for file_path in file_paths]
+
+        for result in results:
+            if result['error'] is not None:
+                log.error(f'Failed to parse data from {result["file"]}')
+                log.error(result['error'])
+        return results
@@ -5,7 +5,7 @@ This module is used to download files from the specified URL to the specified pa
 Example:
     >>> driver = DataDownloadDriver()
     >>> driver.open_url(f'{url}')
-    >>> driver.download_data(f'{xpath})  
+    >>> file_path = driver.download_data(f'{xpath}')
 
 """
 
@@ -13,42 +13,63 @@ import sys
 from os import path
 sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
 from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from typing import Set
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions
-from selenium.common.exceptions import TimeoutException, NoAlertPresentException
+from selenium.common.exceptions import TimeoutException, NoAlertPresentException, WebDriverException
 import time
 import os
 import platform
+import shutil
+import tempfile
 
 log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
 
 class DataDownloadDriver():
         """A class for downloading files from the specified URL
 
         Attributes:
-            DOWNLOAD_PATH (str): The path to download the file.
+            PARTIAL_FILE_SUFFIXES (tuple): The suffixes of files that are still being downloaded.
+            download_path (str): The path to download the file. Each driver has its own directory.
             driver (webdriver): A WebDriver instance for downloading files.
 
         Mehtods:
             open_url(url: str) -> None: Opens the specified URL.
             download_data(xpath: str) -> str: Downloads the file using the specified xpath.
+            is_alive() -> bool: Checks whether the browser session still responds.
+            quit() -> None: Quits the browser and removes the download directory if the driver created it.
         """
-        DOWNLOAD_PATH = os.getcwd() + "\\res"
+        PARTIAL_FILE_SUFFIXES = ('.crdownload', '.tmp', '.part')
 
-        def __init__(self) -> None:
+        def __init__(self, download_path: str = None) -> None:
             
             log.info("Initializing driver")
+            start = time.monotonic()
+            self._owns_download_path = download_path is None
+            self.download_path = download_path if download_path is not None else tempfile.mkdtemp(prefix='clothbox-download-')
+            os.makedirs(self.download_path, exist_ok=True)
             options = webdriver.ChromeOptions()
             # 백그라운드 실행 옵션 추가
             options.add_argument("headless")
             options.add_argument("window-size=1920x1080")
+            # 다운로드에 필요 없는 이미지 로딩을 끄고, DOM이 준비되면 바로 진행
+            options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "download.default_directory": self.download_path,
+                "download.prompt_for_download": False
+            })
+            options.page_load_strategy = 'eager'
             if platform.system() == "Linux" and "Ubuntu" in platform.release():
                 self.driver = webdriver.Chrome(executable_path=os.getcwd() +'\\bin\\chromedriver', options=options)
             else:
                 self.driver = webdriver.Chrome(options=options)
             self._enable_background_download()
+            metrics.observe('driver_start_seconds', time.monotonic() - start)
             
             return
         
@@ -63,13 +84,22 @@ class DataDownloadDriver():
             self.driver.get(url)
             return
         
-        def download_data(self, xpath: str) -> None:
-            """Downloads the file using the specified xpath.
+        def download_data(self, xpath: str, timeout: float = config['DOWNLOAD_TIMEOUT']) -> str:
+            """Downloads the file using the specified xpath and waits until the download is finished.
 
             Args:
                 xpath (str): The xpath to download the file.
+                timeout (float, optional): The time to wait for the download in seconds. Defaults to config['DOWNLOAD_TIMEOUT'].
+
+            Raises:
+                TimeoutError: If the download is not finished in time.
+
+            Returns:
+                str: The path of the downloaded file.
             """
             log.info(f"Downloading data")
+            existing_files = set(os.listdir(self.download_path))
+            start = time.monotonic()
             try:
                 self.driver.maximize_window()
                 button = WebDriverWait(self.driver, 30).until(expected_conditions.element_to_be_clickable((By.XPATH, xpath)))
@@ -81,19 +111,68 @@ class DataDownloadDriver():
                 log.error("Timeout: Element not clickable")
             except NoAlertPresentException:
                 log.warn("No alert present after clicking the button")
-            time.sleep(5)
-            return
+            try:
+                file_path = self._wait_for_download(existing_files, timeout)
+            except TimeoutError:
+                metrics.inc('errors_total', stage='driver_download')
+                raise
+            metrics.observe('driver_download_seconds', time.monotonic() - start)
+            return file_path
+
+        def _wait_for_download(self, existing_files: Set[str], timeout: float) -> str:
+            # A file is finished when no partial file is left and its size stays the same for two consecutive polls.
+            deadline = time.monotonic() + timeout
+            sizes = {}
+            while time.monotonic() < deadline:
+                files = [file for file in os.listdir(self.download_path) if file not in existing_files]
+                if files and not any(file.endswith(self.PARTIAL_FILE_SUFFIXES) for file in files):
+                    for file in files:
+                        file_path = os.path.join(self.download_path, file)
+                        size = os.path.getsize(file_path)
+                        if size > 0 and sizes.get(file) == size:
+                            log.info(f"Downloaded data: {file_path}")
+                            return file_path
+                        sizes[file] = size
+                time.sleep(config['DOWNLOAD_POLL_INTERVAL'])
+            raise TimeoutError(f"Download is not finished in {timeout} seconds")
         
         def _enable_background_download(self):
-            log.info(f"Enabling background download, download path: {self.DOWNLOAD_PATH}")
+            log.info(f"Enabling background download, download path: {self.download_path}")
             self.driver.command_executor._commands["send_command"] = ("POST", '/session/$sessionId/chromium/send_command')
-            params = {'cmd': 'Page.setDownloadBehavior', 'params': {'behavior': 'allow', 'downloadPath': self.DOWNLOAD_PATH}}
+            params = {'cmd': 'Page.setDownloadBehavior', 'params': {'behavior': 'allow', 'downloadPath': self.download_path}}
             self.driver.execute("send_command", params)
 
             return
 
+        def is_alive(self) -> bool:
+            """Checks whether the browser session still responds.
+
+            Returns:
+                bool: True if the browser session responds, False otherwise.
+            """
+            try:
+                self.driver.current_url
+                return True
+            except WebDriverException:
+                return False
+
+        def quit(self) -> None:
+            """Quits the browser and removes the download directory if the driver created it.
+            """
+            if getattr(self, 'driver', None) is None:
+                return
+            log.info("Quitting driver")
+            try:
+                self.driver.quit()
+            except WebDriverException as e:
+                log.warning(f"Failed to quit driver: {e}")
+            self.driver = None
+            if self._owns_download_path:
+                shutil.rmtree(self.download_path, ignore_errors=True)
+            return
+
         def __del__(self):
-            self.driver.quit()
+            self.quit()
             return
         
 if __name__ == "__main__":
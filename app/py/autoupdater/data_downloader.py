@@ -0,0 +1,234 @@
+"""A module for downloading the file of a dataset from the data portal.
+
+This module defines the interface and the implementations of the strategies that download a dataset file.
+The HTTP strategy resolves the real file URL from the dataset page and streams the file to disk,
+and the Selenium strategy clicks the download button in a headless browser.
+The downloader tries the strategies in order, so the browser is only started if the HTTP strategy fails.
+
+Example:
+    >>> downloader = DataDownloader()
+    >>> downloader.set_strategies([HttpDownloadStrategy(), SeleniumDownloadStrategy()])
+    >>> file_path = downloader.download('https://www.data.go.kr/data/15127178/fileData.do', 'res')
+    >>> downloader.close()
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+import abc
+import os
+import re
+import shutil
+import threading
+from typing import TYPE_CHECKING, List, Optional
+from urllib.parse import unquote
+from overrides import overrides
+
+# requests는 가져오는 데 오래 걸리므로 HTTP로 받는 전략을 만들 때 가져옴
+if TYPE_CHECKING:
+    import requests
+
+log = Logger.get_instance(__name__)
+
+class IDownloadStrategy(metaclass=abc.ABCMeta):
+    """An abstract base class for download strategies.
+
+    This interface defines the methods that should be implemented by a class that downloads the file of a dataset.
+    """
+    def __init__(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def download(self, url:str, directory:str) -> str:
+        """Abstract method to download the file of the dataset.
+
+        Args:
+            url (str): The URL of the dataset page.
+            directory (str): The directory to download the file into.
+
+        Returns:
+            str: The path of the downloaded file.
+        """
+        pass
+
+    def close(self) -> None:
+        """Release the resources held by the strategy.
+        """
+        pass
+
+class HttpDownloadStrategy(IDownloadStrategy):
+    """A class that downloads the file of a dataset over plain HTTP.
+
+    Attributes:
+        FILE_DOWNLOAD_CONFIG (dict): Configuration parameters for the download.
+    """
+    FILE_DOWNLOAD_CONFIG = config['FILE_DOWNLOAD_CONFIG']
+
+    def __init__(self) -> None:
+        import requests
+        super().__init__()
+        self._args_pattern = re.compile(self.FILE_DOWNLOAD_CONFIG['ARGS_PATTERN'])
+        self._session = requests.Session()
+        return
+
+    @overrides
+    def download(self, url:str, directory:str) -> str:
+        """Resolve the file URL from the dataset page and stream the file into the directory.
+
+        Args:
+            url (str): The URL of the dataset page.
+            directory (str): The directory to download the file into.
+
+        Raises:
+            ValueError: If the file URL cannot be resolved from the dataset page.
+
+        Returns:
+            str: The path of the downloaded file.
+        """
+        log.info(f"Downloading data over HTTP: {url}")
+        timeout = self.FILE_DOWNLOAD_CONFIG['TIMEOUT']
+        response = self._session.get(url, timeout=timeout)
+        response.raise_for_status()
+        match = self._args_pattern.search(response.text)
+        if match is None:
+            raise ValueError(f"Cannot find the download arguments in the page: {url}")
+        public_data_pk, public_data_detail_pk = match.groups()
+
+        response = self._session.post(self.FILE_DOWNLOAD_CONFIG['INFO_URL'], timeout=timeout, data={
+            'publicDataPk': public_data_pk,
+            'publicDataDetailPk': public_data_detail_pk,
+            'fileDetailSn': '1'
+        })
+        response.raise_for_status()
+        info = response.json()
+        if 'atchFileId' not in info:
+            raise ValueError(f"Cannot find the file id of the dataset: {url}")
+
+        params = {'atchFileId': info['atchFileId'], 'fileDetailSn': info.get('fileDetailSn', '1')}
+        with self._session.get(self.FILE_DOWNLOAD_CONFIG['FILE_URL'], params=params, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            file_name = self._get_file_name(response) or f"{public_data_pk}.csv"
+            file_path = os.path.join(directory, file_name)
+            temp_path = file_path + '.part'
+            try:
+                with open(temp_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=self.FILE_DOWNLOAD_CONFIG['CHUNK_SIZE']):
+                        file.write(chunk)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        os.replace(temp_path, file_path)
+        log.info(f"Downloaded data: {file_path}")
+        return file_path
+
+    def _get_file_name(self, response: 'requests.Response') -> Optional[str]:
+        content_disposition = response.headers.get('Content-Disposition', '')
+        match = re.search(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)\"?", content_disposition, re.IGNORECASE)
+        if match is None:
+            return None
+        file_name = match.group(1)
+        try:
+            # requests decodes headers as latin-1, but the portal sends the raw UTF-8 bytes of a Korean file name.
+            file_name = file_name.encode('latin-1').decode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+        return os.path.basename(unquote(file_name))
+
+class SeleniumDownloadStrategy(IDownloadStrategy):
+    """A class that downloads the file of a dataset by clicking the download button in a headless browser.
+
+    The browser sessions are borrowed from a DriverPool, so several datasets can be downloaded in parallel.
+    The pool is started on the first download, so it costs nothing if the strategy is never used.
+    """
+    def __init__(self, xpath: str = config['DOWNLOAD_BUTTON_XPATH']) -> None:
+        super().__init__()
+        self.xpath = xpath
+        self._pool = None
+        self._lock = threading.Lock()
+        return
+
+    @overrides
+    def download(self, url:str, directory:str) -> str:
+        """Download the file of the dataset with the browser and move it into the directory.
+
+        Args:
+            url (str): The URL of the dataset page.
+            directory (str): The directory to download the file into.
+
+        Raises:
+            TimeoutError: If the download is not finished in time.
+
+        Returns:
+            str: The path of the downloaded file.
+        """
+        with self._lock:
+            if self._pool is None:
+                from autoupdater.driver_pool import DriverPool
+                self._pool = DriverPool()
+        with self._pool.acquire() as driver:
+            driver.open_url(url)
+            file_path = driver.download_data(self.xpath)
+            return shutil.move(file_path, os.path.join(directory, os.path.basename(file_path)))
+
+    @overrides
+    def close(self) -> None:
+        """Quit the browser sessions of the pool.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+        return
+
+class DataDownloader:
+    """A class that downloads the file of a dataset using the first strategy that succeeds.
+    """
+    def __init__(self) -> None:
+        self.strategies: List[IDownloadStrategy] = []
+        pass
+
+    def set_strategies(self, strategies: List[IDownloadStrategy]):
+        """Set the download strategies in the order they are tried.
+
+        Args:
+            strategies (List[IDownloadStrategy]): The download strategies to set.
+        """
+        self.strategies = strategies
+        return
+
+    def download(self, url: str, directory: str) -> str:
+        """Download the file of the dataset.
+
+        Args:
+            url (str): The URL of the dataset page.
+            directory (str): The directory to download the file into.
+
+        Raises:
+            Exception: If all the strategies failed.
+
+        Returns:
+            str: The path of the downloaded file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for strategy in self.strategies:
+            try:
+                return strategy.download(url, directory)
+            except Exception as e:
+                log.warning(f"Failed to download data with {type(strategy).__name__}: {url}")
+                log.warning(e)
+        raise Exception(f"Failed to download data: {url}")
+
+    def close(self) -> None:
+        """Release the resources held by the strategies.
+        """
+        for strategy in self.strategies:
+            strategy.close()
+        return
+
+if __name__ == "__main__":
+    downloader = DataDownloader()
+    downloader.set_strategies([HttpDownloadStrategy(), SeleniumDownloadStrategy()])
+    print(downloader.download('https://www.data.go.kr/data/15127178/fileData.do', 'res'))
+    downloader.close()
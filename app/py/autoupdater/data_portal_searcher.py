@@ -6,6 +6,7 @@ Example:
     >>> searcher = DataPortalSearcher()
     >>> result = searcher.search_data('keyword')
     >>> result = searcher.search_data(f'{keyword}', f'{date}') # date format: 'YYYY-MM-DD'
+    >>> result = searcher.search_data_many(['keyword1', 'keyword2'], f'{date}')
 """
 
 import sys
@@ -13,17 +14,18 @@ from os import path
 sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
 from autoupdater.util.logger import Logger
 from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
 import abc
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlencode
 import traceback
 from overrides import overrides
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 import time
 
 
 log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
 
 class IDataPortalSearcher(metaclass=abc.ABCMeta):
     """An abstract base class for data portal searchers.
@@ -56,12 +58,28 @@ class IDataPortalSearcher(metaclass=abc.ABCMeta):
         """
         pass
 
+    @abc.abstractmethod
+    def search_data_many(self, keywords:List[str], date:str=None) -> List[Dict[str, str]]:
+        """Abstract method to search all data by the given keywords.
+
+        Search data by each keyword and returns the merged list without duplicates of the same 'link'.
+
+        Args:
+            keywords (List[str]): The keywords to search for in the data portal.
+            date (str, optional): The date to search for in the data portal. See `search_data`. Defaults to None.
+
+        Returns:
+            List[Dict[str, str]]: A list of dictionaries containing information about the data found by the given keywords. See `search_data`.
+        """
+        pass
+
 class DataPortalSearcher(IDataPortalSearcher): 
     """A class for searching data in a data portal.
 
     Attributes:
         SEARCH_CONFIG (dict): Configuration parameters for the search.
-        search_params (dict): Parameters for the search query.            
+        search_params (dict): The template of parameters for the search query. It is copied for each request, so it is never modified.
+        page_concurrency (int): The number of result pages fetched concurrently.
     """
 
     SEARCH_CONFIG = config['SEARCH_CONFIG']
@@ -75,8 +93,9 @@ class DataPortalSearcher(IDataPortalSearcher):
             'perPage': SEARCH_CONFIG['SEARCH_PER_PAGE']
         }
         
-    def __init__(self) -> None:
+    def __init__(self, page_concurrency: int = SEARCH_CONFIG['SEARCH_PAGE_CONCURRENCY']) -> None:
         super().__init__()
+        self.page_concurrency = page_concurrency
         return
     
     @overrides
@@ -103,39 +122,83 @@ class DataPortalSearcher(IDataPortalSearcher):
 
         log.info(f"Start to search by keyword: {keyword}")
         result = []
-        
-        self.search_params['keyword'] = keyword
-        page = 1
+
         if date != None:
             date = time.strptime(date, "%Y-%m-%d")
 
         try:
-            while True:
-                self.search_params['currentPage'] = str(page)
-                url = self.SEARCH_CONFIG['SEARCH_BASE_URL'] + urlencode(self.search_params)
-                ret = self._get_info_list(url)
-                if not ret:
-                    break
-
-                for item in ret:
-                    file_date = time.strptime(item['date'], "%Y-%m-%d")
-                    if date and file_date < date:
-                        log.info(f"-- Skip data: {item}")
-                        continue
-                    log.info(f"Getting data: {item}")
-                    result.append(item)
-                page += 1
+            # The first page tells whether there are more pages, so the next pages are fetched concurrently only if needed.
+            page = 1
+            window = 1
+            with ThreadPoolExecutor(max_workers=self.page_concurrency) as executor:
+                while True:
+                    urls = [self._make_search_url(keyword, page + i) for i in range(window)]
+                    is_last_page = False
+                    for ret in executor.map(self._get_info_list, urls):
+                        is_last_page, items = self._filter_by_date(ret, date)
+                        result.extend(items)
+                        if is_last_page:
+                            break
+                    if is_last_page:
+                        break
+                    page += window
+                    window = self.page_concurrency
 
         except Exception as e:
             log.error(traceback.format_exc())
             log.error(e)
             log.error(f"Failed to search")
+            metrics.inc('errors_total', stage='search')
         
         return result
+
+    @overrides
+    def search_data_many(self, keywords: List[str], date: str=None) -> List[Dict[str, str]]:
+        """Search data portal using the given keywords concurrently and return the list of data without duplicates.
+
+        Args:
+            keywords (List[str]): The keywords to search for in the data portal.
+            date (str, optional): The date to search for in the data portal. See `search_data`. Defaults to None.
+
+        Returns:
+            List[Dict[str, str]]: A list of dictionaries containing information about the data found by the given keywords.
+                If the same data is found by several keywords, only the first one is kept.
+        """
+        result = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(keywords))) as executor:
+            for items in executor.map(lambda keyword: self.search_data(keyword, date), keywords):
+                for item in items:
+                    result.setdefault(item['link'], item)
+        log.info(f"Found {len(result)} data by keywords: {keywords}")
+        return list(result.values())
+
+    def _make_search_url(self, keyword: str, page: int) -> str:
+        search_params = dict(self.search_params, keyword=keyword, currentPage=str(page))
+        return self.SEARCH_CONFIG['SEARCH_BASE_URL'] + urlencode(search_params)
+
+    def _filter_by_date(self, items: List[Dict[str, str]], date: time.struct_time) -> Tuple[bool, List[Dict[str, str]]]:
+        # The results are sorted by the modification date, so no more pages are needed after a short page
+        # or a page whose items are all older than the given date.
+        result = []
+        for item in items:
+            file_date = time.strptime(item['date'], "%Y-%m-%d")
+            if date and file_date < date:
+                log.debug("-- Skip data: %s", item)
+                continue
+            log.debug("Getting data: %s", item)
+            result.append(item)
+        is_last_page = len(items) < self.search_params['perPage'] or (date is not None and len(result) == 0)
+        return is_last_page, result
     
     def _get_info_list(self, url: str) -> Tuple[List[Dict[str, str]], List[str]]:
+        # requests와 bs4는 가져오는 데 오래 걸리므로 실제로 검색할 때 가져옴
+        import requests
+        from bs4 import BeautifulSoup
+
         log.info(f"Start to get info list form {url}")
-        response = requests.get(url)
+        with metrics.timer('search_page_seconds'):
+            response = requests.get(url)
+        metrics.inc('search_pages_total', status=response.status_code)
         result= []
 
         if response.status_code == config['WEB_STATUS']['OK']:
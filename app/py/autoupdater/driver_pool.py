@@ -0,0 +1,132 @@
+"""A bounded pool of reusable headless browser sessions.
+
+This module is used to share a few pre-warmed DataDownloadDriver sessions between download threads.
+A session is checked before it is handed out, and it is recycled after a number of uses or when it crashes.
+
+Example:
+    >>> with DriverPool(size=2) as pool:
+    ...     with pool.acquire() as driver:
+    ...         driver.open_url(f'{url}')
+    ...         file_path = driver.download_data(f'{xpath}')
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.data_download_driver import DataDownloadDriver
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+import threading
+
+log = Logger.get_instance(__name__)
+
+class DriverPool:
+    """A class for pooling DataDownloadDriver sessions.
+
+    Attributes:
+        DRIVER_POOL_CONFIG (dict): Configuration parameters for the pool.
+        size (int): The maximum number of sessions in use at the same time.
+        max_uses (int): The number of downloads after which a session is recycled.
+    """
+    DRIVER_POOL_CONFIG = config['DRIVER_POOL']
+
+    def __init__(self, size: int = DRIVER_POOL_CONFIG['SIZE'],
+                 max_uses: int = DRIVER_POOL_CONFIG['MAX_USES'],
+                 prewarm: int = DRIVER_POOL_CONFIG['PREWARM'],
+                 driver_factory: Callable[[], DataDownloadDriver] = DataDownloadDriver) -> None:
+        self.size = size
+        self.max_uses = max_uses
+        self._driver_factory = driver_factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[DataDownloadDriver] = []
+        self._uses: Dict[DataDownloadDriver, int] = {}
+        self._closed = False
+
+        prewarm = min(prewarm, size)
+        if prewarm > 0:
+            log.info(f"Starting {prewarm} driver sessions")
+            with ThreadPoolExecutor(max_workers=prewarm) as executor:
+                self._idle.extend(executor.map(lambda _: self._create_driver(), range(prewarm)))
+        return
+
+    @contextmanager
+    def acquire(self) -> Iterator[DataDownloadDriver]:
+        """Borrow a healthy session from the pool, waiting if all of them are in use.
+
+        Raises:
+            RuntimeError: If the pool is closed.
+
+        Yields:
+            DataDownloadDriver: The session to use. It is returned to the pool when the block exits.
+        """
+        if self._closed:
+            raise RuntimeError("The driver pool is closed")
+        self._slots.acquire()
+        try:
+            driver = self._take_driver()
+            try:
+                yield driver
+            except Exception:
+                if not driver.is_alive():
+                    log.warning("Driver session crashed, recycling it")
+                    self._discard_driver(driver)
+                    driver = None
+                raise
+            finally:
+                if driver is not None:
+                    self._return_driver(driver)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Quit all the idle sessions. Sessions in use are quit when they are returned.
+        """
+        with self._lock:
+            self._closed = True
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            self._discard_driver(driver)
+        return
+
+    def __enter__(self) -> 'DriverPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        return
+
+    def _create_driver(self) -> DataDownloadDriver:
+        driver = self._driver_factory()
+        with self._lock:
+            self._uses[driver] = 0
+        return driver
+
+    def _take_driver(self) -> DataDownloadDriver:
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._create_driver()
+            if driver.is_alive():
+                return driver
+            log.warning("Idle driver session is not responding, recycling it")
+            self._discard_driver(driver)
+
+    def _return_driver(self, driver: DataDownloadDriver) -> None:
+        with self._lock:
+            self._uses[driver] += 1
+            if not self._closed and self._uses[driver] < self.max_uses:
+                self._idle.append(driver)
+                return
+        self._discard_driver(driver)
+        return
+
+    def _discard_driver(self, driver: DataDownloadDriver) -> None:
+        with self._lock:
+            self._uses.pop(driver, None)
+        driver.quit()
+        return
@@ -0,0 +1,135 @@
+"""A module for caching geocoding results on the local disk.
+
+This module defines a persistent cache that sits in front of the address API.
+Results are stored in a SQLite file keyed by the normalized address, so that addresses geocoded in a previous run
+(or duplicated in the same file) do not hit the API again.
+
+Example:
+    >>> cache = GeocodeCache('geocode_cache.sqlite3')
+    >>> cache.put('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5066, 'lon': 127.1080})
+    >>> cache.get('송파동  18-3번지')
+    ('서울 송파구 송파동 18-3', {'lat': 37.5066, 'lon': 127.108})
+    >>> cache.put('unknown address', None, None) # negative caching
+    >>> cache.get('unknown address')
+    (None, None)
+    >>> cache.stats()
+    {'hits': 1, 'negative_hits': 1, 'misses': 0}
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.address_normalizer import normalize_address
+from typing import Dict, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+
+log = Logger.get_instance(__name__)
+
+class GeocodeCache:
+    """A class for caching geocoding results in a SQLite file.
+
+    Positive results expire after `ttl` seconds, and negative results ("no documents") expire after `negative_ttl` seconds.
+    The cache is safe to share between threads.
+
+    Attributes:
+        ttl (int): The time to live of a positive result in seconds.
+        negative_ttl (int): The time to live of a negative result in seconds.
+        hits (int): The number of lookups answered with a positive result.
+        negative_hits (int): The number of lookups answered with a negative result.
+        misses (int): The number of lookups not found or expired.
+    """
+    def __init__(self, db_path: str = config['GEOCODE_CACHE']['PATH'],
+                 ttl: int = config['GEOCODE_CACHE']['TTL'],
+                 negative_ttl: int = config['GEOCODE_CACHE']['NEGATIVE_TTL']) -> None:
+        log.info(f"Opening geocode cache: {db_path}")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, address_name TEXT, lat REAL, lon REAL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        return
+
+    def get(self, address: str) -> Optional[Tuple[Optional[str], Optional[Dict[str, float]]]]:
+        """Get the cached geocoding result of the address.
+
+        Args:
+            address (str): The address to look up.
+
+        Returns:
+            Optional[Tuple[Optional[str], Optional[Dict[str, float]]]]: None if the address is not cached or expired.
+                (None, None) if the address is cached as not found.
+                Otherwise, the address name and the coordinates({"lat": float, "lon": float}).
+        """
+        key = normalize_address(address)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT address_name, lat, lon, created_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            address_name, lat, lon, created_at = row
+            ttl = self.ttl if address_name is not None else self.negative_ttl
+            if created_at + ttl < time.time():
+                self._conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            if address_name is None:
+                self.negative_hits += 1
+                return None, None
+            self.hits += 1
+            return address_name, {"lat": lat, "lon": lon}
+
+    def put(self, address: str, address_name: Optional[str], coordinates: Optional[Dict[str, float]]) -> None:
+        """Put the geocoding result of the address into the cache.
+
+        Args:
+            address (str): The address that was looked up.
+            address_name (Optional[str]): The address name returned by the API. None if the address was not found.
+            coordinates (Optional[Dict[str, float]]): The coordinates({"lat": float, "lon": float}). None if the address was not found.
+        """
+        key = normalize_address(address)
+        lat, lon = (coordinates["lat"], coordinates["lon"]) if coordinates is not None else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, address_name, lat, lon, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, address_name, lat, lon, time.time())
+            )
+            self._conn.commit()
+        return
+
+    def stats(self) -> Dict[str, int]:
+        """Get the hit and miss counters of the cache.
+
+        Returns:
+            Dict[str, int]: The counters with the keys 'hits', 'negative_hits' and 'misses'.
+        """
+        return {"hits": self.hits, "negative_hits": self.negative_hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the cache file.
+        """
+        with self._lock:
+            self._conn.close()
+        return
+
+if __name__ == "__main__":
+    cache = GeocodeCache()
+    print(cache.get("송파동 18-3"))
+    print(cache.stats())
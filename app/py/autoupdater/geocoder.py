@@ -0,0 +1,240 @@
+"""A module for converting addresses into coordinates.
+
+This module defines the interface of geocoders and the geocoder that resolves addresses with the Kakao address API.
+Addresses are resolved concurrently by a bounded worker pool that shares one keep-alive session,
+and requests are throttled by a token bucket so that the API's QPS limit is never exceeded.
+
+Example:
+    >>> geocoder = KakaoGeocoder(cache=GeocodeCache())
+    >>> address_name, coordinates = geocoder.geocode('송파동 18-3')
+    >>> for address, address_name, coordinates in geocoder.geocode_many(['송파동 18-3', '송파동 22-6']):
+    ...     print(address, address_name, coordinates)
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from autoupdater.geocode_cache import GeocodeCache
+from autoupdater.address_normalizer import normalize_address
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from overrides import overrides
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+import abc
+import threading
+import time
+import os
+
+log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
+load_dotenv()
+
+class TokenBucket:
+    """A thread-safe token bucket rate limiter.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens in the bucket.
+    """
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        return
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+class IGeocoder(metaclass=abc.ABCMeta):
+    """An abstract base class for geocoders.
+
+    This interface defines the methods that should be implemented by a class that converts addresses into coordinates.
+
+    Attributes:
+        cache (GeocodeCache): The persistent cache of geocoding results. None if caching is disabled.
+        workers (int): The number of addresses resolved concurrently by `geocode_many`.
+    """
+    cache: GeocodeCache = None
+    workers: int = 1
+
+    @abc.abstractmethod
+    def geocode(self, address: str) -> Tuple[str, Dict[str, float]]:
+        """Abstract method to convert the address into coordinates.
+
+        Args:
+            address (str): The address to convert.
+
+        Raises:
+            ValueError: If the address cannot be converted.
+
+        Returns:
+            Tuple[str, Dict[str, float]]: The address name and the coordinates({"lat": float, "lon": float}).
+        """
+        pass
+
+    def geocode_many(self, addresses: Iterable[str]) -> Iterator[Tuple[str, Optional[str], Optional[Dict[str, float]]]]:
+        """Convert the addresses into coordinates concurrently.
+
+        Addresses answered by `_lookup` are yielded right away, and the others are resolved by `geocode` in `workers` threads.
+        The addresses are consumed lazily, and the results are yielded as soon as each of them is resolved,
+        so the order of the results is not guaranteed.
+
+        Args:
+            addresses (Iterable[str]): The addresses to convert.
+
+        Yields:
+            Tuple[str, Optional[str], Optional[Dict[str, float]]]: The input address, the address name and the coordinates.
+                The address name and the coordinates are None if the address could not be converted.
+        """
+        addresses = iter(addresses)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            while True:
+                for address in addresses:
+                    # 로컬에서 바로 답할 수 있는 주소는 작업자에게 넘기지 않음
+                    found = self._lookup(address)
+                    if found is not None:
+                        yield address, found[0], found[1]
+                        continue
+                    pending[executor.submit(self.geocode, address)] = address
+                    if len(pending) >= self.workers * 2:
+                        break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    address = pending.pop(future)
+                    try:
+                        address_name, coordinates = future.result()
+                    except Exception as e:
+                        # 실패는 호출한 쪽에서 모아서 기록하므로 행마다 남기는 로그는 DEBUG로 둠
+                        log.debug("Failed to geocode %s: %s", address, e)
+                        yield address, None, None
+                        continue
+                    yield address, address_name, coordinates
+
+    def _lookup(self, address: str) -> Optional[Tuple[str, Dict[str, float]]]:
+        # 느린 조회 없이 답할 수 있으면 결과를, 아니면 None을 반환
+        return None
+
+class KakaoGeocoder(IGeocoder):
+    """A class for geocoding addresses with the Kakao address API.
+
+    Attributes:
+        cache (GeocodeCache): The persistent cache of geocoding results. None if caching is disabled.
+        workers (int): The number of addresses resolved concurrently by `geocode_many`.
+        timeout (float): The timeout of an API request in seconds.
+        max_retries (int): The number of retries on 429, 5xx and connection errors.
+        backoff (float): The base delay of the exponential backoff in seconds.
+    """
+    GEOCODER_CONFIG = config['GEOCODER']
+
+    def __init__(self, cache: GeocodeCache = None, api_key: str = None,
+                 qps: float = GEOCODER_CONFIG['QPS'],
+                 workers: int = GEOCODER_CONFIG['WORKERS'],
+                 timeout: float = GEOCODER_CONFIG['TIMEOUT'],
+                 max_retries: int = GEOCODER_CONFIG['MAX_RETRIES'],
+                 backoff: float = GEOCODER_CONFIG['BACKOFF']) -> None:
+        # requests는 가져오는 데 오래 걸리므로 지오코더를 만들 때 가져옴
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.cache = cache
+        self.workers = workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._rate_limiter = TokenBucket(qps)
+        self._session = requests.Session()
+        self._session.headers['Authorization'] = api_key if api_key is not None else os.getenv('KAKAO_API_KEY')
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        return
+
+    @overrides
+    def geocode(self, address: str) -> Tuple[str, Dict[str, float]]:
+        """Convert the address into coordinates.
+
+        Args:
+            address (str): The address to convert.
+
+        Raises:
+            ValueError: If the API has no result for the address.
+
+        Returns:
+            Tuple[str, Dict[str, float]]: The address name and the coordinates({"lat": float, "lon": float}).
+        """
+        address = normalize_address(address)
+        if self.cache is not None:
+            cached = self.cache.get(address)
+            if cached is not None:
+                if cached[0] is None:
+                    raise ValueError(f"No geocoding result (cached): {address}")
+                return cached
+
+        documents = self._request(address)['documents']
+        if len(documents) == 0:
+            if self.cache is not None:
+                self.cache.put(address, None, None)
+            raise ValueError(f"No geocoding result: {address}")
+
+        document = documents[0]['address']
+        coordinates = {"lat": float(document['y']), "lon": float(document['x'])}
+        if self.cache is not None:
+            self.cache.put(address, document['address_name'], coordinates)
+        return document['address_name'], coordinates
+
+    def _request(self, address: str) -> Dict:
+        import requests
+
+        url = config['KAKAO_ADDRESS_API_URL'] + address
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.acquire()
+            try:
+                with metrics.timer('geocode_request_seconds'):
+                    response = self._session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.inc('errors_total', stage='geocode_request')
+                if attempt == self.max_retries:
+                    raise
+                log.debug("Geocoding request failed, retrying: %s", e)
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            metrics.inc('geocode_requests_total', status=response.status_code)
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    break
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2 ** attempt
+                log.debug("Geocoding request returned %d, retrying in %ss", response.status_code, delay)
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+        raise Exception(f"HTTP error: {response.status_code}")
+
+if __name__ == "__main__":
+    geocoder = KakaoGeocoder(cache=GeocodeCache())
+    for result in geocoder.geocode_many(["송파동 18-3", "송파동 22-6", "송파동 21-11"]):
+        print(result)
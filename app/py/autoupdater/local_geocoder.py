@@ -0,0 +1,239 @@
+"""A module for geocoding addresses from a local address index.
+
+This module defines an on-disk index of address coordinates and the geocoder that answers from it.
+The index is a SQLite file keyed by the normalized address, built in bulk from a CSV file of coordinates
+(for example a road-name address dump) or from the cloth boxes already written to the db.
+Addresses missing from the index fall through to another geocoder, usually the Kakao geocoder.
+
+Example:
+    >>> index = AddressIndex('address_index.sqlite3')
+    >>> index.load_csv('addresses.csv', address_column='주소', lat_column='위도', lon_column='경도')
+    120000
+    >>> index.load_clothbox(ClothBoxManager())
+    35000
+    >>> geocoder = LocalGeocoder(index, fallback=KakaoGeocoder(cache=GeocodeCache()))
+    >>> address_name, coordinates = geocoder.geocode('송파동 18-3')
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from autoupdater.address_normalizer import normalize_address
+from autoupdater.clothbox_manager import IClothBoxManager
+from autoupdater.geocoder import IGeocoder
+from overrides import overrides
+from typing import Dict, Iterable, Optional, Tuple
+import csv
+import os
+import sqlite3
+import threading
+
+log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
+
+class AddressIndex:
+    """A class for an on-disk index of address coordinates in a SQLite file.
+
+    The rows are stored in a table without rowid, so they are clustered by the normalized address
+    and a lookup is a single B-tree search on the memory-mapped file. The index is safe to share between threads.
+
+    Attributes:
+        batch_size (int): The number of rows inserted in a single transaction when loading.
+    """
+    def __init__(self, db_path: str = config['LOCAL_GEOCODER']['PATH'],
+                 batch_size: int = config['LOCAL_GEOCODER']['BATCH_SIZE']) -> None:
+        log.info(f"Opening address index: {db_path}")
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA mmap_size = 268435456")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS address ("
+            "key TEXT PRIMARY KEY, address_name TEXT NOT NULL, lat REAL NOT NULL, lon REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        return
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM address").fetchone()[0]
+
+    def get(self, address: str) -> Optional[Tuple[str, Dict[str, float]]]:
+        """Get the coordinates of the address.
+
+        Args:
+            address (str): The address to look up.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, float]]]: The address name and the coordinates({"lat": float, "lon": float}).
+                None if the address is not in the index.
+        """
+        key = normalize_address(address)
+        with self._lock:
+            row = self._conn.execute("SELECT address_name, lat, lon FROM address WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], {"lat": row[1], "lon": row[2]}
+
+    def put_many(self, rows: Iterable[Tuple[str, str, Dict[str, float]]]) -> int:
+        """Put the coordinates of the addresses into the index. Existing addresses are replaced.
+
+        Args:
+            rows (Iterable[Tuple[str, str, Dict[str, float]]]): The address, the address name and the coordinates({"lat": float, "lon": float}).
+
+        Returns:
+            int: The number of rows put into the index.
+        """
+        count = 0
+        batch = []
+        for address, address_name, coordinates in rows:
+            batch.append((normalize_address(address), address_name, coordinates["lat"], coordinates["lon"]))
+            if len(batch) >= self.batch_size:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        log.info(f"Put {count} addresses into the address index")
+        return count
+
+    def load_csv(self, file_path: str, address_column: str = '주소', lat_column: str = '위도', lon_column: str = '경도',
+                 encoding: str = 'utf-8', name_column: str = None) -> int:
+        """Load a CSV file of address coordinates into the index.
+
+        Rows without an address or with coordinates that are not numbers are skipped.
+        The address name is written as the address of the cloth boxes, and cloth boxes are keyed by it,
+        so it should be the canonical road or lot address that the Kakao address API answers for the same place.
+        Otherwise a box geocoded from the index and the same box geocoded by Kakao are written as two documents.
+
+        Args:
+            file_path (str): The path of the CSV file.
+            address_column (str, optional): The column of the address. Defaults to '주소'.
+            lat_column (str, optional): The column of the latitude. Defaults to '위도'.
+            lon_column (str, optional): The column of the longitude. Defaults to '경도'.
+            encoding (str, optional): The encoding of the file. Defaults to 'utf-8'.
+            name_column (str, optional): The column of the canonical address name. Defaults to None, which uses the address column.
+
+        Raises:
+            ValueError: If the file does not have the columns.
+
+        Returns:
+            int: The number of rows put into the index.
+        """
+        log.info(f"Loading the address coordinates of {file_path}...")
+        name_column = name_column or address_column
+        with open(file_path, 'r', encoding=encoding, newline='') as f:
+            reader = csv.DictReader(f)
+            missing = [column for column in (address_column, lat_column, lon_column, name_column) if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Cannot find the columns {missing} in {file_path}")
+
+            def rows():
+                for row in reader:
+                    address = (row[address_column] or '').strip()
+                    # 주소 이름이 비어 있으면 원래 주소를 이름으로 씀
+                    address_name = (row[name_column] or '').strip() or address
+                    try:
+                        coordinates = {"lat": float(row[lat_column]), "lon": float(row[lon_column])}
+                    except (TypeError, ValueError):
+                        continue
+                    if address:
+                        yield address, address_name, coordinates
+            return self.put_many(rows())
+
+    def load_clothbox(self, clothbox_db: IClothBoxManager) -> int:
+        """Load the geocoded source addresses of the cloth boxes in the db into the index.
+
+        Args:
+            clothbox_db (IClothBoxManager): The db manager for cloth box data.
+
+        Returns:
+            int: The number of rows put into the index.
+        """
+        return self.put_many(
+            (location['source_address'], location['address'], {"lat": location['coordinates'][1], "lon": location['coordinates'][0]})
+            for location in clothbox_db.get_clothbox_locations()
+        )
+
+    def close(self) -> None:
+        """Close the index file.
+        """
+        with self._lock:
+            self._conn.close()
+        return
+
+    def _insert(self, batch: list) -> int:
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO address (key, address_name, lat, lon) VALUES (?, ?, ?, ?)", batch
+                )
+        return len(batch)
+
+class LocalGeocoder(IGeocoder):
+    """A class for geocoding addresses from the local address index, with another geocoder for the misses.
+
+    Attributes:
+        index (AddressIndex): The local address index.
+        fallback (IGeocoder): The geocoder for the addresses missing from the index. None to work offline.
+        cache (GeocodeCache): The cache of the fallback geocoder.
+        workers (int): The workers of the fallback geocoder, which resolve the misses concurrently.
+        hits (int): The number of addresses found in the index.
+        misses (int): The number of addresses missing from the index.
+    """
+    def __init__(self, index: AddressIndex, fallback: IGeocoder = None) -> None:
+        self.index = index
+        self.fallback = fallback
+        self.cache = fallback.cache if fallback is not None else None
+        self.workers = fallback.workers if fallback is not None else 1
+        self.hits = 0
+        self.misses = 0
+        return
+
+    @overrides
+    def geocode(self, address: str) -> Tuple[str, Dict[str, float]]:
+        """Convert the address into coordinates, from the index or else from the fallback geocoder.
+
+        Args:
+            address (str): The address to convert.
+
+        Raises:
+            ValueError: If the address is not in the index and there is no fallback geocoder.
+
+        Returns:
+            Tuple[str, Dict[str, float]]: The address name and the coordinates({"lat": float, "lon": float}).
+        """
+        found = self.index.get(address)
+        if found is not None:
+            return found
+        if self.fallback is None:
+            raise ValueError(f"Not in the address index: {address}")
+        return self.fallback.geocode(address)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the hit and miss counters of the index.
+
+        Returns:
+            Dict[str, int]: The counters with the keys 'hits' and 'misses'.
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    @overrides
+    def _lookup(self, address: str) -> Optional[Tuple[str, Dict[str, float]]]:
+        # geocode_many를 돌리는 스레드 하나에서만 불리므로 카운터에 잠금이 필요 없음
+        found = self.index.get(address)
+        if found is None:
+            self.misses += 1
+            metrics.inc('local_geocode_lookups_total', result='miss')
+        else:
+            self.hits += 1
+            metrics.inc('local_geocode_lookups_total', result='hit')
+        return found
+
+if __name__ == "__main__":
+    geocoder = LocalGeocoder(AddressIndex())
+    for result in geocoder.geocode_many(["송파동 18-3", "송파동 22-6", "송파동 21-11"]):
+        print(result)
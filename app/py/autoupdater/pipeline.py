@@ -0,0 +1,125 @@
+"""A module for running stages of work connected by bounded queues.
+
+Each stage transforms a stream of items into another stream, and runs in its own worker threads,
+so that all the stages work at the same time. The queues between the stages are bounded,
+so a slow stage holds back the stages before it instead of letting items pile up in memory.
+
+Example:
+    >>> def double(items):
+    ...     for item in items:
+    ...         yield item * 2
+    >>> pipeline = Pipeline([PipelineStage('double', double, workers=2), PipelineStage('sum', lambda items: [sum(items)])])
+    >>> list(pipeline.run(range(10)))
+    [90]
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from typing import Any, Callable, Iterable, Iterator, List
+import queue
+import threading
+import traceback
+
+log = Logger.get_instance(__name__)
+
+_DONE = object()
+
+class PipelineStage:
+    """A class for a stage of the pipeline.
+
+    Attributes:
+        name (str): The name of the stage.
+        process (Callable[[Iterator[Any]], Iterable[Any]]): The function that transforms the input stream into the output stream.
+            Each worker calls it with its own iterator over the shared input queue.
+        workers (int): The number of worker threads of the stage.
+    """
+    def __init__(self, name: str, process: Callable[[Iterator[Any]], Iterable[Any]], workers: int = 1) -> None:
+        self.name = name
+        self.process = process
+        self.workers = workers
+        return
+
+class Pipeline:
+    """A class for running the stages connected by bounded queues.
+
+    Attributes:
+        stages (List[PipelineStage]): The stages, in order.
+        queue_size (int): The maximum number of items waiting between two stages.
+    """
+    def __init__(self, stages: List[PipelineStage], queue_size: int = config['PIPELINE_QUEUE_SIZE']) -> None:
+        self.stages = stages
+        self.queue_size = queue_size
+        return
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Run the stages over the items and yield the output of the last stage.
+
+        Args:
+            items (Iterable[Any]): The input of the first stage.
+
+        Raises:
+            Exception: The first error raised by a stage, after all the stages have stopped.
+
+        Yields:
+            Any: The output of the last stage.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        errors = []
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], errors), name='pipeline-feed', daemon=True)]
+        for i, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[i], queues[i + 1], remaining, lock, errors),
+                    name=f'pipeline-{stage.name}-{n}', daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        for item in self._iter_queue(queues[-1]):
+            yield item
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _feed(self, items: Iterable[Any], output_queue: queue.Queue, errors: List[Exception]) -> None:
+        try:
+            for item in items:
+                output_queue.put(item)
+        except Exception as e:
+            log.error(f"Failed to feed the pipeline: {e}")
+            errors.append(e)
+        output_queue.put(_DONE)
+        return
+
+    def _work(self, stage: PipelineStage, input_queue: queue.Queue, output_queue: queue.Queue,
+              remaining: List[int], lock: threading.Lock, errors: List[Exception]) -> None:
+        try:
+            for item in stage.process(self._iter_queue(input_queue)):
+                output_queue.put(item)
+        except Exception as e:
+            log.error(f"Stage {stage.name} failed: {e}")
+            log.error(traceback.format_exc())
+            errors.append(e)
+            # 앞 단계가 큐에 막혀 멈추지 않도록 남은 입력을 비움
+            for _ in self._iter_queue(input_queue):
+                pass
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                output_queue.put(_DONE)
+        return
+
+    def _iter_queue(self, input_queue: queue.Queue) -> Iterator[Any]:
+        while True:
+            item = input_queue.get()
+            if item is _DONE:
+                # 같은 단계의 다른 worker도 끝을 알 수 있도록 다시 넣음
+                input_queue.put(_DONE)
+                return
+            yield item
@@ -0,0 +1,197 @@
+"""A module for recording the progress of an update run on the local disk.
+
+This module defines the journal that lets an interrupted update resume from where it stopped.
+The journal keeps the datasets found by the search and the progress of each of them,
+and it is rewritten atomically on every change, so a crash never leaves a half-written journal behind.
+
+Example:
+    >>> journal = RunJournal('run_journal.json')
+    >>> if not journal.load():
+    ...     journal.start([{'title': 'Title1', 'link': 'Link1', 'provider': '송파구', 'date': '2024-06-02'}])
+    >>> journal.update('Link1', stage='downloaded', hash='abc')
+    >>> journal.add_written('Link1', 500)
+    >>> journal.get('Link1')
+    {'stage': 'downloaded', 'hash': 'abc', 'written': 500}
+    >>> journal.finish()
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from typing import Dict, List
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+log = Logger.get_instance(__name__)
+
+class RunJournal:
+    """A class for recording the progress of an update run in a JSON file.
+
+    The progress of a dataset is a dict with the keys below. Only the keys reached so far are present.
+        stage (str): 'downloaded', 'parsed', or the final status 'ingested', 'unchanged', 'partial' or 'failed'.
+        directory (str): The directory of the downloaded files.
+        hash (str): The content hash of the downloaded files.
+        row_count (int): The number of parsed rows.
+        written (int): The number of cloth boxes written so far.
+
+    Attributes:
+        path (str): The path of the journal file.
+        download_dir (str): The directory that keeps the downloaded files until their dataset is finished.
+    """
+    # 실패했거나 일부만 쓴 데이터셋은 끝난 것으로 보지 않아 재개한 실행에서 다시 시도함
+    FINAL_STAGES = ('ingested', 'unchanged')
+
+    def __init__(self, path: str = config['RUN_JOURNAL']['PATH'], download_dir: str = config['RUN_JOURNAL']['DOWNLOAD_DIR']) -> None:
+        self.path = path
+        self.download_dir = download_dir
+        self._search_data_list = []
+        self._datasets = {}
+        self._options = {}
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def search_data_list(self) -> List[Dict]:
+        """List[Dict]: The datasets found by the search of the run.
+        """
+        return self._search_data_list
+
+    @property
+    def options(self) -> Dict:
+        """Dict: The options the run was started with, so a resumed run continues in the same mode.
+        """
+        return self._options
+
+    def load(self) -> bool:
+        """Load the journal of an unfinished run.
+
+        Returns:
+            bool: True if an unfinished run was found, otherwise False.
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Failed to load the run journal: {e}")
+            return False
+        with self._lock:
+            self._search_data_list = journal['search_data_list']
+            self._datasets = journal['datasets']
+            self._options = journal.get('options', {})
+        log.info(f"Loaded the run journal: {len(self._search_data_list)} data, "
+                 f"{sum(1 for dataset in self._datasets.values() if self.is_finished(dataset))} finished")
+        return True
+
+    def start(self, search_data_list: List[Dict], **options) -> None:
+        """Start a new run, discarding the journal and the downloaded files of the previous one.
+
+        Args:
+            search_data_list (List[Dict]): The datasets found by the search.
+            **options: The options of the run to record.
+        """
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+        with self._lock:
+            self._search_data_list = list(search_data_list)
+            self._datasets = {}
+            self._options = options
+            self._save()
+        return
+
+    def get(self, link: str) -> Dict:
+        """Get the progress of the dataset.
+
+        Args:
+            link (str): The link of the dataset.
+
+        Returns:
+            Dict: The progress of the dataset. Empty if the dataset has not been started.
+        """
+        with self._lock:
+            return dict(self._datasets.get(link, {}))
+
+    def update(self, link: str, **progress) -> None:
+        """Update the progress of the dataset.
+
+        Args:
+            link (str): The link of the dataset.
+            **progress: The keys of the progress to set.
+        """
+        with self._lock:
+            self._datasets.setdefault(link, {}).update(progress)
+            self._save()
+        return
+
+    def reset(self, links: List[str]) -> None:
+        """Forget the progress of the datasets, so the run starts them again.
+
+        Args:
+            links (List[str]): The links of the datasets.
+        """
+        with self._lock:
+            for link in links:
+                self._datasets.pop(link, None)
+            self._save()
+        return
+
+    def add_written(self, link: str, count: int) -> None:
+        """Add to the number of cloth boxes written for the dataset.
+
+        Args:
+            link (str): The link of the dataset.
+            count (int): The number of cloth boxes written.
+        """
+        with self._lock:
+            dataset = self._datasets.setdefault(link, {})
+            dataset['written'] = dataset.get('written', 0) + count
+            self._save()
+        return
+
+    def is_finished(self, progress: Dict) -> bool:
+        """Check if the dataset has reached a final status. A failed or partial dataset is not finished, so a resumed run retries it.
+
+        Args:
+            progress (Dict): The progress of the dataset.
+
+        Returns:
+            bool: True if the dataset is finished, otherwise False.
+        """
+        return progress.get('stage') in self.FINAL_STAGES
+
+    def make_download_directory(self) -> str:
+        """Make a directory for the downloaded files of a dataset.
+
+        Returns:
+            str: The path of the directory.
+        """
+        os.makedirs(self.download_dir, exist_ok=True)
+        return tempfile.mkdtemp(prefix='clothbox-', dir=self.download_dir)
+
+    def finish(self) -> None:
+        """Finish the run, removing the journal and the downloaded files.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+        return
+
+    def _save(self) -> None:
+        # 쓰는 도중에 프로세스가 죽어도 이전 저널이 남도록 임시 파일에 쓴 뒤 교체
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.run_journal-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"search_data_list": self._search_data_list, "datasets": self._datasets, "options": self._options}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return
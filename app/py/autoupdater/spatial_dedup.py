@@ -0,0 +1,168 @@
+"""A module for merging cloth boxes that are listed more than once at nearly the same place.
+
+Different providers, or the lot-number and road-name columns of one provider, often list the same box
+at slightly different addresses, which geocode to points a few meters apart.
+This module buckets the points into a uniform grid whose cells are as wide as the merge radius,
+so each point is compared only with the points of its own and the 8 neighboring cells, and the whole run costs O(n).
+The projection of a batch into the grid is vectorized with NumPy.
+
+The grid can be seeded with the boxes already in the db, so a new point near an existing box is merged into it.
+The existing box always wins, so the provider that owns a box does not change between runs.
+
+Example:
+    >>> deduplicator = SpatialDeduplicator(radius=5)
+    >>> deduplicator.seed(clothbox_db.get_clothbox_points(boxes=deduplicator.find_unseeded_boxes(records)))
+    >>> kept = deduplicator.add_many([
+    ...     {"address": "서울 송파구 송파동 18-3", "coordinates": [127.10801, 37.50666]},
+    ...     {"address": "서울 송파구 백제고분로 300", "coordinates": [127.10803, 37.50667]},
+    ... ])
+    >>> [record["address"] for record in kept]
+    ['서울 송파구 송파동 18-3', '서울 송파구 송파동 18-3']
+    >>> deduplicator.clusters
+    {'서울 송파구 송파동 18-3': ['서울 송파구 백제고분로 300']}
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.conf import config
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE = EARTH_RADIUS_METERS * math.pi / 180
+
+class SpatialDeduplicator:
+    """A class for merging the points within a radius of a point seen before.
+
+    The first point of a cluster is kept, and the later points within the radius of it are merged into it.
+    The points seeded from the db are seen before every new point, so they are always kept.
+    The points are projected onto a plane in meters around the first longitude seen,
+    which is accurate to well under a meter at the scale of the radius anywhere in Korea.
+
+    Attributes:
+        radius (float): The merge radius in meters. 0 disables the merge.
+        seed_cell (float): The width in degrees of the cells of the coarse grid the db is seeded by.
+        clusters (Dict[str, List[str]]): The addresses merged into each kept address, only for the kept addresses that merged some.
+        merged (int): The number of points merged.
+    """
+    def __init__(self, radius: float = config['SPATIAL_DEDUP']['RADIUS_METERS'],
+                 seed_cell: float = config['SPATIAL_DEDUP']['SEED_CELL_DEGREES']) -> None:
+        self.radius = radius
+        self.seed_cell = seed_cell
+        self.clusters = {}
+        self.merged = 0
+        self._cells = {}
+        self._seeded_cells = set()
+        self._origin_lon = None
+        return
+
+    def add_many(self, records: List[Dict]) -> List[Dict]:
+        """Add the points of the records, and find the ones to merge.
+
+        Args:
+            records (List[Dict]): The records with the keys 'address' and 'coordinates'([longitude, latitude]).
+
+        Returns:
+            List[Dict]: For each record, the record itself if it is kept, or the record seen before that it is merged into.
+        """
+        if self.radius <= 0 or len(records) == 0:
+            return list(records)
+
+        kept = []
+        radius_squared = self.radius * self.radius
+        for record, point_x, point_y, cell in zip(records, *self._project(records)):
+            nearest = self._find_nearest(point_x, point_y, cell, radius_squared)
+            if nearest is None:
+                self._cells.setdefault(cell, []).append((point_x, point_y, record))
+                kept.append(record)
+                continue
+            if nearest['address'] != record['address']:
+                self.clusters.setdefault(nearest['address'], []).append(record['address'])
+            self.merged += 1
+            kept.append(nearest)
+        return kept
+
+    def seed(self, records: Iterable[Dict]) -> int:
+        """Add the points of the boxes already in the db, so the new points near them are merged into them.
+
+        Args:
+            records (Iterable[Dict]): The boxes with the keys 'address', 'providing_name' and 'coordinates'([longitude, latitude]).
+
+        Returns:
+            int: The number of points added.
+        """
+        records = list(records)
+        if self.radius <= 0 or len(records) == 0:
+            return 0
+        for record, point_x, point_y, cell in zip(records, *self._project(records)):
+            self._cells.setdefault(cell, []).append((point_x, point_y, record))
+        return len(records)
+
+    def find_unseeded_boxes(self, records: List[Dict]) -> List[Tuple[float, float, float, float]]:
+        """Find the cells of the coarse grid within the radius of the records that have not been seeded yet, and mark them as seeded.
+
+        Args:
+            records (List[Dict]): The records with the key 'coordinates'([longitude, latitude]).
+
+        Returns:
+            List[Tuple[float, float, float, float]]: The cells to seed from the db, as (min longitude, min latitude, max longitude, max latitude).
+        """
+        if self.radius <= 0:
+            return []
+        boxes = []
+        pad_lat = self.radius / METERS_PER_DEGREE
+        for record in records:
+            lon, lat = record['coordinates']
+            # 반경 안의 점이 옆 칸에 있을 수 있으므로 반경만큼 넓힌 범위에 걸치는 칸을 모두 찾음
+            pad_lon = pad_lat / max(math.cos(math.radians(lat)), 0.01)
+            for cell_lon in {math.floor((lon - pad_lon) / self.seed_cell), math.floor((lon + pad_lon) / self.seed_cell)}:
+                for cell_lat in {math.floor((lat - pad_lat) / self.seed_cell), math.floor((lat + pad_lat) / self.seed_cell)}:
+                    if (cell_lon, cell_lat) in self._seeded_cells:
+                        continue
+                    self._seeded_cells.add((cell_lon, cell_lat))
+                    boxes.append((cell_lon * self.seed_cell, cell_lat * self.seed_cell,
+                                  (cell_lon + 1) * self.seed_cell, (cell_lat + 1) * self.seed_cell))
+        return boxes
+
+    def _project(self, records: List[Dict]) -> Tuple[List[float], List[float], List[Tuple[int, int]]]:
+        # numpy는 가져오는 데 오래 걸리므로 실제로 점을 합칠 때 가져옴
+        import numpy as np
+
+        coordinates = np.radians(np.array([record['coordinates'] for record in records], dtype=np.float64))
+        if self._origin_lon is None:
+            self._origin_lon = coordinates[0, 0]
+        # 경도를 기준 경도와의 차이로 재야 위도마다 다른 cos 값 때문에 생기는 비틀림이 반경보다 훨씬 작아짐
+        x = (coordinates[:, 0] - self._origin_lon) * np.cos(coordinates[:, 1]) * EARTH_RADIUS_METERS
+        y = coordinates[:, 1] * EARTH_RADIUS_METERS
+        cells = np.floor(np.column_stack((x, y)) / self.radius).astype(np.int64)
+        return x.tolist(), y.tolist(), [tuple(cell) for cell in cells.tolist()]
+
+    def _find_nearest(self, x: float, y: float, cell: Tuple[int, int], radius_squared: float) -> Optional[Dict]:
+        nearest = None
+        nearest_distance = radius_squared
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other_x, other_y, record in self._cells.get((cell[0] + dx, cell[1] + dy), ()):
+                    distance = (other_x - x) ** 2 + (other_y - y) ** 2
+                    if distance <= nearest_distance:
+                        nearest = record
+                        nearest_distance = distance
+        return nearest
+
+    def report(self, limit: int = config['SPATIAL_DEDUP']['REPORT_LIMIT']) -> Dict:
+        """Summarize the merged clusters.
+
+        Args:
+            limit (int, optional): The maximum number of clusters listed. Defaults to config['SPATIAL_DEDUP']['REPORT_LIMIT'].
+
+        Returns:
+            Dict: The radius, the number of merged points and clusters, and the largest clusters with their merged addresses.
+        """
+        largest = sorted(self.clusters.items(), key=lambda item: len(item[1]), reverse=True)[:limit]
+        return {
+            "radius": self.radius,
+            "merged": self.merged,
+            "clusters": len(self.clusters),
+            "largest": [{"address": address, "merged": merged} for address, merged in largest]
+        }
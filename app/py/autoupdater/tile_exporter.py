@@ -0,0 +1,223 @@
+"""A module for exporting the clothboxes as static geohash tiles.
+
+The clothboxes change only once per update run, so the read path can serve precomputed tiles instead of querying the db.
+Each tile holds the clothboxes of one geohash cell as gzipped JSON, and its file name carries a hash of its content,
+so a CDN can cache it forever. A manifest maps each cell to its current file and records the date of the update.
+A client fetches the tile of its own cell and of the 8 neighboring cells to find the clothboxes near it.
+
+Only the cells touched by the providers of the run are written again: the cells where those providers have clothboxes now,
+and the cells where they had clothboxes in the previous export. Only the clothboxes within those cells are read from the db.
+
+Example:
+    >>> exporter = TileExporter(ClothBoxManager(), 'tiles', precision=5)
+    >>> manifest = exporter.export(['송파구'], datetime(2024, 6, 2, 3))
+    >>> manifest['tiles']['wydmk']
+    {'file': 'wydmk.3f2a9c1e.json.gz', 'count': 42, 'providers': ['송파구'], 'updated': '2024-06-02T03:00:00'}
+    >>> encode_geohash(127.10801, 37.50666, 5)
+    'wydmk'
+    >>> geohash_bounds('wydmk')
+    (127.08984375, 37.4853515625, 127.1337890625, 37.529296875)
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from autoupdater.util.logger import Logger
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from autoupdater.clothbox_manager import IClothBoxManager
+from datetime import datetime
+from typing import Dict, List, Tuple
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+log = Logger.get_instance(__name__)
+metrics = MetricsRegistry.get_instance()
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def encode_geohash(lon: float, lat: float, precision: int) -> str:
+    """Encode the point as a geohash.
+
+    Args:
+        lon (float): The longitude.
+        lat (float): The latitude.
+        precision (int): The number of characters. 5 is a cell of about 4.9km x 4.9km.
+
+    Returns:
+        str: The geohash of the cell that contains the point.
+    """
+    lon_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        # 경도와 위도를 번갈아 반으로 나누며 한 비트씩 채움
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            value_range[0] = middle
+        else:
+            bits = bits * 2
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Get the bounds of a geohash cell.
+
+    Args:
+        geohash (str): The geohash.
+
+    Returns:
+        Tuple[float, float, float, float]: The cell, as (min longitude, min latitude, max longitude, max latitude).
+    """
+    lon_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    even = True
+    for char in geohash:
+        bits = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            # encode_geohash와 같은 순서로 경도와 위도의 범위를 반씩 좁힘
+            value_range = lon_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if bits >> shift & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even = not even
+    return (lon_range[0], lat_range[0], lon_range[1], lat_range[1])
+
+class TileExporter:
+    """A class for exporting the clothboxes as gzipped JSON tiles per geohash cell, with a manifest.
+
+    Attributes:
+        clothbox_db (IClothBoxManager): The db manager for cloth box data.
+        directory (str): The directory of the tiles and the manifest.
+        precision (int): The geohash precision of the tiles.
+    """
+    MANIFEST_NAME = 'manifest.json'
+    # 칸의 변은 DB에서 대권 호로 다뤄져 위도선과 조금 어긋나므로, 칸 크기에 비례해 넓혀서 읽은 뒤 geohash로 다시 거름
+    CELL_PADDING_RATIO = 0.01
+
+    def __init__(self, clothbox_db: IClothBoxManager, directory: str = config['TILE_EXPORT']['DIR'],
+                 precision: int = config['TILE_EXPORT']['PRECISION']) -> None:
+        self.clothbox_db = clothbox_db
+        self.directory = directory
+        self.precision = precision
+        return
+
+    def export(self, updated_items: List[str] = None, update_date: datetime = None) -> Dict:
+        """Write the tiles touched by the providers, and the manifest.
+
+        Every tile is written when there is no manifest yet, when the precision has changed, or when `updated_items` is None.
+        Otherwise only the clothboxes within the touched cells are read from the db.
+
+        Args:
+            updated_items (List[str], optional): The providers updated by the run. Defaults to None, which writes every tile.
+            update_date (datetime, optional): The date of the update info of the run. Defaults to None, which uses the current time.
+
+        Returns:
+            Dict: The manifest with the keys 'update_date', 'precision' and 'tiles'.
+                Each tile has the keys 'file', 'count', 'providers' and 'updated'.
+        """
+        update_date = (update_date or datetime.now()).isoformat(timespec='seconds')
+        previous = self._read_manifest()
+        full = updated_items is None or previous is None or previous['precision'] != self.precision
+
+        if full:
+            touched = None
+            log.info(f"Exporting all the tiles to {self.directory}...")
+        else:
+            updated = set(updated_items)
+            # 공급자가 지금 수거함을 가진 칸과, 지난번에 가졌던 칸을 모두 다시 씀
+            touched = {cell for cell, tile in previous['tiles'].items() if updated.intersection(tile['providers'])}
+            for point in self.clothbox_db.get_clothbox_points(list(updated)):
+                touched.add(encode_geohash(*point['coordinates'], self.precision))
+            log.info(f"Exporting {len(touched)} tiles touched by {len(updated)} providers to {self.directory}...")
+            if not touched:
+                return previous
+
+        cells = {}
+        points = self.clothbox_db.get_clothbox_points() if full else \
+            self.clothbox_db.get_clothbox_points(boxes=[self._padded_bounds(cell) for cell in sorted(touched)])
+        for point in points:
+            cell = encode_geohash(*point['coordinates'], self.precision)
+            if touched is None or cell in touched:
+                cells.setdefault(cell, []).append(point)
+
+        os.makedirs(self.directory, exist_ok=True)
+        tiles = {} if full else {cell: tile for cell, tile in previous['tiles'].items() if cell not in touched}
+        with metrics.timer('tile_export_seconds'):
+            for cell, points in cells.items():
+                tiles[cell] = self._write_tile(cell, points, update_date)
+        metrics.inc('tiles_written_total', len(cells))
+
+        manifest = {"update_date": update_date, "precision": self.precision, "tiles": tiles}
+        self._write_atomic(self.MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        # 새 매니페스트를 쓴 뒤에 옛 파일을 지워서, 옛 매니페스트를 읽은 쪽도 파일을 찾을 수 있게 함
+        old_files = {tile['file'] for tile in previous['tiles'].values()} if previous is not None else set()
+        for file in old_files - {tile['file'] for tile in tiles.values()}:
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except FileNotFoundError:
+                pass
+        log.info(f"Wrote {len(cells)} tiles, {len(tiles)} tiles in the manifest")
+        return manifest
+
+    def _padded_bounds(self, cell: str) -> Tuple[float, float, float, float]:
+        min_lon, min_lat, max_lon, max_lat = geohash_bounds(cell)
+        pad_lon = (max_lon - min_lon) * self.CELL_PADDING_RATIO
+        pad_lat = (max_lat - min_lat) * self.CELL_PADDING_RATIO
+        return (max(min_lon - pad_lon, -180.0), max(min_lat - pad_lat, -90.0), min(max_lon + pad_lon, 180.0), min(max_lat + pad_lat, 90.0))
+
+    def _read_manifest(self) -> Dict:
+        manifest_path = os.path.join(self.directory, self.MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Failed to read the tile manifest, exporting all the tiles: {e}")
+            return None
+
+    def _write_tile(self, cell: str, points: List[Dict], update_date: str) -> Dict:
+        points = sorted(points, key=lambda point: point['address'])
+        content = json.dumps({"geohash": cell, "clothboxes": points}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        file = f"{cell}.{hashlib.sha256(content).hexdigest()[:8]}.json.gz"
+        # mtime을 고정해야 같은 내용이 같은 파일이 되어 CDN 캐시가 유지됨
+        self._write_atomic(file, gzip.compress(content, mtime=0))
+        return {
+            "file": file,
+            "count": len(points),
+            "providers": sorted({point['providing_name'] for point in points}),
+            "updated": update_date
+        }
+
+    def _write_atomic(self, file: str, content: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(prefix='.tile-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, os.path.join(self.directory, file))
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return
+
+if __name__ == "__main__":
+    from autoupdater.clothbox_manager import ClothBoxManager
+    manifest = TileExporter(ClothBoxManager()).export()
+    print(f"{len(manifest['tiles'])} tiles")
@@ -1,9 +1,16 @@
+import os
+
+# 실행 중에 만들어지는 캐시, 색인, 보고서, 타일은 모두 이 디렉터리 아래에 둠
+STATE_DIR = os.environ.get('STATE_DIR', 'state')
+
 config = \
 {
+    'STATE_DIR': STATE_DIR,
     'DATA_PORTAL_URL': 'https://www.data.go.kr',
     'SEARCH_CONFIG': {
         'SEARCH_BASE_URL': 'https://www.data.go.kr/tcs/dss/selectDataSetList.do?',
         'SEARCH_PER_PAGE': 40,
+        'SEARCH_PAGE_CONCURRENCY': 4,
         'SEARCH_LIST_SELECTOR': 'div.result-list > ul',
         'ITEM_LINK_SELECTOR': 'dt > a',
         'TITLE_SELECTOR': 'span.title',
@@ -15,6 +22,76 @@ config = \
         "OK": 200
     },
     'DOWNLOAD_BUTTON_XPATH': '//*[@id="tab-layer-file"]/div[2]/div[2]/a',
+    'DOWNLOAD_WORKERS': 4,
+    'DOWNLOAD_TIMEOUT': 120,
+    'DOWNLOAD_POLL_INTERVAL': 0.2,
+    'DRIVER_POOL': {
+        'SIZE': 4,
+        'MAX_USES': 20,
+        'PREWARM': 4
+    },
+    'FILE_DOWNLOAD_CONFIG': {
+        'ARGS_PATTERN': r"fn_fileDataDown\(\s*'([^']+)'\s*,\s*'([^']+)'",
+        'INFO_URL': 'https://www.data.go.kr/tcs/dss/selectFileDataDownload.do',
+        'FILE_URL': 'https://www.data.go.kr/cmm/cmm/fileDownload.do',
+        'TIMEOUT': 30,
+        'CHUNK_SIZE': 64 * 1024
+    },
     'ADDRESS_PARSING_WORDS': ['주소', '위치', '장소', '소재지'],
-    'KAKAO_ADDRESS_API_URL': 'https://dapi.kakao.com/v2/local/search/address.json?query='
+    'PARSE_WORKERS': 4,
+    'CSV_PARSER': {
+        'SNIFF_SIZE': 64 * 1024,
+        'CHUNK_SIZE': 10000
+    },
+    'KAKAO_ADDRESS_API_URL': 'https://dapi.kakao.com/v2/local/search/address.json?query=',
+    'GEOCODE_CACHE': {
+        'PATH': os.path.join(STATE_DIR, 'geocode_cache.sqlite3'),
+        'TTL': 60 * 60 * 24 * 90,
+        'NEGATIVE_TTL': 60 * 60 * 24 * 7
+    },
+    'LOCAL_GEOCODER': {
+        'PATH': os.path.join(STATE_DIR, 'address_index.sqlite3'),
+        'BATCH_SIZE': 10000
+    },
+    'SPATIAL_DEDUP': {
+        'RADIUS_METERS': 5,
+        'REPORT_LIMIT': 100,
+        # 이미 DB에 있는 수거함을 이 크기(도)의 칸 단위로 읽어 격자에 넣음
+        'SEED_CELL_DEGREES': 0.01,
+        'SEED_FROM_DB': True
+    },
+    'TILE_EXPORT': {
+        'DIR': os.path.join(STATE_DIR, 'tiles'),
+        'PRECISION': 5
+    },
+    'DB_WRITE_BATCH_SIZE': 500,
+    'DB_MAX_POOL_SIZE': 50,
+    'DB_STAGING_SUFFIX': '_staging',
+    'DB_WRITE_CONCURRENCY': 4,
+    'PIPELINE_QUEUE_SIZE': 1000,
+    'LOGGER': {
+        'LEVEL': 'INFO',
+        'FORMAT': '%(asctime)s:[%(name)s][%(levelname)s] - %(filename)s:%(lineno)d - %(message)s',
+        'FILE': os.path.join(STATE_DIR, 'Log.log'),
+        'STREAM': True,
+        'MAX_BYTES': 10 * 1024 * 1024,
+        'BACKUP_COUNT': 5,
+        'PROGRESS_EVERY_ROWS': 10000,
+        'PROGRESS_EVERY_SECONDS': 30
+    },
+    'METRICS': {
+        'REPORT_PATH': os.path.join(STATE_DIR, 'run_report.json'),
+        'PROMETHEUS_PATH': os.path.join(STATE_DIR, 'clothbox_updater.prom')
+    },
+    'RUN_JOURNAL': {
+        'PATH': os.path.join(STATE_DIR, 'run_journal.json'),
+        'DOWNLOAD_DIR': os.path.join(STATE_DIR, 'downloads')
+    },
+    'GEOCODER': {
+        'QPS': 10,
+        'WORKERS': 8,
+        'TIMEOUT': 5,
+        'MAX_RETRIES': 3,
+        'BACKOFF': 0.5
+    }
 }
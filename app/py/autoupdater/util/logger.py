@@ -1,4 +1,14 @@
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.dirname( path.abspath(__file__) ) ) ))
+from autoupdater.util.conf import config
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
 import logging
+import os
+import queue
+import threading
+import time
 
 class Logger:
     _instance = None
@@ -10,25 +20,100 @@ class Logger:
         return cls._instance
 
     def __initialize(self, name):
-        self.__logger = logging.getLogger(name)
-        
-        # 로그 포멧 정의
-        formatter = logging.Formatter(
-            '%(asctime)s:[%(name)s][%(levelname)s] - %(filename)s:%(lineno)d - %(message)s')
-        # 스트림 핸들러 정의
-        stream_handler = logging.StreamHandler()
-        file_handler = logging.FileHandler('Log.log', mode='a', encoding='utf-8')
-        # 각 핸들러에 포멧 지정
-        stream_handler.setFormatter(formatter)
-        file_handler.setFormatter(formatter)
-        # 로거 인스턴스에 핸들러 삽입
-        self.__logger.addHandler(stream_handler)
-        self.__logger.addHandler(file_handler)
-        # 로그 레벨 정의
-        self.__logger.setLevel(logging.DEBUG)
+        logger_config = config['LOGGER']
+
+        # 로그 레벨, 포멧, 파일은 환경 변수로 바꿀 수 있음
+        self.__level = os.environ.get('LOG_LEVEL', logger_config['LEVEL']).upper()
+        formatter = logging.Formatter(os.environ.get('LOG_FORMAT', logger_config['FORMAT']))
+        file_path = os.environ.get('LOG_FILE', logger_config['FILE'])
+
+        handlers = []
+        if logger_config['STREAM']:
+            handlers.append(logging.StreamHandler())
+        if file_path:
+            if os.path.dirname(file_path):
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            handlers.append(RotatingFileHandler(file_path, mode='a', encoding='utf-8',
+                                                maxBytes=logger_config['MAX_BYTES'], backupCount=logger_config['BACKUP_COUNT']))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # 파일과 콘솔 쓰기는 별도 스레드에서 처리하고, 로그를 남기는 스레드는 큐에 넣기만 함
+        self.__listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        self.__handler = QueueHandler(self.__listener.queue)
+        self.__lock = threading.Lock()
+        self.__listener.start()
+        atexit.register(self.__listener.stop)
+
+    def __get_logger(self, name):
+        # 모듈마다 자기 이름의 로거를 쓰고, 큐 핸들러는 하나를 공유함
+        logger = logging.getLogger(name)
+        with self.__lock:
+            if self.__handler not in logger.handlers:
+                logger.addHandler(self.__handler)
+                logger.setLevel(self.__level)
+                logger.propagate = False
+        return logger
 
     @classmethod
     def get_instance(cls, name):
         if cls._instance is None:
             cls(name)
-        return cls._instance.__logger
\ No newline at end of file
+        return cls._instance.__get_logger(name)
+
+class ProgressLogger:
+    """A class for logging the progress of a loop every N rows or every T seconds, instead of every row.
+
+    Attributes:
+        name (str): The name of the loop in the messages.
+        every_rows (int): The number of rows between two progress messages.
+        every_seconds (float): The time between two progress messages in seconds.
+        counts (dict): The number of rows by outcome, for example {"ok": 10, "failed": 1}.
+    """
+    def __init__(self, logger: logging.Logger, name: str,
+                 every_rows: int = config['LOGGER']['PROGRESS_EVERY_ROWS'],
+                 every_seconds: float = config['LOGGER']['PROGRESS_EVERY_SECONDS']) -> None:
+        self.name = name
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+        self.counts = {}
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._logged_at = self._started_at
+        self._logged_rows = 0
+        return
+
+    def add(self, outcome: str = "ok", count: int = 1) -> None:
+        """Count the rows and log the progress if N rows or T seconds have passed since the last message.
+
+        Args:
+            outcome (str, optional): The outcome of the rows. Defaults to "ok".
+            count (int, optional): The number of rows. Defaults to 1.
+        """
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + count
+            total = sum(self.counts.values())
+            now = time.monotonic()
+            if total - self._logged_rows < self.every_rows and now - self._logged_at < self.every_seconds:
+                return
+            self._logged_rows = total
+            self._logged_at = now
+            counts = dict(self.counts)
+        self._log(total, counts, now)
+        return
+
+    def finish(self) -> None:
+        """Log the final counts.
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        self._log(sum(counts.values()), counts, time.monotonic())
+        return
+
+    def _log(self, total: int, counts: dict, now: float) -> None:
+        if not self._logger.isEnabledFor(logging.INFO):
+            return
+        elapsed = max(now - self._started_at, 1e-9)
+        self._logger.info("%s: %d rows %s (%.1f rows/s)", self.name, total, counts, total / elapsed)
+        return
@@ -0,0 +1,229 @@
+"""A module for collecting the metrics of an update run.
+
+This module defines the process-wide registry that the searcher, the downloader, the db manager and the updater report into.
+Counters and latency histograms are labeled (for example by provider), and the registry can be written
+as a JSON run report or as a Prometheus textfile-collector file.
+
+Example:
+    >>> metrics = MetricsRegistry.get_instance()
+    >>> metrics.inc('parsed_rows_total', 120, provider='송파구')
+    >>> with metrics.timer('download_seconds', provider='송파구'):
+    ...     download()
+    >>> metrics.write_report('run_report.json', resumed=False)
+    >>> metrics.write_prometheus('clothbox_updater.prom')
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+
+class MetricsRegistry:
+    """A thread-safe registry of counters and histograms.
+
+    Attributes:
+        DEFAULT_BUCKETS (tuple): The upper bounds of the histogram buckets in seconds.
+        HELP (dict): The description of each metric in the Prometheus file. A metric not listed is described by its name.
+        prefix (str): The prefix of the metric names in the Prometheus file.
+    """
+    _instance = None
+    DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    HELP = {
+        'datasets_total': "Datasets finished, by provider and status.",
+        'db_modified_total': "Cloth boxes modified by bulk writes.",
+        'db_upserted_total': "Cloth boxes inserted by bulk writes.",
+        'db_write_batches_total': "Bulk write requests.",
+        'db_write_failed_total': "Cloth boxes that failed in bulk writes.",
+        'errors_total': "Errors, by stage.",
+        'folded_rows_total': "Duplicated rows folded before geocoding.",
+        'geocode_requests_total': "Requests to the geocoding API, by result.",
+        'geocoded_rows_total': "Rows geocoded, by provider and result.",
+        'local_geocode_lookups_total': "Lookups in the local address index, by result.",
+        'parsed_rows_total': "Rows parsed, by provider.",
+        'search_pages_total': "Search result pages fetched.",
+        'shared_geocode_rows_total': "Rows that shared the geocode of the same address in another dataset.",
+        'spatial_merged_rows_total': "Rows merged into a nearby cloth box, by provider.",
+        'tiles_written_total': "Tiles written by the tile export.",
+        'written_rows_total': "Rows written to the db, by provider.",
+        'db_write_batch_seconds': "Duration of a bulk write request.",
+        'download_seconds': "Duration of downloading a dataset.",
+        'driver_download_seconds': "Duration of downloading a dataset with the browser.",
+        'driver_start_seconds': "Duration of starting a browser session.",
+        'geocode_request_seconds': "Duration of a request to the geocoding API.",
+        'parse_seconds': "Duration of parsing a dataset.",
+        'search_page_seconds': "Duration of fetching a search result page.",
+        'tile_export_seconds': "Duration of writing the tiles.",
+        'last_run_timestamp_seconds': "Time the metrics were written, in seconds since the epoch.",
+    }
+
+    def __init__(self, prefix: str = 'clothbox_') -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+        return
+
+    @classmethod
+    def get_instance(cls) -> 'MetricsRegistry':
+        """Get the registry shared by the whole process.
+
+        Returns:
+            MetricsRegistry: The shared registry.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def reset(self) -> None:
+        """Clear all the metrics, for example at the start of a run.
+        """
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self._started_at = time.time()
+        return
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add the value to the counter.
+
+        Args:
+            name (str): The name of the counter.
+            value (float, optional): The value to add. Defaults to 1.
+            **labels (str): The labels of the counter.
+        """
+        key = (name, self._label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        return
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record the value in the histogram.
+
+        Args:
+            name (str): The name of the histogram.
+            value (float): The value to record, usually a latency in seconds.
+            **labels (str): The labels of the histogram.
+        """
+        key = (name, self._label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(self.DEFAULT_BUCKETS)}
+            histogram["count"] += 1
+            histogram["sum"] += value
+            index = bisect.bisect_left(self.DEFAULT_BUCKETS, value)
+            if index < len(self.DEFAULT_BUCKETS):
+                histogram["buckets"][index] += 1
+        return
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Record the time taken by the block in the histogram, even if the block raises.
+
+        Args:
+            name (str): The name of the histogram.
+            **labels (str): The labels of the histogram.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def snapshot(self) -> Dict:
+        """Get the current value of all the metrics.
+
+        Returns:
+            Dict: The counters and the histograms. Each of them is a list of dictionaries with the keys 'name' and 'labels',
+                and 'value' for the counters or 'count', 'sum' and 'buckets' for the histograms.
+        """
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(labels), "count": histogram["count"], "sum": histogram["sum"],
+                 "buckets": dict(zip([str(bound) for bound in self.DEFAULT_BUCKETS], histogram["buckets"]))}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def write_report(self, path: str, **summary) -> None:
+        """Write the run report as a JSON file.
+
+        Args:
+            path (str): The path of the report.
+            **summary: Additional fields of the report, for example the number of datasets by status.
+        """
+        report = {
+            "started_at": self._started_at,
+            "finished_at": time.time(),
+            **summary,
+            **self.snapshot()
+        }
+        self._write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the metrics in the Prometheus text format, for the node exporter textfile collector.
+
+        Args:
+            path (str): The path of the file. It should end with '.prom'.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        families = set()
+        # 스냅숏은 이름순이므로 같은 이름의 첫 줄 앞에만 HELP와 TYPE을 씀
+        for counter in snapshot["counters"]:
+            self._append_family(lines, families, counter["name"], "counter")
+            lines.append(f"{self.prefix}{counter['name']}{self._format_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            self._append_family(lines, families, histogram["name"], "histogram")
+            name = self.prefix + histogram["name"]
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{self._format_labels(dict(histogram['labels'], le=bound))} {cumulative}")
+            lines.append(f"{name}_bucket{self._format_labels(dict(histogram['labels'], le='+Inf'))} {histogram['count']}")
+            lines.append(f"{name}_sum{self._format_labels(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{self._format_labels(histogram['labels'])} {histogram['count']}")
+        self._append_family(lines, families, "last_run_timestamp_seconds", "gauge")
+        lines.append(f"{self.prefix}last_run_timestamp_seconds {time.time()}")
+        self._write_atomic(path, "\n".join(lines) + "\n")
+        return
+
+    def _append_family(self, lines: list, families: set, name: str, metric_type: str) -> None:
+        if name in families:
+            return
+        families.add(name)
+        help_text = self.HELP.get(name, name.replace('_', ' ').capitalize() + ".").replace('\\', '\\\\').replace('\n', '\\n')
+        lines.append(f"# HELP {self.prefix}{name} {help_text}")
+        lines.append(f"# TYPE {self.prefix}{name} {metric_type}")
+        return
+
+    def _label_key(self, labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def _format_labels(self, labels: Dict[str, str]) -> str:
+        if not labels:
+            return ""
+        escaped = [(key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in labels.items()]
+        return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+    def _write_atomic(self, path: str, content: str) -> None:
+        # 수집기가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.metrics-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return
@@ -0,0 +1,83 @@
+"""A module for generating synthetic cloth box CSV files.
+
+The generated files look like the files of the data portal: a few columns around an address column,
+encoded in cp949 or utf-8. A part of the rows repeat earlier addresses with a different spelling
+(whitespace, "번지", a position suffix), so the address normalization and deduplication are exercised too.
+
+Example:
+    >>> generate_csv('data.csv', rows=10000, encoding='cp949', duplicate_ratio=0.2, seed=1)
+    8000
+"""
+
+from typing import List, Tuple
+import csv
+import random
+
+_GUS = ['송파구', '강남구', '서초구', '강동구', '마포구', '관악구', '노원구', '은평구']
+_DONGS = ['송파동', '잠실동', '가락동', '문정동', '역삼동', '대치동', '방배동', '합정동', '신림동', '상계동']
+_VARIANTS = [
+    lambda address: address.replace(' ', '  '),
+    lambda address: address + '번지',
+    lambda address: address + ' 앞',
+    lambda address: address + ' (주민센터 옆)',
+]
+
+def make_address(index: int) -> str:
+    """Make the unique address of the index.
+
+    Args:
+        index (int): The index of the address.
+
+    Returns:
+        str: The address. Different indexes always make different addresses.
+    """
+    gu = _GUS[index % len(_GUS)]
+    dong = _DONGS[(index // len(_GUS)) % len(_DONGS)]
+    number = index // (len(_GUS) * len(_DONGS))
+    return f"서울특별시 {gu} {dong} {number // 50 + 1}-{number % 50 + 1}"
+
+def generate_addresses(rows: int, duplicate_ratio: float = 0.0, seed: int = 0, offset: int = 0) -> Tuple[List[str], int]:
+    """Generate the addresses of a file.
+
+    Args:
+        rows (int): The number of rows.
+        duplicate_ratio (float, optional): The ratio of rows that repeat an earlier address with a different spelling. Defaults to 0.0.
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+        offset (int, optional): The index of the first unique address, to keep the addresses of several files apart. Defaults to 0.
+
+    Returns:
+        Tuple[List[str], int]: The addresses, and the number of unique addresses among them.
+    """
+    generator = random.Random(seed)
+    addresses = []
+    unique = 0
+    for _ in range(rows):
+        if unique > 0 and generator.random() < duplicate_ratio:
+            address = make_address(offset + generator.randrange(unique))
+            addresses.append(generator.choice(_VARIANTS)(address))
+            continue
+        addresses.append(make_address(offset + unique))
+        unique += 1
+    return addresses, unique
+
+def generate_csv(path: str, rows: int, encoding: str = 'utf-8', duplicate_ratio: float = 0.0, seed: int = 0, offset: int = 0) -> int:
+    """Generate a cloth box CSV file.
+
+    Args:
+        path (str): The path of the file.
+        rows (int): The number of rows.
+        encoding (str, optional): The encoding of the file, 'utf-8' or 'cp949'. Defaults to 'utf-8'.
+        duplicate_ratio (float, optional): See `generate_addresses`. Defaults to 0.0.
+        seed (int, optional): See `generate_addresses`. Defaults to 0.
+        offset (int, optional): See `generate_addresses`. Defaults to 0.
+
+    Returns:
+        int: The number of unique addresses in the file.
+    """
+    addresses, unique = generate_addresses(rows, duplicate_ratio, seed, offset)
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['연번', '관리기관', '설치장소 주소', '비고'])
+        for i, address in enumerate(addresses):
+            writer.writerow([i + 1, address.split(' ')[1], address, ''])
+    return unique
@@ -0,0 +1,225 @@
+"""A module for local stand-ins of the data portal and the Kakao address API.
+
+Both servers run in a background thread on a free local port, so the updater can be driven end to end
+without touching the network. Point the updater at them with `FakeDataPortal.patch_config` and `FakeKakaoApi.patch_config`.
+
+Example:
+    >>> with FakeDataPortal({'/data/1/fileData.do': dataset}) as portal, FakeKakaoApi(latency=0.01, rate_429=0.05) as kakao:
+    ...     portal.patch_config(config)
+    ...     kakao.patch_config(config)
+    ...     updater.start_update()
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, quote, urlparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+class FakeDataset:
+    """A dataset served by the fake data portal.
+
+    Attributes:
+        title (str): The title of the dataset.
+        provider (str): The name of the organization that provides the dataset.
+        date (str): The modification date of the dataset. Example: '2024-06-01'
+        file_path (str): The path of the file of the dataset.
+        file_name (str): The name of the file sent to the client.
+    """
+    def __init__(self, title: str, provider: str, date: str, file_path: str, file_name: str) -> None:
+        self.title = title
+        self.provider = provider
+        self.date = date
+        self.file_path = file_path
+        self.file_name = file_name
+        return
+
+class _FakeServer:
+    def __init__(self, handler: type) -> None:
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        return
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+        return
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        return
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+class _DataPortalHandler(_QuietHandler):
+    def do_GET(self) -> None:
+        portal = self.server.fake
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == '/tcs/dss/selectDataSetList.do':
+            body = portal.render_search_page(int(params.get('currentPage', 1)), int(params.get('perPage', 10)))
+            self._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+        elif url.path == '/cmm/cmm/fileDownload.do':
+            dataset = portal.datasets.get(params.get('atchFileId'))
+            if dataset is None:
+                self._send(404, b'', 'text/plain')
+                return
+            with open(dataset.file_path, 'rb') as f:
+                body = f.read()
+            disposition = f"attachment; filename*=UTF-8''{quote(dataset.file_name)}"
+            self._send(200, body, 'application/octet-stream', {'Content-Disposition': disposition})
+        elif url.path in portal.datasets:
+            body = f"<a href=\"javascript:fn_fileDataDown('{url.path}', '1');\">다운로드</a>"
+            self._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self._send(404, b'', 'text/plain')
+        return
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        params = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        if urlparse(self.path).path != '/tcs/dss/selectFileDataDownload.do':
+            self._send(404, b'', 'text/plain')
+            return
+        body = json.dumps({'atchFileId': params.get('publicDataPk'), 'fileDetailSn': '1'})
+        self._send(200, body.encode('utf-8'), 'application/json')
+        return
+
+class FakeDataPortal(_FakeServer):
+    """A fake data portal that serves the search pages, the dataset pages and the files of the datasets.
+
+    The datasets are listed in the order of the given dict, which should be the newest first like the real portal.
+
+    Attributes:
+        datasets (Dict[str, FakeDataset]): The datasets by their link. Example: '/data/15000001/fileData.do'
+    """
+    def __init__(self, datasets: Dict[str, FakeDataset]) -> None:
+        super().__init__(_DataPortalHandler)
+        self.datasets = datasets
+        return
+
+    def patch_config(self, config: Dict) -> None:
+        """Point the urls of the config to the fake data portal.
+
+        Args:
+            config (Dict): The config of the updater.
+        """
+        config['DATA_PORTAL_URL'] = self.url
+        config['SEARCH_CONFIG']['SEARCH_BASE_URL'] = self.url + '/tcs/dss/selectDataSetList.do?'
+        config['FILE_DOWNLOAD_CONFIG']['INFO_URL'] = self.url + '/tcs/dss/selectFileDataDownload.do'
+        config['FILE_DOWNLOAD_CONFIG']['FILE_URL'] = self.url + '/cmm/cmm/fileDownload.do'
+        return
+
+    def render_search_page(self, page: int, per_page: int) -> str:
+        """Render a page of the search results in the markup of the data portal.
+
+        Args:
+            page (int): The page number, starting from 1.
+            per_page (int): The number of results in a page.
+
+        Returns:
+            str: The HTML of the page.
+        """
+        items = list(self.datasets.items())[(page - 1) * per_page:page * per_page]
+        rows = [
+            f"<li><dl><dt><a href=\"{link}\"><span class=\"title\">{dataset.title}</span></a></dt></dl>"
+            f"<div class=\"info-data\"><p><span class=\"data\">{dataset.provider}</span></p>"
+            f"<p><span class=\"data\">{dataset.date}</span></p></div></li>"
+            for link, dataset in items
+        ]
+        return f"<html><body><div class=\"result-list\"><ul>{''.join(rows)}</ul></div></body></html>"
+
+class _KakaoHandler(_QuietHandler):
+    def do_GET(self) -> None:
+        kakao = self.server.fake
+        query = parse_qs(urlparse(self.path).query).get('query', [''])[0]
+        if kakao.latency > 0:
+            time.sleep(kakao.latency)
+        if kakao.should_throttle():
+            self._send(429, b'{}', 'application/json', {'Retry-After': '0'})
+            return
+        self._send(200, json.dumps(kakao.resolve(query), ensure_ascii=False).encode('utf-8'), 'application/json')
+        return
+
+class FakeKakaoApi(_FakeServer):
+    """A fake Kakao address API that resolves every address to stable coordinates.
+
+    Attributes:
+        latency (float): The time taken by each request in seconds.
+        rate_429 (float): The ratio of requests answered with 429 Too Many Requests.
+        requests (int): The number of requests received.
+    """
+    def __init__(self, latency: float = 0.0, rate_429: float = 0.0, seed: int = 0) -> None:
+        super().__init__(_KakaoHandler)
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        return
+
+    def patch_config(self, config: Dict) -> None:
+        """Point the url of the config to the fake Kakao address API.
+
+        Args:
+            config (Dict): The config of the updater.
+        """
+        config['KAKAO_ADDRESS_API_URL'] = self.url + '/v2/local/search/address.json?query='
+        return
+
+    def should_throttle(self) -> bool:
+        """Count the request and decide whether it is answered with 429.
+
+        Returns:
+            bool: True if the request should be throttled.
+        """
+        with self._lock:
+            self.requests += 1
+            return self._random.random() < self.rate_429
+
+    def resolve(self, query: str) -> Dict[str, List[Dict]]:
+        """Make the response of the address.
+
+        Args:
+            query (str): The address to resolve.
+
+        Returns:
+            Dict[str, List[Dict]]: The response in the format of the Kakao address API.
+        """
+        digest = hashlib.md5(query.encode('utf-8')).digest()
+        x = 126.8 + int.from_bytes(digest[:4], 'big') / 2 ** 32 * 0.4
+        y = 37.4 + int.from_bytes(digest[4:8], 'big') / 2 ** 32 * 0.3
+        return {"documents": [{"address": {"address_name": query, "x": str(x), "y": str(y)}}]}
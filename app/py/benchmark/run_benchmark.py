@@ -0,0 +1,253 @@
+"""Measuring the throughput of the updater end to end, offline.
+
+The benchmark generates CSV files, serves them from a fake data portal, geocodes them with a fake Kakao address API,
+and writes them to mongomock (or to a local mongod with --mongo-uri). With --local-index-ratio, a part of the addresses is preloaded into a local address index,
+and only the rest goes to the fake Kakao address API. It records rows/sec, the peak RSS
+and the time spent in each stage, and writes the results to a JSON baseline that can be compared in review.
+
+mongomock is not a dependency of the updater, so install the development requirements first (pip install -r requirements-dev.txt).
+It scans the whole collection on each upsert, so run the 100k and 1M scenarios against a local mongod.
+
+Example:
+    $ python -m benchmark.run_benchmark --output benchmark/baseline.json
+    $ python -m benchmark.run_benchmark --compare benchmark/baseline.json
+    $ python -m benchmark.run_benchmark --local-index-ratio 0.9
+    $ python -m benchmark.run_benchmark --scenario 1m-mixed-dup30 --mongo-uri mongodb://localhost:27017
+"""
+
+import sys
+from os import path
+sys.path.append(path.dirname( path.dirname( path.abspath(__file__) ) ))
+from benchmark.csv_generator import generate_csv, make_address
+from benchmark.fake_servers import FakeDataPortal, FakeDataset, FakeKakaoApi
+from autoupdater.address_normalizer import normalize_address
+from autoupdater.clothbox_manager import ClothBoxManager
+from autoupdater.clothbox_updater import ClothBoxUpdater
+from autoupdater.data_downloader import HttpDownloadStrategy
+from autoupdater.data_portal_searcher import DataPortalSearcher
+from autoupdater.geocode_cache import GeocodeCache
+from autoupdater.geocoder import KakaoGeocoder
+from autoupdater.local_geocoder import AddressIndex, LocalGeocoder
+from autoupdater.run_journal import RunJournal
+from autoupdater.util.conf import config
+from autoupdater.util.metrics import MetricsRegistry
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from unittest import mock
+import argparse
+import copy
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+import pymongo
+
+SCENARIOS = {
+    '1k-utf8': {'rows': 1000, 'datasets': 2, 'encoding': 'utf-8', 'duplicate_ratio': 0.0},
+    '10k-cp949-dup30': {'rows': 10000, 'datasets': 4, 'encoding': 'cp949', 'duplicate_ratio': 0.3},
+    '100k-mixed-dup10': {'rows': 100000, 'datasets': 8, 'encoding': 'mixed', 'duplicate_ratio': 0.1},
+    '1m-mixed-dup30': {'rows': 1000000, 'datasets': 16, 'encoding': 'mixed', 'duplicate_ratio': 0.3},
+}
+# mongomock은 upsert마다 컬렉션 전체를 훑으므로 10만 행 이상은 --mongo-uri로 로컬 mongod에서 실행
+DEFAULT_SCENARIOS = ['1k-utf8', '10k-cp949-dup30']
+STAGE_HISTOGRAMS = {
+    'search': 'search_page_seconds',
+    'download': 'download_seconds',
+    'parse': 'parse_seconds',
+    'geocode': 'geocode_request_seconds',
+    'write': 'db_write_batch_seconds',
+}
+
+@contextmanager
+def _patched_environment(work_dir: str, mongo_uri: str = None) -> Iterator[None]:
+    saved_config = copy.deepcopy(config)
+    saved_environ = dict(os.environ)
+    os.environ.update({
+        'DB_URI': mongo_uri or 'mongodb://localhost',
+        'DB_NAME': 'clothbox_benchmark',
+        'DB_COLLECTION_CLOTH_BOX': 'clothbox',
+        'DB_COLLECTION_UPDATE_INFO': 'update_info',
+        'DB_COLLECTION_DATASET_STATE': 'dataset_state',
+    })
+    config['SEARCH_CONFIG']['SEARCH_KEYWORD'] = config['SEARCH_CONFIG']['SEARCH_KEYWORD'][:1]
+    config['METRICS'].update({
+        'REPORT_PATH': os.path.join(work_dir, 'run_report.json'),
+        'PROMETHEUS_PATH': os.path.join(work_dir, 'clothbox_updater.prom'),
+    })
+    config['TILE_EXPORT']['DIR'] = os.path.join(work_dir, 'tiles')
+    if mongo_uri is None:
+        # mongomock은 $geoWithin을 지원하지 않으므로 DB의 수거함으로 격자를 채우는 단계는 mongod에서만 측정함
+        config['SPATIAL_DEDUP']['SEED_FROM_DB'] = False
+    try:
+        if mongo_uri is not None:
+            yield
+        else:
+            import mongomock
+            with mock.patch.object(pymongo, 'MongoClient', mongomock.MongoClient):
+                yield
+    finally:
+        # 클래스 속성이 설정의 하위 dict를 직접 참조하므로 dict를 바꾸지 않고 내용만 되돌림
+        for key, value in saved_config.items():
+            if isinstance(value, dict):
+                config[key].clear()
+                config[key].update(value)
+            else:
+                config[key] = value
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+def _generate_datasets(work_dir: str, rows: int, datasets: int, encoding: str, duplicate_ratio: float) -> Dict:
+    result = {}
+    addresses = []
+    rows_per_dataset = rows // datasets
+    for i in range(datasets):
+        file_encoding = encoding if encoding != 'mixed' else ('cp949', 'utf-8')[i % 2]
+        file_path = os.path.join(work_dir, f'dataset_{i}.csv')
+        unique = generate_csv(file_path, rows_per_dataset, file_encoding, duplicate_ratio, seed=i, offset=i * rows_per_dataset)
+        addresses.extend(make_address(i * rows_per_dataset + j) for j in range(unique))
+        result[f'/data/{15000000 + i}/fileData.do'] = FakeDataset(
+            title=f'의류수거함 현황 {i}', provider=f'제공기관{i}', date='2024-06-01',
+            file_path=file_path, file_name=f'의류수거함_{i}.csv'
+        )
+    return {"datasets": result, "rows": rows_per_dataset * datasets, "unique": len(addresses), "addresses": addresses}
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss는 Linux에서 KB, macOS에서 byte 단위
+    unit = 1 if platform.system() == 'Darwin' else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * unit / (1024 * 1024)
+
+def _resolve(kakao: FakeKakaoApi, address: str) -> tuple:
+    document = kakao.resolve(normalize_address(address))['documents'][0]['address']
+    return document['address_name'], {"lat": float(document['y']), "lon": float(document['x'])}
+
+def run_scenario(name: str, rows: int, datasets: int, encoding: str, duplicate_ratio: float,
+                 latency: float = 0.005, rate_429: float = 0.01, qps: float = 2000, mongo_uri: str = None,
+                 local_index_ratio: float = 0.0) -> Dict:
+    """Run the updater end to end on generated data and measure it.
+
+    Args:
+        name (str): The name of the scenario.
+        rows (int): The total number of rows of all the datasets.
+        datasets (int): The number of datasets.
+        encoding (str): The encoding of the files, 'utf-8', 'cp949' or 'mixed'.
+        duplicate_ratio (float): The ratio of rows that repeat an earlier address with a different spelling.
+        latency (float, optional): The latency of the fake Kakao address API in seconds. Defaults to 0.005.
+        rate_429 (float, optional): The ratio of geocoding requests answered with 429. Defaults to 0.01.
+        qps (float, optional): The QPS limit of the geocoder. Defaults to 2000.
+        mongo_uri (str, optional): The URI of a local mongod. Defaults to None, which uses mongomock.
+        local_index_ratio (float, optional): The ratio of unique addresses preloaded into a local address index. Defaults to 0.0.
+
+    Returns:
+        Dict: The parameters and the results of the scenario.
+    """
+    with tempfile.TemporaryDirectory(prefix='clothbox-benchmark-') as work_dir, _patched_environment(work_dir, mongo_uri):
+        generated = _generate_datasets(work_dir, rows, datasets, encoding, duplicate_ratio)
+        with FakeDataPortal(generated['datasets']) as portal, FakeKakaoApi(latency=latency, rate_429=rate_429) as kakao:
+            portal.patch_config(config)
+            kakao.patch_config(config)
+            clothbox_db = ClothBoxManager()
+            # mongomock도 같은 프로세스 안에서는 데이터를 공유하므로 이전 시나리오의 데이터를 지움
+            clothbox_db.db.client.drop_database(os.environ['DB_NAME'])
+            geocoder = KakaoGeocoder(cache=GeocodeCache(os.path.join(work_dir, 'geocode_cache.sqlite3')), api_key='KakaoAK benchmark', qps=qps)
+            if local_index_ratio > 0:
+                # 가짜 카카오 API가 주는 것과 같은 좌표를 색인에 넣어 두어, 색인에 없는 주소만 API로 가게 함
+                index = AddressIndex(os.path.join(work_dir, 'address_index.sqlite3'))
+                preloaded = generated['addresses'][:int(len(generated['addresses']) * local_index_ratio)]
+                index.put_many((address, *_resolve(kakao, address)) for address in preloaded)
+                geocoder = LocalGeocoder(index, fallback=geocoder)
+            journal = RunJournal(os.path.join(work_dir, 'run_journal.json'), os.path.join(work_dir, 'downloads'))
+            updater = ClothBoxUpdater(clothbox_db, DataPortalSearcher(), geocoder=geocoder, journal=journal)
+            updater.data_downloader.set_strategies([HttpDownloadStrategy()])
+
+            start = time.perf_counter()
+            updater.start_update()
+            elapsed = time.perf_counter() - start
+
+            snapshot = MetricsRegistry.get_instance().snapshot()
+            written = clothbox_db.db[os.environ['DB_COLLECTION_CLOTH_BOX']].count_documents({})
+            clothbox_db.db.client.drop_database(os.environ['DB_NAME'])
+            geocoder.cache.close()
+            if isinstance(geocoder, LocalGeocoder):
+                geocoder.index.close()
+
+    stage_seconds = {
+        stage: round(sum(histogram['sum'] for histogram in snapshot['histograms'] if histogram['name'] == histogram_name), 3)
+        for stage, histogram_name in STAGE_HISTOGRAMS.items()
+    }
+    return {
+        "name": name,
+        "params": {"rows": rows, "datasets": datasets, "encoding": encoding, "duplicate_ratio": duplicate_ratio,
+                   "latency": latency, "rate_429": rate_429, "qps": qps, "db": "mongod" if mongo_uri else "mongomock",
+                   "local_index_ratio": local_index_ratio},
+        "rows": generated['rows'],
+        "unique_rows": generated['unique'],
+        "written": written,
+        "geocode_requests": kakao.requests,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(generated['rows'] / elapsed, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "stage_seconds": stage_seconds,
+    }
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Compare the results with the baseline.
+
+    Args:
+        results (List[Dict]): The results of the scenarios.
+        baseline (Dict): The baseline written by a previous run.
+        tolerance (float): The allowed drop of rows/sec, as a ratio of the baseline.
+
+    Returns:
+        List[str]: The scenarios that regressed.
+    """
+    baseline_results = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        base = baseline_results.get(result['name'])
+        if base is None:
+            print(f"{result['name']}: no baseline")
+            continue
+        change = result['rows_per_second'] / base['rows_per_second'] - 1
+        print(f"{result['name']}: {result['rows_per_second']} rows/s ({change:+.1%}), "
+              f"peak RSS {result['peak_rss_mb']} MB (baseline {base['peak_rss_mb']} MB)")
+        if change < -tolerance:
+            regressions.append(result['name'])
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the throughput of the cloth box updater offline.")
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="the scenario to run, may be repeated (default: %s)" % ', '.join(DEFAULT_SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.005, help="latency of the fake Kakao API in seconds")
+    parser.add_argument('--rate-429', type=float, default=0.01, help="ratio of geocoding requests answered with 429")
+    parser.add_argument('--qps', type=float, default=2000, help="QPS limit of the geocoder")
+    parser.add_argument('--local-index-ratio', type=float, default=0.0, help="ratio of unique addresses preloaded into a local address index")
+    parser.add_argument('--mongo-uri', help="URI of a local mongod, instead of mongomock")
+    parser.add_argument('--output', help="path of the JSON file to write the results to")
+    parser.add_argument('--compare', help="path of the baseline JSON file to compare the results with")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed drop of rows/sec against the baseline")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or DEFAULT_SCENARIOS:
+        result = run_scenario(name, **SCENARIOS[name], latency=args.latency, rate_429=args.rate_429, qps=args.qps,
+                              mongo_uri=args.mongo_uri, local_index_ratio=args.local_index_ratio)
+        print(json.dumps(result, ensure_ascii=False))
+        results.append(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            sys.exit(1)
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import unittest
+import pandas as pd
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.address_normalizer import normalize_address, normalize_addresses, dedup_addresses
+
+class TestAddressNormalizer(unittest.TestCase):
+
+    TEST_ADDRESSES = {
+        '송파동 18-3': '송파동 18-3',
+        ' 송파동  18-3 ': '송파동 18-3',
+        '송파동 18-3 (아파트 앞)': '송파동 18-3',
+        '송파동 18-3번지': '송파동 18-3',
+        '송파동 18 - 3': '송파동 18-3',
+        '송파동　１８－３': '송파동 18-3',
+        '송파동 18-3 앞': '송파동 18-3',
+        '송파동 18-3 101동': '송파동 18-3',
+        '송파동 18-3 101동 1203호': '송파동 18-3',
+        '송파동 18-3 지하 1층': '송파동 18-3',
+        '올림픽로 300 롯데월드 앞': '올림픽로 300 롯데월드',
+        '개포1동 12-4': '개포1동 12-4',
+        '서울 강남구 개포 1동': '서울 강남구 개포 1동',
+        '개포 1동 101동 1203호': '개포 1동',
+    }
+
+    def test_normalize_address(self):
+        for address, expected in self.TEST_ADDRESSES.items():
+            self.assertEqual(normalize_address(address), expected, address)
+
+    def test_normalize_addresses(self):
+        result = normalize_addresses(pd.Series(list(self.TEST_ADDRESSES.keys())))
+        self.assertEqual(result.tolist(), list(self.TEST_ADDRESSES.values()))
+
+    def test_dedup_addresses(self):
+        result, folded = dedup_addresses(['송파동 18-3', '송파동 18-3번지', ' ', '송파동 22-6', '송파동 22-6 앞'])
+        self.assertEqual(result, ['송파동 18-3', '송파동 22-6'])
+        self.assertEqual(folded, 3)
+
+    def test_dedup_addresses_empty(self):
+        self.assertEqual(dedup_addresses([]), ([], 0))
+
+if __name__ == '__main__':
+    unittest.main()
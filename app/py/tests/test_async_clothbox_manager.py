@@ -0,0 +1,181 @@
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.async_clothbox_manager import AsyncClothBoxManager
+from autoupdater.util.conf import config
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+class AsyncCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+@patch.dict(os.environ, {'DB_URI': 'mongodb://localhost', 'DB_NAME': 'test', 'DB_COLLECTION_CLOTH_BOX': 'clothbox', 'DB_COLLECTION_UPDATE_INFO': 'update_info'})
+class TestAsyncClothBoxManager(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.patcher = patch('motor.motor_asyncio.AsyncIOMotorClient')
+        self.mock_client = self.patcher.start()
+        self.mock_db = MagicMock()
+        self.mock_client.return_value.__getitem__.return_value = self.mock_db
+        self.mock_collection = MagicMock()
+        self.mock_db.__getitem__.return_value = self.mock_collection
+        self.manager = AsyncClothBoxManager()
+
+    def tearDown(self):
+        AsyncClothBoxManager.close_clients()
+        self.patcher.stop()
+
+    def test_shared_client(self):
+        AsyncClothBoxManager().db
+        AsyncClothBoxManager().db
+        self.mock_client.assert_called_once()
+        self.assertEqual(self.mock_client.call_args[1]['maxPoolSize'], config['DB_MAX_POOL_SIZE'])
+
+    def test_client_per_loop(self):
+        async def connect():
+            return self.manager.db
+        asyncio.run(connect())
+        asyncio.run(connect())
+        # 두 번째 루프에서는 새 클라이언트를 만들고, 닫힌 루프의 클라이언트는 버림
+        self.assertEqual(self.mock_client.call_count, 2)
+        self.assertEqual(len(AsyncClothBoxManager._clients), 1)
+        self.mock_client.return_value.close.assert_called_once()
+
+    def test_collections_resolved_once(self):
+        self.manager.db
+        self.mock_db.__getitem__.reset_mock()
+        self.manager._collection('DB_COLLECTION_CLOTH_BOX')
+        self.manager._collection('DB_COLLECTION_UPDATE_INFO')
+        self.mock_db.__getitem__.assert_not_called()
+
+    async def test_get_clothbox_data(self):
+        self.mock_collection.find.return_value = AsyncCursor([{'address': '수원'}])
+        self.assertEqual(await self.manager.get_clothbox_data('수원'), ['수원'])
+        self.assertEqual(self.mock_collection.find.call_args[0][1], {'address': 1, '_id': 0})
+
+    async def test_get_clothbox_points(self):
+        self.mock_collection.find.return_value = AsyncCursor([{'address': '수원', 'providing_name': '수원시', 'location': {'coordinates': [127.0, 37.0]}}])
+        points = [point async for point in self.manager.get_clothbox_points(['수원시'])]
+        self.assertEqual(points, [{'address': '수원', 'providing_name': '수원시', 'coordinates': [127.0, 37.0]}])
+        self.assertEqual(self.mock_collection.find.call_args[0][0], {'providing_name': {'$in': ['수원시']}})
+
+    async def test_refresh(self):
+        self.mock_db.list_collection_names = AsyncMock(return_value=[])
+        self.mock_db.drop_collection = AsyncMock()
+        self.mock_collection.aggregate.return_value.to_list = AsyncMock()
+        indexes = {}
+        self.mock_collection.index_information = AsyncMock(side_effect=lambda: dict(indexes))
+        self.mock_collection.create_index = AsyncMock(side_effect=lambda keys, name, **options: indexes.setdefault(name, {}))
+        self.mock_collection.rename = AsyncMock()
+        self.assertFalse(await self.manager.begin_refresh())
+        self.mock_db.drop_collection.assert_awaited_once_with('clothbox_staging')
+        self.mock_collection.aggregate.assert_called_once_with([{'$match': {}}, {'$out': 'clothbox_staging'}])
+
+        self.mock_db.__getitem__.reset_mock()
+        self.mock_collection.find.return_value = AsyncCursor([])
+        await self.manager.get_clothbox_sources('수원', 'Link1')
+        self.mock_db.__getitem__.assert_called_with('clothbox_staging')
+
+        self.assertEqual(set(indexes), {'address_1', 'sources.providing_name_1_sources.source_link_1', 'location_2dsphere'})
+
+        self.assertTrue(await self.manager.commit_refresh())
+        self.mock_collection.rename.assert_awaited_once_with('clothbox', dropTarget=True)
+        self.assertFalse(await self.manager.commit_refresh())
+
+    async def test_commit_refresh_missing_index(self):
+        self.mock_db.list_collection_names = AsyncMock(return_value=['clothbox', 'clothbox_staging'])
+        self.mock_db.drop_collection = AsyncMock()
+        self.mock_collection.index_information = AsyncMock(return_value={'address_1': {}})
+        self.mock_collection.create_index = AsyncMock()
+        self.mock_collection.rename = AsyncMock()
+        await self.manager.begin_refresh(reuse=True)
+        with self.assertRaises(Exception):
+            await self.manager.commit_refresh()
+        self.mock_collection.rename.assert_not_awaited()
+        self.mock_db.drop_collection.assert_awaited_once_with('clothbox_staging')
+
+    async def test_refresh_reuse_and_abort(self):
+        self.mock_db.list_collection_names = AsyncMock(return_value=['clothbox', 'clothbox_staging'])
+        self.mock_db.drop_collection = AsyncMock()
+        self.mock_collection.index_information = AsyncMock(return_value={'address_1': {}, 'sources.providing_name_1_sources.source_link_1': {}})
+        self.mock_collection.create_index = AsyncMock()
+        self.assertTrue(await self.manager.begin_refresh(reuse=True))
+        self.mock_collection.aggregate.assert_not_called()
+        # 다시 쓰는 스테이징 컬렉션에 빠진 인덱스만 만듦
+        self.assertEqual([call[1]['name'] for call in self.mock_collection.create_index.call_args_list], ['location_2dsphere'])
+        await self.manager.abort_refresh()
+        self.mock_db.drop_collection.assert_awaited_once_with('clothbox_staging')
+        self.assertFalse(await self.manager.commit_refresh())
+
+    async def test_read_last_update_date(self):
+        self.mock_collection.find.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[])
+        self.assertIsNone(await self.manager.read_last_update_date())
+
+    async def test_write_clothbox_data_many(self):
+        in_flight = []
+        max_in_flight = []
+        async def bulk_write(operations, ordered):
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.pop()
+            result = MagicMock()
+            result.bulk_api_result = {'nUpserted': len(operations), 'nModified': 0, 'writeErrors': []}
+            return result
+        self.mock_collection.bulk_write.side_effect = bulk_write
+        records = [{'address': f'a{i}', 'providing_name': '수원', 'coordinates': [127.0, 37.0]} for i in range(5)]
+        results = await self.manager.write_clothbox_data_many(iter(records), batch_size=2, concurrency=2)
+        self.assertEqual([result['upserted'] for result in results], [2, 2, 1])
+        self.assertLessEqual(max(max_in_flight), 2)
+
+    async def test_write_clothbox_data_many_errors(self):
+        details = {'nUpserted': 1, 'nModified': 0, 'writeErrors': [{'index': 1}]}
+        self.mock_collection.bulk_write = AsyncMock(side_effect=BulkWriteError(details))
+        records = [{'address': 'a', 'providing_name': '수원', 'coordinates': [127.0, 37.0]}] * 2
+        results = await self.manager.write_clothbox_data_many(records)
+        self.assertEqual(results, [{'upserted': 1, 'modified': 0, 'failed': 1}])
+
+    async def test_write_clothbox_data_many_failed(self):
+        written = []
+        cancelled = []
+        async def bulk_write(operations, ordered):
+            address = operations[0]._filter['address']
+            if address == 'a2':
+                raise AutoReconnect("connection lost")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(address)
+                raise
+            written.append(address)
+        self.mock_collection.bulk_write.side_effect = bulk_write
+        records = [{'address': f'a{i}', 'providing_name': '수원', 'coordinates': [127.0, 37.0]} for i in range(10)]
+        with self.assertRaises(AutoReconnect):
+            await self.manager.write_clothbox_data_many(iter(records), batch_size=2, concurrency=2)
+        # 실패한 뒤에는 쓰던 배치를 취소하고 다음 배치를 보내지 않음
+        self.assertEqual(cancelled, ['a0'])
+        self.assertEqual(written, [])
+        self.assertEqual(self.mock_collection.bulk_write.call_count, 2)
+
+    async def test_ensure_indexes(self):
+        self.mock_collection.index_information = AsyncMock(return_value={'_id_': {}})
+        self.mock_collection.create_index = AsyncMock()
+        self.mock_collection.name = 'collection'
+        built = await self.manager.ensure_indexes()
+        self.assertIn('collection.location_2dsphere', built)
+        self.assertIn('collection.update_date_-1', built)
+
+if __name__ == '__main__':
+    unittest.main()
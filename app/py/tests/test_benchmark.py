@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import requests
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from benchmark.csv_generator import generate_addresses, generate_csv
+from benchmark.fake_servers import FakeDataPortal, FakeDataset, FakeKakaoApi
+from benchmark.run_benchmark import run_scenario
+from autoupdater.address_normalizer import dedup_addresses
+from autoupdater.clothbox_data_parser import CsvParser
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_generate_addresses(self):
+        addresses, unique = generate_addresses(1000, duplicate_ratio=0.3, seed=1)
+        self.assertEqual(len(addresses), 1000)
+        self.assertEqual(len(dedup_addresses(addresses)[0]), unique)
+        self.assertLess(unique, 800)
+
+    def test_generate_csv(self):
+        for encoding in ['utf-8', 'cp949']:
+            with self.subTest(encoding=encoding):
+                file_path = os.path.join(self.temp_dir.name, f'{encoding}.csv')
+                unique = generate_csv(file_path, 100, encoding, duplicate_ratio=0.2)
+                addresses = list(CsvParser().parse_address(file_path, ['주소']))
+                self.assertEqual(len(addresses), 100)
+                self.assertEqual(len(dedup_addresses(addresses)[0]), unique)
+
+    def test_fake_data_portal(self):
+        file_path = os.path.join(self.temp_dir.name, 'data.csv')
+        generate_csv(file_path, 10)
+        datasets = {'/data/1/fileData.do': FakeDataset('Title1', 'Provider1', '2024-06-01', file_path, '데이터.csv')}
+        with FakeDataPortal(datasets) as portal:
+            self.assertIn('Provider1', requests.get(portal.url + '/tcs/dss/selectDataSetList.do?currentPage=1&perPage=10').text)
+            self.assertIn("fn_fileDataDown('/data/1/fileData.do', '1')", requests.get(portal.url + '/data/1/fileData.do').text)
+            info = requests.post(portal.url + '/tcs/dss/selectFileDataDownload.do', data={'publicDataPk': '/data/1/fileData.do'}).json()
+            response = requests.get(portal.url + '/cmm/cmm/fileDownload.do', params={'atchFileId': info['atchFileId']})
+            with open(file_path, 'rb') as f:
+                self.assertEqual(response.content, f.read())
+
+    def test_fake_kakao_api(self):
+        with FakeKakaoApi() as kakao:
+            config = {}
+            kakao.patch_config(config)
+            first = requests.get(config['KAKAO_ADDRESS_API_URL'] + '송파동 18-3').json()
+            second = requests.get(config['KAKAO_ADDRESS_API_URL'] + '송파동 18-3').json()
+        self.assertEqual(first, second)
+        self.assertEqual(first['documents'][0]['address']['address_name'], '송파동 18-3')
+        self.assertEqual(kakao.requests, 2)
+
+        with FakeKakaoApi(rate_429=1.0) as kakao:
+            self.assertEqual(requests.get(kakao.url + '/v2/local/search/address.json?query=a').status_code, 429)
+
+    def test_run_scenario(self):
+        result = run_scenario('test', 200, 2, 'mixed', 0.2, latency=0, rate_429=0)
+        self.assertEqual(result['rows'], 200)
+        self.assertEqual(result['written'], result['unique_rows'])
+        self.assertEqual(result['geocode_requests'], result['unique_rows'])
+        self.assertGreater(result['stage_seconds']['write'], 0)
+
+    def test_run_scenario_local_index(self):
+        result = run_scenario('test', 200, 2, 'utf-8', 0.0, latency=0, rate_429=0, local_index_ratio=0.5)
+        self.assertEqual(result['written'], 200)
+        self.assertEqual(result['geocode_requests'], 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,6 @@
 import unittest
 from unittest.mock import patch
-import pandas as pd
-from io import StringIO
+import tempfile
 import sys
 import os
 sys.path.append(os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ))
@@ -12,36 +11,67 @@ class TestCsvParser(unittest.TestCase):
     def setUp(self):
         self.parser = ClothBoxDataParser()
         self.parser.set_strategy(CsvParser())
+        self.temp_dir = tempfile.TemporaryDirectory()
 
-    @patch('pandas.read_csv')
-    def test_parse_address_valid_data_(self, mock_read_csv):
-        test_data = pd.DataFrame({"상세주소": ["123 Main St", "456 Elm St"]})
-        mock_read_csv.return_value = test_data
-        result = self.parser.parse_address('dummy_path.csv')
-        self.assertEqual(result, ['123 Main St', '456 Elm St'])
-
-    @patch('pandas.read_csv')
-    def test_parse_address_different_encodings(self, mock_read_csv):
-        test_data_utf8 = pd.DataFrame({"위치": ["123 Main St"]})
-        mock_read_csv.side_effect = [UnicodeDecodeError('utf-8', b"", 0, 1, 'invalid start byte'), test_data_utf8]
-        result = self.parser.parse_address('dummy_path.csv')
-        self.assertEqual(result, ['123 Main St'])
-
-    @patch('pandas.read_csv')
-    def test_parse_address_missing_index_column(self, mock_read_csv):
-        test_data = pd.DataFrame({"NotAddress": ["123 Main St"]})
-        mock_read_csv.return_value = test_data
-        result = self.parser.parse_address('dummy_path.csv')
+    def _write_file(self, content, encoding='utf-8'):
+        file_path = os.path.join(self.temp_dir.name, 'data.csv')
+        with open(file_path, 'w', encoding=encoding, newline='') as file:
+            file.write(content)
+        return file_path
+
+    def test_parse_address_valid_data_(self):
+        file_path = self._write_file("번호,상세주소,비고\n1,123 Main St,a\n2,456 Elm St,b\n")
+        result = self.parser.parse_address(file_path)
+        self.assertEqual(list(result), ['123 Main St', '456 Elm St'])
+
+    def test_parse_address_different_encodings(self):
+        for encoding in ['cp949', 'euc-kr', 'utf-8', 'utf-8-sig']:
+            file_path = self._write_file("위치,관리기관\n송파동 18-3,송파구청\n", encoding)
+            result = self.parser.parse_address(file_path)
+            self.assertEqual(list(result), ['송파동 18-3'], encoding)
+
+    def test_parse_address_skip_null(self):
+        file_path = self._write_file("주소,비고\n송파동 18-3,a\n,b\n송파동 22-6,c\n")
+        result = self.parser.parse_address(file_path)
+        self.assertEqual(list(result), ['송파동 18-3', '송파동 22-6'])
+
+    @patch.dict(CsvParser.CSV_PARSER_CONFIG, {'SNIFF_SIZE': 101, 'CHUNK_SIZE': 7})
+    def test_parse_address_large_file(self):
+        rows = ''.join(f"송파동 {i}-1,송파구청\n" for i in range(100))
+        file_path = self._write_file("소재지,관리기관\n" + rows, 'cp949')
+        result = list(self.parser.parse_address(file_path))
+        self.assertEqual(len(result), 100)
+        self.assertEqual(result[-1], '송파동 99-1')
+
+    @patch.dict(CsvParser.CSV_PARSER_CONFIG, {'SNIFF_SIZE': 64})
+    def test_parse_address_encoding_after_sniff(self):
+        # 앞부분은 ASCII라 utf-8로도 읽히지만 뒤의 행은 cp949
+        rows = ''.join(f"{i},Road {i}\n" for i in range(10)) + "10,송파동 18-3\n"
+        file_path = self._write_file("id,address\n" + rows, 'cp949')
+        with patch('autoupdater.clothbox_data_parser.config', {'ADDRESS_PARSING_WORDS': ['address']}):
+            result = list(self.parser.parse_address(file_path))
+        self.assertEqual(result[-1], '송파동 18-3')
+
+    def test_parse_address_undecodable(self):
+        file_path = os.path.join(self.temp_dir.name, 'data.csv')
+        with open(file_path, 'wb') as file:
+            file.write("주소\n송파동 18-3\n".encode('utf-8') + b'\xff\xff\xff\n')
+        with patch.object(CsvParser, 'ENCODINGS', ('utf-8',)):
+            with self.assertRaises(ValueError):
+                self.parser.parse_address(file_path)
+
+    def test_parse_address_missing_index_column(self):
+        file_path = self._write_file("NotAddress\n123 Main St\n")
+        result = self.parser.parse_address(file_path)
         self.assertIsNone(result)
 
-    @patch('pandas.read_csv')
-    def test_parse_address_empty_file(self, mock_read_csv):
-        mock_read_csv.return_value = pd.DataFrame()
-        result = self.parser.parse_address('dummy_path.csv')
+    def test_parse_address_empty_file(self):
+        file_path = self._write_file("")
+        result = self.parser.parse_address(file_path)
         self.assertEqual(result, None)
 
     def tearDown(self):
-        pass
+        self.temp_dir.cleanup()
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
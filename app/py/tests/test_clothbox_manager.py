@@ -5,11 +5,12 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 from autoupdater.clothbox_manager import ClothBoxManager
 from datetime import datetime
+from pymongo.errors import BulkWriteError
 
 class TestClothBoxManager(unittest.TestCase):
 
     def setUp(self):
-        self.patcher = patch('autoupdater.clothbox_manager.pymongo.MongoClient')
+        self.patcher = patch('pymongo.MongoClient')
         self.mock_client = self.patcher.start()
 
         self.mock_db = MagicMock()
@@ -23,6 +24,108 @@ class TestClothBoxManager(unittest.TestCase):
         self.patcher.stop()
         pass
 
+    @patch.dict(os.environ, {'DB_COLLECTION_CLOTH_BOX': 'clothbox', 'DB_COLLECTION_UPDATE_INFO': 'update_info'})
+    def test_ensure_indexes(self):
+        self.mock_collection.index_information.return_value = {'_id_': {}, 'address_1': {}}
+        built = ClothBoxManager().ensure_indexes()
+        self.assertNotIn('clothbox.address_1', built)
+        self.assertIn('clothbox.location_2dsphere', built)
+        self.assertIn('update_info.update_date_-1', built)
+        self.assertIn('dataset_state.link_1', built)
+        self.mock_collection.create_index.assert_any_call([('link', 1)], name='link_1', unique=True)
+
+        # 모두 만들어진 뒤에는 다시 만들지 않음
+        self.mock_collection.index_information.return_value = {name.split('.', 1)[1]: {} for name in built + ['clothbox.address_1']}
+        self.mock_collection.create_index.reset_mock()
+        self.assertEqual(self.manager.ensure_indexes(), [])
+        self.mock_collection.create_index.assert_not_called()
+
+    def test_ensure_indexes_duplicates(self):
+        from pymongo.errors import OperationFailure
+        def create_index(keys, name, unique=False):
+            if unique:
+                raise OperationFailure('E11000 duplicate key error')
+            return name
+        self.mock_collection.index_information.return_value = {}
+        self.mock_collection.create_index.side_effect = create_index
+        built = self.manager.ensure_indexes()
+        self.assertNotIn('dataset_state.link_1', built)
+        self.assertIn('dataset_state.status_1_portal_date_1', built)
+
+    @patch.dict(os.environ, {'DB_COLLECTION_CLOTH_BOX': 'clothbox'})
+    def test_refresh(self):
+        indexes = {}
+        self.mock_collection.index_information.side_effect = lambda: dict(indexes)
+        self.mock_collection.create_index.side_effect = lambda keys, name, **options: indexes.setdefault(name, {})
+        self.mock_db.list_collection_names.return_value = []
+        self.assertFalse(self.manager.begin_refresh())
+        self.mock_db.drop_collection.assert_called_once_with('clothbox_staging')
+        self.mock_collection.aggregate.assert_called_once_with([{'$match': {}}, {'$out': 'clothbox_staging'}])
+
+        self.mock_db.__getitem__.reset_mock()
+        self.manager.get_clothbox_sources('수원', 'Link1')
+        self.mock_db.__getitem__.assert_called_with('clothbox_staging')
+
+        # 연결할 때 만든 살아 있는 컬렉션의 인덱스는 스테이징 컬렉션에 없음
+        indexes.clear()
+        self.mock_collection.create_index.reset_mock()
+        self.assertTrue(self.manager.commit_refresh())
+        self.assertIn('location_2dsphere', [call[1]['name'] for call in self.mock_collection.create_index.call_args_list])
+        self.mock_collection.rename.assert_called_once_with('clothbox', dropTarget=True)
+        self.assertFalse(self.manager.commit_refresh())
+
+        self.mock_db.__getitem__.reset_mock()
+        self.manager.get_clothbox_sources('수원', 'Link1')
+        self.mock_db.__getitem__.assert_called_with('clothbox')
+
+    @patch.dict(os.environ, {'DB_COLLECTION_CLOTH_BOX': 'clothbox'})
+    def test_begin_refresh_indexes(self):
+        indexes = {}
+        self.mock_collection.index_information.side_effect = lambda: dict(indexes)
+        self.mock_collection.create_index.side_effect = lambda keys, name, **options: indexes.setdefault(name, {})
+        self.manager.db
+        indexes.clear()
+        self.mock_collection.create_index.reset_mock()
+        self.mock_db.list_collection_names.return_value = []
+        self.manager.begin_refresh()
+        # 적재 중의 공간 중복 제거 조회도 스테이징 컬렉션의 2dsphere 인덱스를 씀
+        self.assertEqual(set(indexes), {'address_1', 'sources.providing_name_1_sources.source_link_1', 'location_2dsphere'})
+
+        # 이전 버전이 남긴 스테이징 컬렉션을 다시 쓸 때도 빠진 인덱스를 만듦
+        del indexes['location_2dsphere']
+        self.mock_collection.create_index.reset_mock()
+        self.mock_db.list_collection_names.return_value = ['clothbox', 'clothbox_staging']
+        self.assertTrue(self.manager.begin_refresh(reuse=True))
+        self.assertEqual([call[1]['name'] for call in self.mock_collection.create_index.call_args_list], ['location_2dsphere'])
+
+    @patch.dict(os.environ, {'DB_COLLECTION_CLOTH_BOX': 'clothbox'})
+    def test_commit_refresh_missing_index(self):
+        from pymongo.errors import OperationFailure
+        indexes = {}
+        def create_index(keys, name, **options):
+            if name == 'location_2dsphere':
+                raise OperationFailure("Can't extract geo keys")
+            indexes[name] = {}
+        self.mock_collection.index_information.side_effect = lambda: dict(indexes)
+        self.mock_collection.create_index.side_effect = create_index
+        self.mock_db.list_collection_names.return_value = []
+        self.manager.begin_refresh()
+        self.mock_db.drop_collection.reset_mock()
+        with self.assertRaises(Exception):
+            self.manager.commit_refresh()
+        self.mock_collection.rename.assert_not_called()
+        self.mock_db.drop_collection.assert_called_once_with('clothbox_staging')
+        self.assertFalse(self.manager.commit_refresh())
+
+    @patch.dict(os.environ, {'DB_COLLECTION_CLOTH_BOX': 'clothbox'})
+    def test_refresh_reuse_and_abort(self):
+        self.mock_db.list_collection_names.return_value = ['clothbox', 'clothbox_staging']
+        self.assertTrue(self.manager.begin_refresh(reuse=True))
+        self.mock_collection.aggregate.assert_not_called()
+        self.manager.abort_refresh()
+        self.mock_db.drop_collection.assert_called_once_with('clothbox_staging')
+        self.assertFalse(self.manager.commit_refresh())
+
     def test_read_last_update_date(self):
         self.mock_collection.find.return_value.sort.return_value.limit.return_value = [{'update_date': datetime(2020, 1, 1)}]
         result = self.manager.read_last_update_date()
@@ -33,16 +136,130 @@ class TestClothBoxManager(unittest.TestCase):
         result = self.manager.write_update_info(['Suwon'])
         self.assertTrue(result)
 
+    def test_write_update_info_datasets(self):
+        datasets = [{'provider': '수원', 'link': 'Link1', 'hash': 'abc', 'row_count': 10}]
+        self.manager.write_update_info(['수원'], datasets)
+        update_query = self.mock_collection.update_one.call_args[0][1]['$set']
+        self.assertEqual(update_query['datasets'], datasets)
+
+    def test_write_update_info_partial(self):
+        self.manager.write_update_info(['수원'], partial=True)
+        update_query = self.mock_collection.update_one.call_args[0][1]['$set']
+        self.assertTrue(update_query['partial'])
+
+    def test_read_dataset_hash(self):
+        self.mock_collection.find_one.return_value = {'datasets': [{'provider': '수원', 'link': 'Link1', 'hash': 'abc', 'row_count': 10}]}
+        result = self.manager.read_dataset_hash('Link1')
+        self.assertEqual(result, 'abc')
+        self.assertEqual(self.mock_collection.find_one.call_args[0][0], {'datasets.link': 'Link1'})
+
+    def test_read_dataset_hash_not_found(self):
+        self.mock_collection.find_one.return_value = None
+        self.assertIsNone(self.manager.read_dataset_hash('Link1'))
+
+    def test_read_dataset_states(self):
+        self.mock_collection.find.return_value = [{'link': 'Link1', 'provider': '수원', 'portal_date': '2024-01-01', 'status': 'ingested'}]
+        result = self.manager.read_dataset_states(['Link1', 'Link2'])
+        self.assertEqual(list(result.keys()), ['Link1'])
+        self.assertEqual(self.mock_collection.find.call_args[0][0], {'link': {'$in': ['Link1', 'Link2']}})
+
+    def test_write_dataset_state(self):
+        self.manager.write_dataset_state('Link1', '수원', '2024-01-01', 'failed')
+        self.manager.write_dataset_state('Link1', '수원', '2024-01-01', 'ingested')
+        failed_query = self.mock_collection.update_one.call_args_list[0][0][1]['$set']
+        ingested_query = self.mock_collection.update_one.call_args_list[1][0][1]['$set']
+        self.assertNotIn('last_ingested_date', failed_query)
+        self.assertIn('last_ingested_date', ingested_query)
+
+    def test_read_oldest_failed_dataset_date(self):
+        self.mock_collection.find_one.return_value = {'portal_date': '2024-01-01'}
+        self.assertEqual(self.manager.read_oldest_failed_dataset_date(), '2024-01-01')
+        self.mock_collection.find_one.return_value = None
+        self.assertIsNone(self.manager.read_oldest_failed_dataset_date())
+
     def test_write_clothbox_data(self):
         self.mock_collection.update_one.return_value = type('obj', (object,), {'acknowledged': True})
         result = self.manager.write_clothbox_data("Suwon", "수원", [37.5665, 126.9780])
         self.assertTrue(result)
 
+    def test_write_clothbox_data_many(self):
+        self.mock_collection.bulk_write.return_value.bulk_api_result = {'nUpserted': 2, 'nModified': 0, 'writeErrors': []}
+        records = ({'address': f'Suwon {i}', 'providing_name': '수원', 'coordinates': [126.9780, 37.5665]} for i in range(5))
+        result = self.manager.write_clothbox_data_many(records, batch_size=2)
+        self.assertEqual(self.mock_collection.bulk_write.call_count, 3)
+        self.assertEqual(len(self.mock_collection.bulk_write.call_args_list[0][0][0]), 2)
+        self.assertEqual(self.mock_collection.bulk_write.call_args[1], {'ordered': False})
+        self.assertEqual(result[0], {'upserted': 2, 'modified': 0, 'failed': 0})
+
+    def test_write_clothbox_data_many_errors(self):
+        self.mock_collection.bulk_write.side_effect = BulkWriteError({'nUpserted': 1, 'nModified': 0, 'writeErrors': [{'index': 1}]})
+        records = [{'address': f'Suwon {i}', 'providing_name': '수원', 'coordinates': [126.9780, 37.5665]} for i in range(2)]
+        result = self.manager.write_clothbox_data_many(records)
+        self.assertEqual(result, [{'upserted': 1, 'modified': 0, 'failed': 1}])
+
     def test_get_clothbox_data(self):
         self.mock_collection.find.return_value = [{'address': 'Suwon'}]
         result = self.manager.get_clothbox_data("수원")
         self.assertEqual(result, ['Suwon'])
 
+    def test_write_clothbox_data_many_sources(self):
+        self.mock_collection.bulk_write.return_value.bulk_api_result = {'nUpserted': 1, 'nModified': 0, 'writeErrors': []}
+        records = [{'address': 'Suwon', 'providing_name': '수원', 'coordinates': [126.9780, 37.5665], 'source_address': 'suwon', 'source_link': 'Link1'}]
+        self.manager.write_clothbox_data_many(records)
+        operation = self.mock_collection.bulk_write.call_args[0][0][0]
+        self.assertEqual(operation._filter, {'address': 'Suwon'})
+        self.assertEqual(operation._doc['$addToSet'], {'sources': {'providing_name': '수원', 'source_link': 'Link1', 'source_address': 'suwon'}})
+        # 같은 주소로 변환된 다른 제공기관의 행이 수거함의 제공기관을 바꾸지 않음
+        self.assertEqual(operation._doc['$setOnInsert'], {'providing_name': '수원'})
+        self.assertNotIn('providing_name', operation._doc['$set'])
+
+    def test_get_clothbox_sources(self):
+        self.mock_collection.find.return_value = [
+            {'sources': [{'providing_name': '수원', 'source_link': 'Link1', 'source_address': 'suwon'},
+                         {'providing_name': '경기도', 'source_link': 'Link2', 'source_address': '수원'}]},
+        ]
+        result = self.manager.get_clothbox_sources("수원", "Link1")
+        self.assertEqual(result, ['suwon'])
+        self.assertEqual(self.mock_collection.find.call_args[0][0], {'sources': {'$elemMatch': {'providing_name': '수원', 'source_link': 'Link1'}}})
+
+    def test_get_clothbox_points(self):
+        self.mock_collection.find.return_value = [{'address': '수원', 'providing_name': '수원시', 'location': {'coordinates': [127.0, 37.2]}}]
+        result = list(self.manager.get_clothbox_points(['수원시']))
+        self.assertEqual(result, [{'address': '수원', 'providing_name': '수원시', 'coordinates': [127.0, 37.2]}])
+        self.assertEqual(self.mock_collection.find.call_args[0][0], {'providing_name': {'$in': ['수원시']}})
+        list(self.manager.get_clothbox_points())
+        self.assertEqual(self.mock_collection.find.call_args[0][0], {})
+
+    def test_get_clothbox_locations(self):
+        self.mock_collection.find.return_value = [
+            {'address': '수원', 'location': {'coordinates': [127.0, 37.2]}, 'sources': [{'source_address': 'suwon'}, {'source_address': '수원'}]},
+        ]
+        result = list(self.manager.get_clothbox_locations())
+        self.assertEqual(result, [
+            {'source_address': 'suwon', 'address': '수원', 'coordinates': [127.0, 37.2]},
+            {'source_address': '수원', 'address': '수원', 'coordinates': [127.0, 37.2]},
+        ])
+
+    def test_delete_clothbox_sources(self):
+        self.mock_collection.find.return_value = [{'address': 'A'}, {'address': 'B'}]
+        self.mock_collection.delete_many.return_value.deleted_count = 1
+        result = self.manager.delete_clothbox_sources("수원", "Link1", {'a', 'b'})
+        self.assertEqual(result, 1)
+        condition = self.mock_collection.update_many.call_args_list[0][0][1]['$pull']['sources']
+        self.assertEqual(sorted(condition['source_address']['$in']), ['a', 'b'])
+        self.assertEqual(self.mock_collection.delete_many.call_args[0][0], {'address': {'$in': ['A', 'B']}, 'sources': {'$size': 0}})
+        # 다른 제공기관의 출처만 남은 수거함은 한 번의 업데이트로 그 제공기관에 넘김
+        self.assertEqual(self.mock_collection.update_many.call_args_list[1][0], (
+            {'address': {'$in': ['A', 'B']}, 'providing_name': '수원', 'sources.providing_name': {'$ne': '수원'}},
+            [{'$set': {'providing_name': {'$arrayElemAt': ['$sources.providing_name', 0]}}}]
+        ))
+        self.mock_collection.update_one.assert_not_called()
+
+    def test_delete_clothbox_sources_none(self):
+        self.mock_collection.find.return_value = []
+        self.assertEqual(self.manager.delete_clothbox_sources("수원", "Link1", ['a']), 0)
+        self.mock_collection.update_many.assert_not_called()
+
     def test_delete_clothbox_data(self):
         self.mock_collection.delete_one.return_value = type('obj', (object,), {'acknowledged': True})
         result = self.manager.delete_clothbox_data("Suwon")
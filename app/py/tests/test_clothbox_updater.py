@@ -0,0 +1,373 @@
+import unittest
+from unittest.mock import ANY, MagicMock, patch
+import json
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import tempfile
+import shutil
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.clothbox_updater import ClothBoxUpdater
+from autoupdater.run_journal import RunJournal
+from autoupdater.util.conf import config
+
+class TestClothBoxUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.mock_db = MagicMock()
+        self.journal = RunJournal(os.path.join(self.temp_dir.name, 'journal.json'), os.path.join(self.temp_dir.name, 'downloads'))
+        self.updater = ClothBoxUpdater(self.mock_db, MagicMock(), geocoder=MagicMock(), journal=self.journal)
+        self.report_path = os.path.join(self.temp_dir.name, 'run_report.json')
+        self.prometheus_path = os.path.join(self.temp_dir.name, 'clothbox_updater.prom')
+        self.metrics_patcher = patch.dict(config['METRICS'], {'REPORT_PATH': self.report_path, 'PROMETHEUS_PATH': self.prometheus_path})
+        self.metrics_patcher.start()
+        self.tiles_dir = os.path.join(self.temp_dir.name, 'tiles')
+        self.tiles_patcher = patch.dict(config['TILE_EXPORT'], {'DIR': self.tiles_dir})
+        self.tiles_patcher.start()
+
+    def tearDown(self):
+        self.tiles_patcher.stop()
+        self.metrics_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def _write_file(self, name, content, directory=None):
+        file_path = os.path.join(directory or self.temp_dir.name, name)
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return file_path
+
+    def _coordinates(self, address):
+        # 주소마다 수십 m 이상 떨어진 좌표를 주어 공간 중복 제거에서 합쳐지지 않게 함
+        index = int(hashlib.md5(address.encode('utf-8')).hexdigest()[:8], 16)
+        return {'lat': 37.5 + index % 1000 * 0.001, 'lon': 127.1 + index // 1000 % 1000 * 0.001}
+
+    def _setup_update(self, csv, providers=('A',), write=None):
+        # {n}은 데이터셋 링크의 마지막 글자로 바뀜
+        self.updater.data_downloader = MagicMock()
+        self.updater.data_downloader.download.side_effect = lambda url, directory: self._write_file('data.csv', csv.format(n=url[-1]), directory)
+        self.updater.geocoder.geocode_many.side_effect = lambda addresses: (
+            (address, '서울 ' + address, self._coordinates(address)) for address in addresses)
+        self.updater.geocoder.cache = None
+        self.mock_db.read_last_update_date.return_value = None
+        self.mock_db.read_dataset_hash.return_value = None
+        self.mock_db.get_clothbox_sources.return_value = []
+        self.mock_db.read_dataset_states.return_value = {}
+        self.mock_db.write_clothbox_data_many.side_effect = write or (
+            lambda records, batch_size: [{'upserted': len(records), 'modified': 0, 'failed': 0}])
+        self.updater.data_portal_searcher.search_data_many.return_value = [
+            {'title': f'Data {i}', 'link': f'Link{i}', 'provider': provider, 'date': '2024-06-02'} for i, provider in enumerate(providers, 1)
+        ]
+
+    def test_read_res_file(self):
+        self._write_file('a.csv', "주소\n송파동 18-3\n")
+        self._write_file('b.csv', "위치\n송파동 22-6\n송파동 21-11\n")
+        self._write_file('c.csv', "NotAddress\n123 Main St\n")
+        with ProcessPoolExecutor(max_workers=2) as process_executor:
+            for executor in [None, process_executor]:
+                with self.subTest(executor=executor):
+                    results = self.updater._read_res_file(self.temp_dir.name, executor)
+                    self.assertEqual([result['addresses'] for result in results], [['송파동 18-3'], ['송파동 22-6', '송파동 21-11'], None])
+                    self.assertIsNotNone(results[2]['error'])
+                    self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['a.csv', 'b.csv', 'c.csv'])
+
+    def test_download_stage(self):
+        self.updater.data_downloader = MagicMock()
+        self.updater.data_downloader.download.side_effect = lambda url, directory: self._write_file('data.csv', "주소\n송파동 18-3\n", directory)
+        self.mock_db.read_dataset_hash.return_value = None
+        search_data = {'title': 'Title1', 'link': 'Link1', 'provider': '송파구', 'date': '2024-06-02'}
+        downloads = list(self.updater._download_stage([search_data]))
+        self.assertEqual(len(downloads), 1)
+        self.assertEqual(os.listdir(downloads[0]['directory']), ['data.csv'])
+
+        self.mock_db.read_dataset_hash.return_value = downloads[0]['hash']
+        self.assertEqual(self.journal.get('Link1')['stage'], 'downloaded')
+        shutil.rmtree(downloads[0]['directory'])
+        self.assertEqual(list(self.updater._download_stage([search_data])), [])
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', '송파구', '2024-06-02', 'unchanged')
+        self.assertEqual(self.journal.get('Link1')['stage'], 'unchanged')
+
+    def test_download_stage_reuse(self):
+        directory = self.journal.make_download_directory()
+        self._write_file('data.csv', "주소\n송파동 18-3\n", directory)
+        self.journal.update('Link1', stage='downloaded', directory=directory, hash='hash1')
+        self.updater.data_downloader = MagicMock()
+        downloads = list(self.updater._download_stage([{'title': 'Title1', 'link': 'Link1'}]))
+        self.assertEqual(downloads[0]['directory'], directory)
+        self.assertEqual(downloads[0]['hash'], 'hash1')
+        self.updater.data_downloader.download.assert_not_called()
+
+    def test_parse_stage(self):
+        directory = tempfile.mkdtemp(dir=self.temp_dir.name)
+        self._write_file('data.csv', "주소\n송파동 18-3\n송파동 22-6\n", directory)
+        self.mock_db.get_clothbox_sources.return_value = ['송파동 22-6']
+        search_data = {'title': 'Title1', 'link': 'Link1', 'provider': '송파구', 'date': '2024-06-02'}
+        rows = list(self.updater._parse_stage([{'search_data': search_data, 'directory': directory, 'hash': 'hash1'}]))
+        self.assertEqual(rows, [{'search_data': search_data, 'source_address': '송파동 18-3'}])
+        self.assertEqual(self.journal.get('Link1'), {'stage': 'parsed', 'row_count': 2})
+        self.assertEqual(self.updater._pending_rows['Link1'], 1)
+
+    def test_start_update(self):
+        self.updater.download_workers = 2
+        self.updater.parse_workers = 1
+        self.updater.write_batch_size = 2
+        self._setup_update("주소\n{n}동 0\n{n}동 1\n{n}동 2\n", providers=('A', 'B'))
+        self.updater.start_update()
+
+        records = [record for call in self.mock_db.write_clothbox_data_many.call_args_list for record in call[0][0]]
+        self.assertEqual(sorted(record['source_address'] for record in records), ['1동 0', '1동 1', '1동 2', '2동 0', '2동 1', '2동 2'])
+        self.assertTrue(all(len(call[0][0]) <= 2 for call in self.mock_db.write_clothbox_data_many.call_args_list))
+        update_info, datasets = self.mock_db.write_update_info.call_args[0]
+        self.assertFalse(self.mock_db.write_update_info.call_args[1]['partial'])
+        self.assertEqual(sorted(update_info), ['A', 'B'])
+        self.assertEqual(sorted(dataset['row_count'] for dataset in datasets), [3, 3])
+        self.assertEqual(sorted(call[0][3] for call in self.mock_db.write_dataset_state.call_args_list), ['ingested', 'ingested'])
+        self.assertFalse(os.path.exists(self.journal.path))
+        self.assertFalse(os.path.exists(self.journal.download_dir))
+        with open(os.path.join(self.tiles_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        update_date = self.mock_db.write_update_info.call_args[1]['update_date']
+        self.assertEqual(manifest['update_date'], update_date.isoformat(timespec='seconds'))
+
+        with open(self.report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['status'], 'finished')
+        self.assertEqual(report['datasets'], {'ingested': 2})
+        written = {counter['labels']['provider']: counter['value'] for counter in report['counters'] if counter['name'] == 'written_rows_total'}
+        self.assertEqual(written, {'A': 3, 'B': 3})
+        with open(self.prometheus_path, encoding='utf-8') as f:
+            self.assertIn('clothbox_parsed_rows_total{provider="A"} 3', f.read())
+
+    def test_start_update_providers(self):
+        self._setup_update("주소\n1동 0\n", providers=('A', 'B'))
+        self.updater.start_update(providers=['B'])
+
+        self.mock_db.write_update_info.assert_called_once()
+        update_info, datasets = self.mock_db.write_update_info.call_args[0]
+        self.assertEqual(update_info, ['B'])
+        self.assertEqual([dataset['link'] for dataset in datasets], ['Link2'])
+        self.assertTrue(self.mock_db.write_update_info.call_args[1]['partial'])
+
+    def test_start_update_refresh(self):
+        calls = []
+        self._setup_update("주소\n1동 0\n", write=lambda records, batch_size: calls.append('write') or [{'upserted': len(records), 'modified': 0, 'failed': 0}])
+        self.mock_db.begin_refresh.side_effect = lambda reuse: calls.append(('begin', reuse))
+        self.mock_db.commit_refresh.side_effect = lambda: calls.append('commit')
+        self.mock_db.write_update_info.side_effect = lambda *args, **kwargs: calls.append('update_info')
+        self.mock_db.write_dataset_state.side_effect = lambda *args: calls.append(('state', args[3]))
+        self.updater.start_update(refresh=True)
+        # 행이 스테이징 컬렉션에만 있는 동안에는 ingested를 기록하지 않음
+        self.assertEqual(calls, [('begin', False), 'write', 'commit', ('state', 'ingested'), 'update_info'])
+
+    def test_start_update_refresh_failed(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n1동 0\n")
+        self.mock_db.commit_refresh.side_effect = Exception("Failed to build the indexes")
+        with self.assertRaises(Exception):
+            self.updater.start_update(refresh=True)
+        self.mock_db.abort_refresh.assert_called_once()
+        self.mock_db.write_dataset_state.assert_not_called()
+        self.mock_db.write_update_info.assert_not_called()
+
+    def test_start_update_resume_refresh_without_staging(self):
+        self.updater.parse_workers = 1
+        search_data_list = [{'title': 'Data 1', 'link': 'Link1', 'provider': 'A', 'date': '2024-06-02'}]
+        self.journal.start(search_data_list, refresh=True)
+        self.journal.update('Link1', stage='ingested', hash='hash1', row_count=1)
+        self._setup_update("주소\n1동 0\n")
+        self.mock_db.begin_refresh.return_value = False
+
+        self.updater.start_update(resume=True)
+        # 스테이징 컬렉션이 사라졌으므로 저널에서 끝난 데이터셋도 다시 받아 씀
+        self.mock_db.begin_refresh.assert_called_once_with(reuse=True)
+        self.updater.data_downloader.download.assert_called_once()
+        self.mock_db.write_clothbox_data_many.assert_called_once()
+        self.mock_db.commit_refresh.assert_called_once()
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'A', '2024-06-02', 'ingested')
+
+    def test_start_update_spatial_dedup(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n송파동 18-3\n백제고분로 300\n송파동 22-6\n")
+        points = {'송파동 18-3': {'lat': 37.50666, 'lon': 127.10801}, '백제고분로 300': {'lat': 37.50667, 'lon': 127.10803},
+                  '송파동 22-6': {'lat': 37.51019, 'lon': 127.10945}}
+        self.updater.geocoder.geocode_many.side_effect = lambda addresses: (
+            (address, '서울 ' + address, points[address]) for address in addresses)
+        self.mock_db.get_clothbox_points.return_value = []
+        self.updater.start_update()
+
+        # 합쳐진 행은 남은 수거함의 주소와 좌표로, 자기 원본 주소를 출처로 하여 씀
+        records = [record for call in self.mock_db.write_clothbox_data_many.call_args_list for record in call[0][0]]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(len({record['address'] for record in records}), 2)
+        merged = [record for record in records if 'source_providing_name' in record]
+        self.assertEqual(len(merged), 1)
+        kept = next(record for record in records if record['address'] == merged[0]['address'] and record is not merged[0])
+        self.assertEqual(merged[0]['coordinates'], kept['coordinates'])
+        self.assertNotEqual(merged[0]['source_address'], kept['source_address'])
+        self.assertIn('boxes', self.mock_db.get_clothbox_points.call_args_list[0][1])
+        self.assertEqual([call[0][3] for call in self.mock_db.write_dataset_state.call_args_list], ['ingested'])
+        with open(self.report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['spatial_dedup']['merged'], 1)
+        self.assertEqual(report['spatial_dedup']['clusters'], 1)
+
+    def test_start_update_spatial_dedup_existing(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n백제고분로 300\n", providers=('B',))
+        self.updater.geocoder.geocode_many.side_effect = lambda addresses: (
+            (address, '서울 ' + address, {'lat': 37.50667, 'lon': 127.10803}) for address in addresses)
+        self.mock_db.get_clothbox_points.return_value = [
+            {'address': '서울 송파동 18-3', 'providing_name': 'A', 'coordinates': [127.10801, 37.50666]}]
+        self.updater.start_update()
+
+        # DB에 이미 있는 A의 수거함이 남고, B의 행은 그 수거함의 출처로 쓰임
+        self.assertEqual(self.mock_db.write_clothbox_data_many.call_args[0][0], [{
+            'address': '서울 송파동 18-3', 'providing_name': 'A', 'coordinates': [127.10801, 37.50666],
+            'source_address': '백제고분로 300', 'source_link': 'Link1', 'source_providing_name': 'B'
+        }])
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'B', '2024-06-02', 'ingested')
+
+    def test_start_update_resume(self):
+        self.updater.parse_workers = 1
+        search_data_list = [
+            {'title': 'Data 1', 'link': 'Link1', 'provider': 'A', 'date': '2024-06-02'},
+            {'title': 'Data 2', 'link': 'Link2', 'provider': 'B', 'date': '2024-06-02'},
+        ]
+        self.journal.start(search_data_list)
+        self.journal.update('Link1', stage='ingested', hash='hash1', row_count=3)
+        directory = self.journal.make_download_directory()
+        self._write_file('data.csv', "주소\n2동 0\n2동 1\n2동 2\n", directory)
+        self.journal.update('Link2', stage='parsed', directory=directory, hash='hash2', row_count=3, written=2)
+        self._setup_update("주소\n")
+        self.mock_db.get_clothbox_sources.return_value = ['2동 0', '2동 1']
+
+        self.updater.start_update(resume=True)
+        self.updater.data_portal_searcher.search_data_many.assert_not_called()
+        self.updater.data_downloader.download.assert_not_called()
+        self.assertEqual([record['source_address'] for record in self.mock_db.write_clothbox_data_many.call_args[0][0]], ['2동 2'])
+        self.mock_db.write_dataset_state.assert_called_once_with('Link2', 'B', '2024-06-02', 'ingested')
+        self.mock_db.write_update_info.assert_called_once_with(['A', 'B'], [
+            {'provider': 'A', 'link': 'Link1', 'hash': 'hash1', 'row_count': 3},
+            {'provider': 'B', 'link': 'Link2', 'hash': 'hash2', 'row_count': 3},
+        ], partial=False, update_date=ANY)
+
+    def test_start_update_resume_failed(self):
+        self.updater.parse_workers = 1
+        search_data_list = [{'title': 'Data 1', 'link': 'Link1', 'provider': 'A', 'date': '2024-06-02'}]
+        self.journal.start(search_data_list)
+        self.journal.update('Link1', stage='failed', directory=os.path.join(self.journal.download_dir, 'removed'), hash='hash1')
+        self._setup_update("주소\n1동 0\n")
+
+        self.updater.start_update(resume=True)
+        self.updater.data_downloader.download.assert_called_once()
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'A', '2024-06-02', 'ingested')
+
+    def test_start_update_write_failed(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n송파동 18-3\n", write=Exception("write error"))
+        self.updater.start_update()
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'A', '2024-06-02', 'failed')
+        self.mock_db.write_update_info.assert_called_once_with([], [], partial=False, update_date=ANY)
+
+    def test_start_update_write_partly_failed(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n송파동 18-3\n송파동 22-6\n",
+                           write=lambda records, batch_size: [{'upserted': len(records) - 1, 'modified': 0, 'failed': 1}])
+        self.updater.start_update()
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'A', '2024-06-02', 'failed')
+        self.mock_db.write_update_info.assert_called_once_with([], [], partial=False, update_date=ANY)
+
+    def test_start_update_crashed(self):
+        self.updater.download_workers = 1
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n{n}동 0\n", providers=('A', 'B'))
+        def geocode_many(addresses):
+            for address in addresses:
+                if address.startswith('2'):
+                    raise RuntimeError("geocoder crashed")
+                yield address, address, self._coordinates(address)
+        self.updater.geocoder.geocode_many.side_effect = geocode_many
+        with self.assertRaises(RuntimeError):
+            self.updater.start_update()
+        # 끝난 데이터셋의 해시는 남기지만 마지막 업데이트 날짜는 옮기지 않음
+        update_info, datasets = self.mock_db.write_update_info.call_args[0]
+        self.assertEqual(update_info, ['A'])
+        self.assertEqual([dataset['link'] for dataset in datasets], ['Link1'])
+        self.assertTrue(self.mock_db.write_update_info.call_args[1]['partial'])
+        self.assertTrue(os.path.exists(self.journal.path))
+        with open(self.report_path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['status'], 'crashed')
+
+    def test_start_update_geocode_failed(self):
+        self.updater.parse_workers = 1
+        self._setup_update("주소\n송파동 18-3\n없는동 1\n")
+        self.updater.geocoder.geocode_many.side_effect = lambda addresses: (
+            (address, None, None) if address.startswith('없는') else (address, address, self._coordinates(address)) for address in addresses)
+        self.updater.start_update()
+        # 지오코딩에 실패한 행이 있으면 해시를 남기지 않아 다음 실행에서 다시 시도함
+        self.mock_db.write_dataset_state.assert_called_once_with('Link1', 'A', '2024-06-02', 'partial')
+        self.mock_db.write_update_info.assert_called_once_with([], [], partial=False, update_date=ANY)
+        self.assertTrue(self.updater._is_dataset_changed({'title': 'Data 1', 'date': '2024-06-02'}, {'status': 'partial', 'portal_date': '2024-06-02'}))
+
+    def test_search_data(self):
+        self.mock_db.read_last_update_date.return_value = datetime(2024, 6, 1)
+        self.mock_db.read_oldest_failed_dataset_date.return_value = '2024-01-01'
+        self.updater.data_portal_searcher.search_data_many.return_value = [
+            {'title': 'Data 1', 'link': 'Link1', 'date': '2024-06-02'},
+            {'title': 'Data 2', 'link': 'Link2', 'date': '2024-06-02'},
+            {'title': 'Data 3', 'link': 'Link3', 'date': '2024-01-01'},
+            {'title': 'Data 4', 'link': 'Link4', 'date': '2024-06-02'},
+        ]
+        self.mock_db.read_dataset_states.return_value = {
+            'Link1': {'link': 'Link1', 'portal_date': '2024-06-01', 'status': 'ingested'},
+            'Link2': {'link': 'Link2', 'portal_date': '2024-06-02', 'status': 'ingested'},
+            'Link3': {'link': 'Link3', 'portal_date': '2024-01-01', 'status': 'failed'},
+        }
+        result = self.updater._search_data()
+        self.assertEqual([item['link'] for item in result], ['Link1', 'Link3', 'Link4'])
+        self.assertEqual(self.updater.data_portal_searcher.search_data_many.call_args[0][1], '2024-01-01')
+        self.mock_db.read_dataset_states.assert_called_once_with(['Link1', 'Link2', 'Link3', 'Link4'])
+
+    def test_sync_clothbox_sources(self):
+        self.mock_db.get_clothbox_sources.return_value = ['송파동 18-3', '송파동 1-1']
+        result = self.updater._sync_clothbox_sources('송파구', 'Link1', ['송파동 18-3', '송파동 22-6 (앞)', '송파동  22-6번지'])
+        self.assertEqual(result, ['송파동 22-6'])
+        self.mock_db.delete_clothbox_sources.assert_called_once_with('송파구', 'Link1', ['송파동 1-1'])
+        self.assertEqual(self.updater._folded_rows, 1)
+
+    def test_sync_clothbox_sources_without_delete(self):
+        self.mock_db.get_clothbox_sources.return_value = ['송파동 18-3', '송파동 1-1']
+        result = self.updater._sync_clothbox_sources('송파구', 'Link1', ['송파동 18-3', '송파동 22-6'], delete=False)
+        self.assertEqual(result, ['송파동 22-6'])
+        self.mock_db.delete_clothbox_sources.assert_not_called()
+
+    def test_sync_clothbox_sources_across_providers(self):
+        self.mock_db.get_clothbox_sources.return_value = []
+        self.updater._sync_clothbox_sources('송파구', 'Link1', ['송파동 18-3', '송파동 22-6'])
+        result = self.updater._sync_clothbox_sources('서울시', 'Link2', ['송파동 18-3 앞', '송파동 21-11'])
+        self.assertEqual(result, ['송파동 18-3', '송파동 21-11'])
+        self.mock_db.delete_clothbox_sources.assert_not_called()
+
+    def test_geocode_stage_shared_across_datasets(self):
+        data_a = {'title': 'Data 1', 'link': 'Link1', 'provider': 'A'}
+        data_b = {'title': 'Data 2', 'link': 'Link2', 'provider': 'B'}
+        submitted = []
+        def geocode_many(addresses):
+            # 모든 주소를 받은 뒤에 답해서 두 데이터셋의 같은 주소가 동시에 지오코딩 중인 상황을 만듦
+            submitted.extend(addresses)
+            return ((address, '서울 ' + address, self._coordinates(address)) for address in submitted)
+        self.updater.geocoder.geocode_many.side_effect = geocode_many
+        records = list(self.updater._geocode_stage(iter([
+            {'search_data': data_a, 'source_address': '송파동 18-3'},
+            {'search_data': data_b, 'source_address': '송파동 18-3'},
+            {'search_data': data_b, 'source_address': '송파동 21-11'},
+        ])))
+        self.assertEqual(submitted, ['송파동 18-3', '송파동 21-11'])
+        self.assertEqual([(record['providing_name'], record['source_address']) for record in records],
+                         [('A', '송파동 18-3'), ('B', '송파동 18-3'), ('B', '송파동 21-11')])
+        self.assertEqual(self.updater._shared_rows, 1)
+
+if __name__ == '__main__':
+    unittest.main()
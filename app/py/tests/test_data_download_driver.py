@@ -4,6 +4,7 @@ from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 import os
+import shutil
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 from autoupdater.data_download_driver import DataDownloadDriver
@@ -27,6 +28,7 @@ class TestDataDownloadDriver(unittest.TestCase):
     def tearDown(self):
         self.driver.__del__()
         self.patcher.stop()
+        shutil.rmtree(self.driver.download_path, ignore_errors=True)
 
     def test_init(self):
         self.mock_webdriver.assert_called_once()
@@ -39,13 +41,31 @@ class TestDataDownloadDriver(unittest.TestCase):
         self.driver.open_url(test_url)
         self.driver.driver.get.assert_called_with(test_url)
 
+    @patch.object(DataDownloadDriver, '_wait_for_download')
     @patch('autoupdater.data_download_driver.WebDriverWait.until')
-    def test_download_data(self, mock_wait):
+    def test_download_data(self, mock_wait, mock_wait_for_download):
         mock_wait.click.return_value = True
+        mock_wait_for_download.return_value = os.path.join(self.driver.download_path, 'data.csv')
 
         test_xpath = "//button[@id='download']"
-        self.driver.download_data(test_xpath)
+        result = self.driver.download_data(test_xpath)
         WebDriverWait(self.driver.driver, 10).until.assert_called()
+        self.assertEqual(result, os.path.join(self.driver.download_path, 'data.csv'))
+
+    def test_wait_for_download(self):
+        with open(os.path.join(self.driver.download_path, 'old.csv'), 'w') as file:
+            file.write('old')
+        existing_files = set(os.listdir(self.driver.download_path))
+        with open(os.path.join(self.driver.download_path, 'new.csv'), 'w') as file:
+            file.write('new')
+        result = self.driver._wait_for_download(existing_files, 5)
+        self.assertEqual(result, os.path.join(self.driver.download_path, 'new.csv'))
+
+    def test_wait_for_download_partial(self):
+        with open(os.path.join(self.driver.download_path, 'new.csv.crdownload'), 'w') as file:
+            file.write('new')
+        with self.assertRaises(TimeoutError):
+            self.driver._wait_for_download(set(), 0.5)
 
     def test_enable_background_download(self):
         self.driver.driver.execute.assert_called_once_with('send_command', ANY)
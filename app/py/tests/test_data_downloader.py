@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.data_downloader import DataDownloader, HttpDownloadStrategy, IDownloadStrategy
+
+class TestHttpDownloadStrategy(unittest.TestCase):
+
+    TEST_HTML_PAGE = """
+        <a href="javascript:;" onclick="fn_fileDataDown('15127178', 'uddi:1234-abcd', 'CSV')">다운로드</a>
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.strategy = HttpDownloadStrategy()
+        self.strategy._session = MagicMock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_download(self):
+        page = MagicMock(text=self.TEST_HTML_PAGE)
+        self.strategy._session.get.return_value = page
+        self.strategy._session.post.return_value.json.return_value = {'atchFileId': 'FILE_1', 'fileDetailSn': '1'}
+        file_response = self.strategy._session.get.return_value.__enter__.return_value
+        file_response.headers = {'Content-Disposition': 'attachment; filename="%EC%88%98%EA%B1%B0%ED%95%A8.csv"'}
+        file_response.iter_content.return_value = [b'a,b\n', b'1,2\n']
+
+        file_path = self.strategy.download('http://example.com/data/15127178/fileData.do', self.temp_dir.name)
+        self.assertEqual(file_path, os.path.join(self.temp_dir.name, '수거함.csv'))
+        with open(file_path, 'rb') as file:
+            self.assertEqual(file.read(), b'a,b\n1,2\n')
+        self.assertEqual(self.strategy._session.post.call_args[1]['data']['publicDataDetailPk'], 'uddi:1234-abcd')
+        self.assertEqual(self.strategy._session.get.call_args[1]['params'], {'atchFileId': 'FILE_1', 'fileDetailSn': '1'})
+
+    def test_download_no_arguments(self):
+        self.strategy._session.get.return_value = MagicMock(text='<html></html>')
+        with self.assertRaises(ValueError):
+            self.strategy.download('http://example.com', self.temp_dir.name)
+
+class TestDataDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.downloader = DataDownloader()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_download_fallback(self):
+        first = MagicMock(spec=IDownloadStrategy)
+        first.download.side_effect = ValueError('failed')
+        second = MagicMock(spec=IDownloadStrategy)
+        second.download.return_value = 'res/data.csv'
+        self.downloader.set_strategies([first, second])
+
+        result = self.downloader.download('http://example.com', self.temp_dir.name)
+        self.assertEqual(result, 'res/data.csv')
+        first.download.assert_called_once_with('http://example.com', self.temp_dir.name)
+
+    def test_download_all_failed(self):
+        strategy = MagicMock(spec=IDownloadStrategy)
+        strategy.download.side_effect = ValueError('failed')
+        self.downloader.set_strategies([strategy])
+
+        with self.assertRaises(Exception):
+            self.downloader.download('http://example.com', self.temp_dir.name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -141,5 +141,41 @@ class TestDataPortalSearcher(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]['title'], 'Data 2')
 
+    @patch.object(DataPortalSearcher, '_get_info_list')
+    def test_search_data_multi_page(self, mock_get_info_list):
+        per_page = DataPortalSearcher.search_params['perPage']
+        pages = {
+            1: [{'title': 'Data 1', 'provider': 'Provider 1', 'date': '2024-01-01', 'link': 'Link1'}] * per_page,
+            2: [{'title': 'Data 2', 'provider': 'Provider 2', 'date': '2023-01-01', 'link': 'Link2'}] * per_page,
+            3: [{'title': 'Data 3', 'provider': 'Provider 3', 'date': '2022-01-01', 'link': 'Link3'}],
+        }
+        mock_get_info_list.side_effect = lambda url: pages.get(int(url.split('currentPage=')[1].split('&')[0]), [])
+
+        result = self.searcher.search_data('keyword')
+        self.assertEqual(len(result), per_page * 2 + 1)
+        self.assertEqual(result[-1]['title'], 'Data 3')
+        self.assertEqual(DataPortalSearcher.search_params['keyword'], '')
+        self.assertEqual(DataPortalSearcher.search_params['currentPage'], '')
+
+    @patch.object(DataPortalSearcher, '_get_info_list')
+    def test_search_data_stop_by_date(self, mock_get_info_list):
+        per_page = DataPortalSearcher.search_params['perPage']
+        mock_get_info_list.return_value = [{'title': 'Data 1', 'provider': 'Provider 1', 'date': '2020-01-01', 'link': 'Link1'}] * per_page
+
+        result = self.searcher.search_data('keyword', '2021-01-01')
+        self.assertEqual(len(result), 0)
+        self.assertEqual(mock_get_info_list.call_count, 1)
+
+    @patch.object(DataPortalSearcher, 'search_data')
+    def test_search_data_many(self, mock_search_data):
+        results = {
+            'keyword1': [{'title': 'Data 1', 'link': 'Link1'}, {'title': 'Data 2', 'link': 'Link2'}],
+            'keyword2': [{'title': 'Data 2', 'link': 'Link2'}, {'title': 'Data 3', 'link': 'Link3'}],
+        }
+        mock_search_data.side_effect = lambda keyword, date: results[keyword]
+
+        result = self.searcher.search_data_many(['keyword1', 'keyword2'], '2021-01-01')
+        self.assertEqual([item['link'] for item in result], ['Link1', 'Link2', 'Link3'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.driver_pool import DriverPool
+
+class TestDriverPool(unittest.TestCase):
+
+    def setUp(self):
+        self.drivers = []
+        def driver_factory():
+            driver = MagicMock()
+            driver.is_alive.return_value = True
+            self.drivers.append(driver)
+            return driver
+        self.driver_factory = driver_factory
+
+    def test_prewarm(self):
+        pool = DriverPool(size=2, max_uses=10, prewarm=2, driver_factory=self.driver_factory)
+        self.assertEqual(len(self.drivers), 2)
+        pool.close()
+        for driver in self.drivers:
+            driver.quit.assert_called_once()
+
+    def test_reuse(self):
+        with DriverPool(size=2, max_uses=10, prewarm=0, driver_factory=self.driver_factory) as pool:
+            with pool.acquire() as first:
+                pass
+            with pool.acquire() as second:
+                pass
+            self.assertIs(first, second)
+            self.assertEqual(len(self.drivers), 1)
+
+    def test_recycle_after_max_uses(self):
+        with DriverPool(size=1, max_uses=2, prewarm=0, driver_factory=self.driver_factory) as pool:
+            for _ in range(3):
+                with pool.acquire():
+                    pass
+            self.assertEqual(len(self.drivers), 2)
+            self.drivers[0].quit.assert_called_once()
+
+    def test_recycle_on_crash(self):
+        with DriverPool(size=1, max_uses=10, prewarm=0, driver_factory=self.driver_factory) as pool:
+            with self.assertRaises(ValueError):
+                with pool.acquire() as driver:
+                    driver.is_alive.return_value = False
+                    raise ValueError('crashed')
+            driver.quit.assert_called_once()
+            with pool.acquire() as driver:
+                self.assertIs(driver, self.drivers[1])
+
+    def test_keep_healthy_on_error(self):
+        with DriverPool(size=1, max_uses=10, prewarm=0, driver_factory=self.driver_factory) as pool:
+            with self.assertRaises(TimeoutError):
+                with pool.acquire():
+                    raise TimeoutError('timeout')
+            with pool.acquire() as driver:
+                self.assertIs(driver, self.drivers[0])
+
+    def test_skip_unhealthy_idle(self):
+        pool = DriverPool(size=1, max_uses=10, prewarm=1, driver_factory=self.driver_factory)
+        self.drivers[0].is_alive.return_value = False
+        with pool.acquire() as driver:
+            self.assertIs(driver, self.drivers[1])
+        self.drivers[0].quit.assert_called_once()
+        pool.close()
+
+    def test_bounded(self):
+        pool = DriverPool(size=2, max_uses=10, prewarm=0, driver_factory=self.driver_factory)
+        in_use = []
+        max_in_use = []
+        lock = threading.Lock()
+        def work():
+            with pool.acquire():
+                with lock:
+                    in_use.append(1)
+                    max_in_use.append(len(in_use))
+                threading.Event().wait(0.01)
+                with lock:
+                    in_use.pop()
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(max_in_use), 2)
+        self.assertLessEqual(len(self.drivers), 2)
+        pool.close()
+
+    def test_closed(self):
+        pool = DriverPool(size=1, max_uses=10, prewarm=0, driver_factory=self.driver_factory)
+        pool.close()
+        with self.assertRaises(RuntimeError):
+            with pool.acquire():
+                pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.geocode_cache import GeocodeCache
+
+class TestGeocodeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = GeocodeCache(os.path.join(self.temp_dir.name, 'cache.sqlite3'), ttl=100, negative_ttl=10)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get('송파동 18-3'))
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'negative_hits': 0, 'misses': 1})
+
+    def test_put_and_get(self):
+        self.cache.put('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})
+        result = self.cache.get('송파동   18-3 (앞)')
+        self.assertEqual(result, ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_negative_cache(self):
+        self.cache.put('unknown', None, None)
+        self.assertEqual(self.cache.get('unknown'), (None, None))
+        self.assertEqual(self.cache.stats()['negative_hits'], 1)
+
+    @patch('autoupdater.geocode_cache.time.time')
+    def test_expired(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.put('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})
+        self.cache.put('unknown', None, None)
+        mock_time.return_value = 1050
+        self.assertIsNotNone(self.cache.get('송파동 18-3'))
+        self.assertIsNone(self.cache.get('unknown'))
+        mock_time.return_value = 1200
+        self.assertIsNone(self.cache.get('송파동 18-3'))
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_persistent(self):
+        self.cache.put('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})
+        self.cache.close()
+        self.cache = GeocodeCache(os.path.join(self.temp_dir.name, 'cache.sqlite3'))
+        self.assertIsNotNone(self.cache.get('송파동 18-3'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.geocoder import KakaoGeocoder, TokenBucket
+
+def make_response(status_code, documents=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {}
+    response.json.return_value = {'documents': documents if documents is not None else []}
+    return response
+
+DOCUMENT = {'address': {'address_name': '서울 송파구 송파동 18-3', 'x': '127.1', 'y': '37.5'}}
+
+class TestKakaoGeocoder(unittest.TestCase):
+
+    def setUp(self):
+        self.geocoder = KakaoGeocoder(api_key='KakaoAK test', qps=1000, workers=4, backoff=0)
+        self.patcher = patch.object(self.geocoder._session, 'get')
+        self.mock_get = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_geocode(self):
+        self.mock_get.return_value = make_response(200, [DOCUMENT])
+        result = self.geocoder.geocode('송파동 18-3 (아파트 앞)')
+        self.assertEqual(result, ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+        self.assertTrue(self.mock_get.call_args[0][0].endswith('송파동 18-3'))
+
+    def test_geocode_no_result(self):
+        self.mock_get.return_value = make_response(200, [])
+        with self.assertRaises(ValueError):
+            self.geocoder.geocode('unknown')
+
+    def test_geocode_retry(self):
+        self.mock_get.side_effect = [make_response(429), make_response(503), make_response(200, [DOCUMENT])]
+        result = self.geocoder.geocode('송파동 18-3')
+        self.assertEqual(result[0], '서울 송파구 송파동 18-3')
+        self.assertEqual(self.mock_get.call_count, 3)
+
+    def test_geocode_retry_exhausted(self):
+        self.mock_get.return_value = make_response(500)
+        with self.assertRaises(Exception):
+            self.geocoder.geocode('송파동 18-3')
+        self.assertEqual(self.mock_get.call_count, self.geocoder.max_retries + 1)
+
+    def test_geocode_cache(self):
+        cache = MagicMock()
+        cache.get.side_effect = [None, ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})]
+        self.geocoder.cache = cache
+        self.mock_get.return_value = make_response(200, [DOCUMENT])
+        self.geocoder.geocode('송파동 18-3')
+        self.geocoder.geocode('송파동 18-3')
+        self.assertEqual(self.mock_get.call_count, 1)
+        cache.put.assert_called_once_with('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})
+
+    def test_geocode_many(self):
+        self.mock_get.side_effect = lambda url, timeout: make_response(200, [] if url.endswith('unknown') else [DOCUMENT])
+        addresses = [f'송파동 {i}' for i in range(20)] + ['unknown']
+        results = list(self.geocoder.geocode_many(iter(addresses)))
+        self.assertEqual(sorted(result[0] for result in results), sorted(addresses))
+        failed = [result for result in results if result[1] is None]
+        self.assertEqual(failed, [('unknown', None, None)])
+
+class TestTokenBucket(unittest.TestCase):
+
+    @patch('autoupdater.geocoder.time.sleep')
+    @patch('autoupdater.geocoder.time.monotonic')
+    def test_acquire(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 0
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+        mock_sleep.side_effect = lambda seconds: setattr(mock_monotonic, 'return_value', mock_monotonic.return_value + seconds)
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.local_geocoder import AddressIndex, LocalGeocoder
+
+class TestAddressIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index = AddressIndex(os.path.join(self.temp_dir.name, 'address_index.sqlite3'), batch_size=2)
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_put_many(self):
+        count = self.index.put_many([
+            ('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}),
+            ('송파동 22-6', '서울 송파구 송파동 22-6', {'lat': 37.6, 'lon': 127.2}),
+            ('송파동 21-11', '서울 송파구 송파동 21-11', {'lat': 37.7, 'lon': 127.3}),
+        ])
+        self.assertEqual(count, 3)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.get('송파동  18-3번지 (아파트 앞)'), ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+        self.assertIsNone(self.index.get('unknown'))
+
+    def test_load_csv(self):
+        file_path = os.path.join(self.temp_dir.name, 'addresses.csv')
+        with open(file_path, 'w', encoding='cp949') as f:
+            f.write("주소,위도,경도\n송파동 18-3,37.5,127.1\n송파동 22-6,,\n,37.6,127.2\n")
+        count = self.index.load_csv(file_path, encoding='cp949')
+        self.assertEqual(count, 1)
+        self.assertEqual(self.index.get('송파동 18-3'), ('송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+
+    def test_load_csv_name_column(self):
+        file_path = os.path.join(self.temp_dir.name, 'addresses.csv')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("주소,지번주소,위도,경도\n송파동 18-3,서울 송파구 송파동 18-3,37.5,127.1\n송파동 22-6,,37.6,127.2\n")
+        count = self.index.load_csv(file_path, name_column='지번주소')
+        self.assertEqual(count, 2)
+        self.assertEqual(self.index.get('송파동 18-3'), ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+        self.assertEqual(self.index.get('송파동 22-6'), ('송파동 22-6', {'lat': 37.6, 'lon': 127.2}))
+        with self.assertRaises(ValueError):
+            self.index.load_csv(file_path, name_column='도로명주소')
+
+    def test_load_csv_missing_columns(self):
+        file_path = os.path.join(self.temp_dir.name, 'addresses.csv')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("주소,x,y\n송파동 18-3,127.1,37.5\n")
+        with self.assertRaises(ValueError):
+            self.index.load_csv(file_path)
+
+    def test_load_clothbox(self):
+        clothbox_db = MagicMock()
+        clothbox_db.get_clothbox_locations.return_value = iter([
+            {'source_address': '송파동 18-3', 'address': '서울 송파구 송파동 18-3', 'coordinates': [127.1, 37.5]}
+        ])
+        self.assertEqual(self.index.load_clothbox(clothbox_db), 1)
+        self.assertEqual(self.index.get('송파동 18-3'), ('서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1}))
+
+class TestLocalGeocoder(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index = AddressIndex(os.path.join(self.temp_dir.name, 'address_index.sqlite3'))
+        self.index.put_many([('송파동 18-3', '서울 송파구 송파동 18-3', {'lat': 37.5, 'lon': 127.1})])
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_geocode(self):
+        fallback = MagicMock()
+        fallback.geocode.return_value = ('서울 송파구 송파동 22-6', {'lat': 37.6, 'lon': 127.2})
+        geocoder = LocalGeocoder(self.index, fallback=fallback)
+        self.assertEqual(geocoder.geocode('송파동 18-3')[0], '서울 송파구 송파동 18-3')
+        fallback.geocode.assert_not_called()
+        self.assertEqual(geocoder.geocode('송파동 22-6')[0], '서울 송파구 송파동 22-6')
+        fallback.geocode.assert_called_once_with('송파동 22-6')
+
+    def test_geocode_offline(self):
+        geocoder = LocalGeocoder(self.index)
+        with self.assertRaises(ValueError):
+            geocoder.geocode('송파동 22-6')
+
+    def test_geocode_many(self):
+        fallback = MagicMock()
+        fallback.workers = 2
+        fallback.geocode.side_effect = lambda address: ('서울 ' + address, {'lat': 37.6, 'lon': 127.2})
+        geocoder = LocalGeocoder(self.index, fallback=fallback)
+        results = list(geocoder.geocode_many(iter(['송파동 18-3', '송파동 22-6', '송파동 21-11'])))
+        self.assertEqual(sorted(result[1] for result in results), ['서울 송파구 송파동 18-3', '서울 송파동 21-11', '서울 송파동 22-6'])
+        self.assertEqual(sorted(call[0][0] for call in fallback.geocode.call_args_list), ['송파동 21-11', '송파동 22-6'])
+        self.assertEqual(geocoder.stats(), {'hits': 1, 'misses': 2})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from logging.handlers import QueueHandler
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.util.logger import Logger, ProgressLogger
+
+class TestLogger(unittest.TestCase):
+
+    def test_queue_handler(self):
+        log = Logger.get_instance(__name__)
+        other = Logger.get_instance('other')
+        self.assertIs(log, Logger.get_instance(__name__))
+        self.assertEqual(log.name, __name__)
+        self.assertEqual(other.name, 'other')
+        self.assertEqual([handler for handler in log.handlers if isinstance(handler, QueueHandler)],
+                         [handler for handler in other.handlers if isinstance(handler, QueueHandler)])
+        self.assertEqual(len(log.handlers), 1)
+        self.assertFalse(other.propagate)
+
+class TestProgressLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.log = MagicMock()
+
+    def test_every_rows(self):
+        progress = ProgressLogger(self.log, 'Geocoded', every_rows=10, every_seconds=3600)
+        for _ in range(25):
+            progress.add()
+        progress.add('failed', 5)
+        self.assertEqual(self.log.info.call_count, 3)
+        progress.finish()
+        self.assertEqual(progress.counts, {'ok': 25, 'failed': 5})
+        self.assertEqual(self.log.info.call_args[0][2], 30)
+
+    @patch('autoupdater.util.logger.time.monotonic')
+    def test_every_seconds(self, mock_time):
+        mock_time.return_value = 0
+        progress = ProgressLogger(self.log, 'Wrote', every_rows=1000, every_seconds=10)
+        progress.add()
+        self.log.info.assert_not_called()
+        mock_time.return_value = 11
+        progress.add()
+        self.log.info.assert_called_once()
+
+    def test_disabled_level(self):
+        self.log.isEnabledFor.return_value = False
+        progress = ProgressLogger(self.log, 'Wrote', every_rows=1)
+        progress.add()
+        self.log.info.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.__main__ import main
+
+class TestMain(unittest.TestCase):
+
+    @patch('autoupdater.clothbox_updater.ClothBoxUpdater')
+    @patch('autoupdater.clothbox_manager.ClothBoxManager')
+    def test_update(self, mock_manager, mock_updater):
+        main(['update', '--provider', '송파구', '--provider', '강남구', '--resume'])
+        mock_updater.return_value.start_update.assert_called_once_with(resume=True, providers=['송파구', '강남구'], refresh=False)
+
+    @patch('autoupdater.clothbox_updater.ClothBoxUpdater')
+    @patch('autoupdater.clothbox_manager.ClothBoxManager')
+    def test_update_all(self, mock_manager, mock_updater):
+        main(['update', '--refresh'])
+        mock_updater.return_value.start_update.assert_called_once_with(resume=False, providers=None, refresh=True)
+
+    @patch('autoupdater.data_portal_searcher.DataPortalSearcher.search_data_many')
+    def test_search(self, mock_search):
+        mock_search.return_value = [{'title': 'Title1', 'link': 'Link1'}]
+        with patch('builtins.print') as mock_print:
+            main(['search', '--date', '2024-06-01'])
+        self.assertEqual(mock_search.call_args[0][1], '2024-06-01')
+        self.assertIn('Link1', mock_print.call_args[0][0])
+
+    def test_lazy_imports(self):
+        # 새 프로세스에서 가져와야 다른 테스트가 가져온 모듈의 영향을 받지 않음
+        import subprocess
+        code = ("import sys; import autoupdater.__main__, autoupdater.clothbox_updater; "
+                "print(','.join(m for m in ('pandas', 'selenium', 'pymongo') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+        self.assertEqual(result.stdout.strip(), '')
+
+if __name__ == '__main__':
+    unittest.main()
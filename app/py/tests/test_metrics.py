@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.util.metrics import MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.metrics = MetricsRegistry()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_instance(self):
+        self.assertIs(MetricsRegistry.get_instance(), MetricsRegistry.get_instance())
+
+    def test_counter(self):
+        self.metrics.inc('rows_total', provider='송파구')
+        self.metrics.inc('rows_total', 2, provider='송파구')
+        self.metrics.inc('rows_total', provider='강남구')
+        counters = self.metrics.snapshot()['counters']
+        self.assertEqual([(counter['labels']['provider'], counter['value']) for counter in counters], [('강남구', 1), ('송파구', 3)])
+
+    def test_timer(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.timer('download_seconds', provider='송파구'):
+                raise ValueError()
+        self.metrics.observe('download_seconds', 7, provider='송파구')
+        histogram = self.metrics.snapshot()['histograms'][0]
+        self.assertEqual(histogram['count'], 2)
+        self.assertEqual(histogram['buckets']['0.01'], 1)
+        self.assertEqual(histogram['buckets']['10'], 1)
+
+    def test_reset(self):
+        self.metrics.inc('rows_total')
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {'counters': [], 'histograms': []})
+
+    def test_write_report(self):
+        path = os.path.join(self.temp_dir.name, 'report.json')
+        self.metrics.inc('rows_total', provider='송파구')
+        self.metrics.write_report(path, status='finished')
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['status'], 'finished')
+        self.assertEqual(report['counters'], [{'name': 'rows_total', 'labels': {'provider': '송파구'}, 'value': 1}])
+
+    def test_write_prometheus(self):
+        path = os.path.join(self.temp_dir.name, 'metrics.prom')
+        self.metrics.inc('rows_total', provider='송파"구')
+        self.metrics.inc('rows_total', provider='강남구')
+        self.metrics.observe('download_seconds', 0.3)
+        self.metrics.observe('download_seconds', 500)
+        self.metrics.write_prometheus(path)
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertIn('clothbox_rows_total{provider="송파\\"구"} 1', lines)
+        self.assertIn('clothbox_download_seconds_bucket{le="0.5"} 1', lines)
+        self.assertIn('clothbox_download_seconds_bucket{le="300"} 1', lines)
+        self.assertIn('clothbox_download_seconds_bucket{le="+Inf"} 2', lines)
+        self.assertIn('clothbox_download_seconds_count 2', lines)
+        self.assertEqual(lines.count('# TYPE clothbox_rows_total counter'), 1)
+        self.assertIn('# HELP clothbox_rows_total Rows total.', lines)
+        self.assertEqual(lines.count('# TYPE clothbox_download_seconds histogram'), 1)
+        self.assertIn('# HELP clothbox_download_seconds Duration of downloading a dataset.', lines)
+        self.assertLess(lines.index('# TYPE clothbox_download_seconds histogram'), lines.index('clothbox_download_seconds_count 2'))
+
+if __name__ == '__main__':
+    unittest.main()
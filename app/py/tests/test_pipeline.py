@@ -0,0 +1,49 @@
+import unittest
+import threading
+import time
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.pipeline import Pipeline, PipelineStage
+
+def double(items):
+    for item in items:
+        yield item * 2
+
+class TestPipeline(unittest.TestCase):
+
+    def test_run(self):
+        pipeline = Pipeline([PipelineStage('double', double, workers=3), PipelineStage('double', double)], queue_size=2)
+        self.assertEqual(sorted(pipeline.run(range(100))), [i * 4 for i in range(100)])
+
+    def test_run_empty(self):
+        pipeline = Pipeline([PipelineStage('double', double, workers=2)])
+        self.assertEqual(list(pipeline.run([])), [])
+
+    def test_stages_overlap(self):
+        first_done = threading.Event()
+        overlapped = []
+        def slow(items):
+            for item in items:
+                yield item
+            first_done.set()
+        def check(items):
+            for item in items:
+                overlapped.append(not first_done.is_set())
+                yield item
+        pipeline = Pipeline([PipelineStage('slow', slow), PipelineStage('check', check)], queue_size=1)
+        list(pipeline.run(range(10)))
+        self.assertTrue(overlapped[0])
+
+    def test_stage_error(self):
+        def fail(items):
+            for item in items:
+                if item == 5:
+                    raise ValueError("stage error")
+                yield item
+        pipeline = Pipeline([PipelineStage('fail', fail), PipelineStage('double', double)], queue_size=1)
+        with self.assertRaises(ValueError):
+            list(pipeline.run(range(100)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.run_journal import RunJournal
+
+class TestRunJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'journal.json')
+        self.download_dir = os.path.join(self.temp_dir.name, 'downloads')
+        self.journal = RunJournal(self.path, self.download_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_without_journal(self):
+        self.assertFalse(self.journal.load())
+
+    def test_update_and_load(self):
+        self.journal.start([{'title': 'Title1', 'link': 'Link1'}])
+        self.journal.update('Link1', stage='downloaded', hash='abc')
+        self.journal.add_written('Link1', 10)
+        self.journal.add_written('Link1', 5)
+
+        journal = RunJournal(self.path, self.download_dir)
+        self.assertTrue(journal.load())
+        self.assertEqual(journal.search_data_list, [{'title': 'Title1', 'link': 'Link1'}])
+        self.assertEqual(journal.get('Link1'), {'stage': 'downloaded', 'hash': 'abc', 'written': 15})
+        self.assertEqual(journal.get('Link2'), {})
+        self.assertEqual(os.listdir(self.temp_dir.name), ['journal.json'])
+
+    def test_is_finished(self):
+        self.assertFalse(self.journal.is_finished({}))
+        self.assertFalse(self.journal.is_finished({'stage': 'parsed'}))
+        self.assertTrue(self.journal.is_finished({'stage': 'unchanged'}))
+        self.assertFalse(self.journal.is_finished({'stage': 'failed'}))
+        self.assertFalse(self.journal.is_finished({'stage': 'partial'}))
+
+    def test_load_broken_journal(self):
+        with open(self.path, 'w') as f:
+            f.write('{"search_data_list": [')
+        self.assertFalse(self.journal.load())
+
+    def test_options(self):
+        self.journal.start([{'link': 'Link1'}], refresh=True)
+        journal = RunJournal(self.path, self.download_dir)
+        self.assertTrue(journal.load())
+        self.assertEqual(journal.options, {'refresh': True})
+
+    def test_reset(self):
+        self.journal.start([{'link': 'Link1'}, {'link': 'Link2'}])
+        self.journal.update('Link1', stage='ingested')
+        self.journal.update('Link2', stage='ingested')
+        self.journal.reset(['Link1'])
+        journal = RunJournal(self.path, self.download_dir)
+        self.assertTrue(journal.load())
+        self.assertEqual(journal.get('Link1'), {})
+        self.assertEqual(journal.get('Link2'), {'stage': 'ingested'})
+
+    def test_start_and_finish(self):
+        directory = self.journal.make_download_directory()
+        self.journal.start([])
+        self.assertFalse(os.path.exists(directory))
+        self.journal.make_download_directory()
+        self.journal.finish()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.download_dir))
+
+if __name__ == '__main__':
+    unittest.main()
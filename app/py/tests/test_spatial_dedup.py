@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.spatial_dedup import SpatialDeduplicator
+
+def record(address, lon, lat):
+    return {'address': address, 'coordinates': [lon, lat]}
+
+class TestSpatialDeduplicator(unittest.TestCase):
+
+    def test_add_many(self):
+        deduplicator = SpatialDeduplicator(radius=5)
+        records = [
+            record('송파동 18-3', 127.10801, 37.50666),
+            # 약 2m 떨어진 같은 수거함
+            record('백제고분로 300', 127.10803, 37.50667),
+            # 약 50m 떨어진 다른 수거함
+            record('송파동 18-5', 127.10801, 37.50711),
+        ]
+        kept = deduplicator.add_many(records)
+        self.assertEqual(kept, [records[0], records[0], records[2]])
+        self.assertIs(kept[1], records[0])
+        self.assertEqual(deduplicator.clusters, {'송파동 18-3': ['백제고분로 300']})
+        self.assertEqual(deduplicator.merged, 1)
+
+    def test_add_many_across_batches_and_cells(self):
+        deduplicator = SpatialDeduplicator(radius=5)
+        # 경도 0.00005도는 위도 37.5도에서 약 4.4m
+        base = [record(f'주소 {i}', 127.0 + i * 0.001, 37.5) for i in range(100)]
+        near = [record(f'근처 {i}', 127.0 + i * 0.001 + 0.00005, 37.5) for i in range(100)]
+        self.assertEqual(deduplicator.add_many(base), base)
+        self.assertEqual(deduplicator.add_many(near), base)
+        self.assertEqual(deduplicator.report(limit=3)['merged'], 100)
+        self.assertEqual(len(deduplicator.report(limit=3)['largest']), 3)
+
+    def test_radius_boundary(self):
+        deduplicator = SpatialDeduplicator(radius=5)
+        # 위도 0.00004도는 약 4.4m, c는 a에서 약 11m
+        records = [record('a', 127.0, 37.5), record('b', 127.0, 37.50004), record('c', 127.0, 37.50010)]
+        self.assertEqual([kept['address'] for kept in deduplicator.add_many(records)], ['a', 'a', 'c'])
+
+    def test_same_address(self):
+        deduplicator = SpatialDeduplicator(radius=5)
+        records = [record('a', 127.0, 37.5), record('a', 127.0, 37.5)]
+        self.assertIs(deduplicator.add_many(records)[1], records[0])
+        self.assertEqual(deduplicator.clusters, {})
+
+    def test_seed(self):
+        deduplicator = SpatialDeduplicator(radius=5)
+        existing = dict(record('송파동 18-3', 127.10801, 37.50666), providing_name='A')
+        self.assertEqual(deduplicator.seed([existing]), 1)
+        # DB에 있던 수거함이 항상 남음
+        kept = deduplicator.add_many([record('백제고분로 300', 127.10803, 37.50667)])
+        self.assertIs(kept[0], existing)
+        self.assertEqual(deduplicator.clusters, {'송파동 18-3': ['백제고분로 300']})
+
+    def test_find_unseeded_boxes(self):
+        deduplicator = SpatialDeduplicator(radius=5, seed_cell=0.01)
+        boxes = deduplicator.find_unseeded_boxes([record('a', 127.005, 37.505)])
+        self.assertEqual(len(boxes), 1)
+        min_lon, min_lat, max_lon, max_lat = boxes[0]
+        self.assertTrue(min_lon <= 127.005 <= max_lon and min_lat <= 37.505 <= max_lat)
+        self.assertEqual(deduplicator.find_unseeded_boxes([record('b', 127.006, 37.506)]), [])
+        # 칸 경계에서 반경 안에 있는 점은 옆 칸도 찾음
+        self.assertEqual(len(deduplicator.find_unseeded_boxes([record('c', 127.01001, 37.505)])), 1)
+        self.assertEqual(len(deduplicator.find_unseeded_boxes([record('d', 127.02, 37.52)])), 4)
+
+    def test_disabled(self):
+        deduplicator = SpatialDeduplicator(radius=0)
+        records = [record('a', 127.0, 37.5), record('b', 127.0, 37.5)]
+        self.assertEqual(deduplicator.add_many(records), records)
+        self.assertEqual(deduplicator.find_unseeded_boxes(records), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import MagicMock
+from datetime import datetime
+import gzip
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+from autoupdater.tile_exporter import TileExporter, encode_geohash, geohash_bounds
+
+SONGPA = [127.10801, 37.50666]
+GANGNAM = [127.04755, 37.51729]
+SUWON = [127.00889, 37.26389]
+
+class TestTileExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.points = [
+            {'address': '송파동 18-3', 'providing_name': '송파구', 'coordinates': SONGPA},
+            {'address': '역삼동 1', 'providing_name': '강남구', 'coordinates': GANGNAM},
+            {'address': '수원 1', 'providing_name': '수원시', 'coordinates': SUWON},
+        ]
+        self.clothbox_db = MagicMock()
+        self.clothbox_db.get_clothbox_points.side_effect = lambda providing_names=None, boxes=None: iter([
+            dict(point) for point in self.points
+            if (providing_names is None or point['providing_name'] in providing_names) and (boxes is None or any(
+                min_lon <= point['coordinates'][0] <= max_lon and min_lat <= point['coordinates'][1] <= max_lat
+                for min_lon, min_lat, max_lon, max_lat in boxes))
+        ])
+        self.exporter = TileExporter(self.clothbox_db, self.temp_dir.name, precision=5)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read_tile(self, manifest, cell):
+        with gzip.open(os.path.join(self.temp_dir.name, manifest['tiles'][cell]['file']), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(10.40744, 57.64911, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(*SONGPA, 5), 'wydmk')
+
+    def test_geohash_bounds(self):
+        min_lon, min_lat, max_lon, max_lat = geohash_bounds('wydmk')
+        self.assertTrue(min_lon <= SONGPA[0] <= max_lon and min_lat <= SONGPA[1] <= max_lat)
+        self.assertAlmostEqual(max_lon - min_lon, 360 / 2 ** 13)
+        self.assertAlmostEqual(max_lat - min_lat, 180 / 2 ** 12)
+        self.assertEqual(encode_geohash(min_lon, min_lat, 5), 'wydmk')
+
+    def test_export(self):
+        manifest = self.exporter.export()
+        cells = {encode_geohash(*point['coordinates'], 5) for point in self.points}
+        self.assertEqual(set(manifest['tiles']), cells)
+        tile = self._read_tile(manifest, encode_geohash(*SONGPA, 5))
+        self.assertEqual([clothbox['address'] for clothbox in tile['clothboxes']], ['송파동 18-3'])
+        with open(os.path.join(self.temp_dir.name, 'manifest.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_export_incremental(self):
+        first = self.exporter.export()
+        # 송파구 수거함이 수원으로 옮겨짐: 송파 칸은 비고, 수원 칸은 다시 쓰이며, 강남 칸은 그대로
+        self.points[0] = {'address': '수원 2', 'providing_name': '송파구', 'coordinates': SUWON}
+        second = self.exporter.export(['송파구'], datetime(2024, 6, 2, 3))
+
+        songpa, gangnam, suwon = (encode_geohash(*coordinates, 5) for coordinates in (SONGPA, GANGNAM, SUWON))
+        self.assertNotIn(songpa, second['tiles'])
+        self.assertEqual(second['tiles'][gangnam], first['tiles'][gangnam])
+        self.assertEqual(second['tiles'][suwon]['count'], 2)
+        self.assertEqual(second['tiles'][suwon]['providers'], ['송파구', '수원시'])
+        files = set(os.listdir(self.temp_dir.name))
+        self.assertNotIn(first['tiles'][songpa]['file'], files)
+        self.assertNotIn(first['tiles'][suwon]['file'], files)
+        self.assertIn(second['tiles'][suwon]['file'], files)
+        self.assertEqual(second['update_date'], '2024-06-02T03:00:00')
+        self.assertEqual(second['tiles'][suwon]['updated'], '2024-06-02T03:00:00')
+
+    def test_export_incremental_reads_touched_cells(self):
+        self.exporter.export()
+        self.clothbox_db.get_clothbox_points.reset_mock()
+        self.exporter.export(['송파구'])
+        # 공급자의 칸을 찾는 조회와, 그 칸 안의 수거함만 읽는 조회뿐이어야 함
+        self.assertNotIn(((), {}), self.clothbox_db.get_clothbox_points.call_args_list)
+        boxes = self.clothbox_db.get_clothbox_points.call_args[1]['boxes']
+        self.assertEqual(len(boxes), 1)
+        min_lon, min_lat, max_lon, max_lat = boxes[0]
+        self.assertTrue(min_lon <= SONGPA[0] <= max_lon and min_lat <= SONGPA[1] <= max_lat)
+        self.assertFalse(min_lon <= GANGNAM[0] <= max_lon and min_lat <= GANGNAM[1] <= max_lat)
+
+    def test_export_untouched(self):
+        first = self.exporter.export()
+        self.assertEqual(self.exporter.export(['없는 구']), first)
+
+    def test_export_same_content(self):
+        first = self.exporter.export()
+        second = TileExporter(self.clothbox_db, self.temp_dir.name, precision=5).export(['송파구'])
+        cell = encode_geohash(*SONGPA, 5)
+        self.assertEqual(second['tiles'][cell]['file'], first['tiles'][cell]['file'])
+        self.assertIn(first['tiles'][cell]['file'], os.listdir(self.temp_dir.name))
+
+    def test_export_precision_changed(self):
+        first = self.exporter.export()
+        second = TileExporter(self.clothbox_db, self.temp_dir.name, precision=4).export(['송파구'])
+        self.assertEqual(second['precision'], 4)
+        self.assertTrue(all(len(cell) == 4 for cell in second['tiles']))
+        files = set(os.listdir(self.temp_dir.name))
+        self.assertFalse(any(tile['file'] in files for tile in first['tiles'].values()))
+
+if __name__ == '__main__':
+    unittest.main()